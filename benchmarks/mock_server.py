@@ -0,0 +1,285 @@
+# benchmarks/mock_server.py
+#
+# A local stand-in for the two external services the agents depend on:
+#   - POST /v1/chat/completions  (OpenAI-compatible, with tool calls and streaming)
+#   - POST /search               (Tavily-compatible)
+# Both endpoints add configurable latency and fail with a configurable error
+# rate, so the agent pipeline can be benchmarked offline and reproducibly.
+#
+# Run it on its own with:
+#   python benchmarks/mock_server.py --port 8765 --llm-latency-ms 400 --error-rate 0.02
+# and point the agents at it:
+#   QWEN_BASE_URL=http://127.0.0.1:8765/v1 SEARCH_BACKEND=http SEARCH_BASE_URL=http://127.0.0.1:8765
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class LatencyModel:
+    """
+    Draws response delays in milliseconds. Supported distributions:
+    "fixed" (always the mean), "uniform" (mean +/- jitter) and "lognormal"
+    (a right-skewed tail with the given median and shape `sigma`).
+    """
+    def __init__(self, mean_ms: float = 0, distribution: str = "lognormal", jitter_ms: float = 0, sigma: float = 0.5):
+        self.mean_ms = mean_ms
+        self.distribution = distribution
+        self.jitter_ms = jitter_ms
+        self.sigma = sigma
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        if self.mean_ms <= 0:
+            return 0.0
+        if self.distribution == "fixed":
+            delay = self.mean_ms
+        elif self.distribution == "uniform":
+            delay = rng.uniform(self.mean_ms - self.jitter_ms, self.mean_ms + self.jitter_ms)
+        else:
+            delay = self.mean_ms * rng.lognormvariate(0, self.sigma)
+        return max(delay, 0) / 1000.0
+
+class MockConfig:
+    """Behaviour of the mock server. All fields can be changed while it runs."""
+    def __init__(self, llm_latency: LatencyModel = None, search_latency: LatencyModel = None,
+                 error_rate: float = 0.0, error_statuses: tuple = (429, 500, 503),
+                 tool_calls_per_turn: int = 1, completion_words: int = 120, seed: int = None):
+        self.llm_latency = llm_latency or LatencyModel(0)
+        self.search_latency = search_latency or LatencyModel(0)
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.tool_calls_per_turn = tool_calls_per_turn
+        self.completion_words = completion_words
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.request_counts = {"chat": 0, "search": 0, "errors": 0}
+
+    def count(self, name: str):
+        with self.rng_lock:
+            self.request_counts[name] += 1
+
+    def draw(self, latency: LatencyModel):
+        """Returns (delay_seconds, error_status or None) for one request."""
+        with self.rng_lock:
+            delay = latency.sample_seconds(self.rng)
+            failed = self.rng.random() < self.error_rate
+            status = self.rng.choice(self.error_statuses) if failed else None
+        return delay, status
+
+_WORDS = ("coffee", "fresh", "local", "weekend", "roast", "cozy", "friendly", "special", "morning", "brew")
+
+def _estimate_tokens(payload) -> int:
+    return len(json.dumps(payload)) // 4
+
+def _example_arguments(tool: dict, index: int) -> dict:
+    """Builds arguments for a tool call from its JSON schema."""
+    properties = tool["function"].get("parameters", {}).get("properties", {})
+    arguments = {}
+    for name, schema in properties.items():
+        if schema.get("type") == "integer":
+            arguments[name] = index + 1
+        elif schema.get("type") == "boolean":
+            arguments[name] = True
+        else:
+            arguments[name] = f"mock {name} {index + 1}"
+    return arguments
+
+def build_completion(request: dict, config: MockConfig) -> dict:
+    """
+    Emulates one assistant turn: the first turn of a conversation calls the
+    first available tool `tool_calls_per_turn` times; once tool results are in
+    the history, the model answers with plain text.
+    """
+    messages = request.get("messages", [])
+    tools = request.get("tools") or []
+    has_tool_results = any(message.get("role") == "tool" for message in messages)
+    message = {"role": "assistant", "content": None}
+    finish_reason = "stop"
+    if tools and not has_tool_results:
+        tool = tools[0]
+        message["tool_calls"] = [
+            {
+                "id": f"call_{int(time.time() * 1000)}_{index}",
+                "type": "function",
+                "function": {"name": tool["function"]["name"], "arguments": json.dumps(_example_arguments(tool, index))},
+            }
+            for index in range(config.tool_calls_per_turn)
+        ]
+        finish_reason = "tool_calls"
+    else:
+        words = [_WORDS[index % len(_WORDS)] for index in range(config.completion_words)]
+        message["content"] = "Mock answer: " + " ".join(words)
+    prompt_tokens = _estimate_tokens(messages) + _estimate_tokens(tools)
+    completion_tokens = _estimate_tokens(message)
+    return {
+        "id": f"chatcmpl-mock-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+def stream_chunks(completion: dict):
+    """Splits a completion into OpenAI-style `chat.completion.chunk` events."""
+    base = {key: completion[key] for key in ("id", "created", "model")}
+    base["object"] = "chat.completion.chunk"
+    message = completion["choices"][0]["message"]
+    if message.get("tool_calls"):
+        for index, tool_call in enumerate(message["tool_calls"]):
+            arguments = tool_call["function"]["arguments"]
+            middle = len(arguments) // 2
+            first = {"index": index, "id": tool_call["id"], "type": "function",
+                     "function": {"name": tool_call["function"]["name"], "arguments": arguments[:middle]}}
+            second = {"index": index, "function": {"arguments": arguments[middle:]}}
+            for delta in (first, second):
+                yield dict(base, choices=[{"index": 0, "delta": {"tool_calls": [delta]}, "finish_reason": None}])
+    else:
+        words = message["content"].split(" ")
+        for index, word in enumerate(words):
+            text = word if index == 0 else " " + word
+            yield dict(base, choices=[{"index": 0, "delta": {"content": text}, "finish_reason": None}])
+    yield dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": completion["choices"][0]["finish_reason"]}])
+    yield dict(base, choices=[], usage=completion["usage"])
+
+def build_search_result(request: dict) -> dict:
+    query = request.get("query", "")
+    return {
+        "query": query,
+        "answer": f"Mock search answer for '{query}': a farmers market and a live jazz night are on this weekend.",
+        "results": [
+            {"title": f"Result {index + 1} for {query}", "url": f"https://example.com/{index + 1}",
+             "content": "Local events, trends and news.", "score": 0.9 - index * 0.1}
+            for index in range(3)
+        ],
+    }
+
+def make_handler(config: MockConfig):
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            # Keep benchmark output clean.
+            pass
+
+        def _read_json(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_error_status(self, status: int):
+            config.count("errors")
+            payload = {"error": {"message": f"Mock error {status}", "type": "mock_error", "code": status}}
+            self._send_json(status, payload)
+
+        def _send_stream(self, completion: dict):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for chunk in stream_chunks(completion):
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+        def do_POST(self):
+            request = self._read_json()
+            if self.path.endswith("/chat/completions"):
+                config.count("chat")
+                delay, error_status = config.draw(config.llm_latency)
+                time.sleep(delay)
+                if error_status:
+                    return self._send_error_status(error_status)
+                completion = build_completion(request, config)
+                if request.get("stream"):
+                    return self._send_stream(completion)
+                return self._send_json(200, completion)
+            if self.path.rstrip("/").endswith("/search"):
+                config.count("search")
+                delay, error_status = config.draw(config.search_latency)
+                time.sleep(delay)
+                if error_status:
+                    return self._send_error_status(error_status)
+                return self._send_json(200, build_search_result(request))
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    return MockHandler
+
+class MockServer:
+    """Runs the mock endpoints on a background thread."""
+    def __init__(self, config: MockConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockConfig()
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.config))
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    """Adds the latency/error options shared by the server and the benchmark."""
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Median LLM response latency.")
+    parser.add_argument("--search-latency-ms", type=float, default=150, help="Median search latency.")
+    parser.add_argument("--latency-distribution", choices=("fixed", "uniform", "lognormal"), default="lognormal")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Shape of the lognormal tail.")
+    parser.add_argument("--latency-jitter-ms", type=float, default=50, help="Half-width of the uniform distribution.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail.")
+    parser.add_argument("--error-statuses", default="429,500,503", help="Comma-separated HTTP statuses for failures.")
+    parser.add_argument("--tool-calls-per-turn", type=int, default=2)
+    parser.add_argument("--completion-words", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=1234)
+
+def config_from_args(args) -> MockConfig:
+    def latency(mean_ms):
+        return LatencyModel(mean_ms, args.latency_distribution, args.latency_jitter_ms, args.latency_sigma)
+    return MockConfig(
+        llm_latency=latency(args.llm_latency_ms),
+        search_latency=latency(args.search_latency_ms),
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(status) for status in args.error_statuses.split(",") if status),
+        tool_calls_per_turn=args.tool_calls_per_turn,
+        completion_words=args.completion_words,
+        seed=args.seed,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible and Tavily-compatible server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    server = MockServer(config_from_args(args), host=args.host, port=args.port)
+    print(f"Mock server listening on {server.url} (LLM base URL: {server.url}/v1)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# benchmarks/run_benchmark.py
+#
+# Measures end-to-end latency and throughput of ManagerAgent.delegate_task
+# against the local mock server (no network, no API keys needed).
+#
+#   python benchmarks/run_benchmark.py --concurrency 1,4,16 --goals 32
+#
+# For every concurrency level it reports p50/p95/p99 goal latency and goals
+# per second. Each run is appended to benchmarks/results/history.jsonl together
+# with the git commit, and compared with the last run of the same configuration.
+
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from benchmarks.mock_server import MockServer, add_mock_arguments, config_from_args
+
+RESULTS_PATH = os.path.join(project_root, "benchmarks", "results", "history.jsonl")
+
+DEFAULT_GOALS = [
+    "Create an engaging Instagram post about our weekly special.",
+    "Check for any new customer reviews and draft responses.",
+    "Respond to reviews and create a post thanking our regulars.",
+]
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+def summarize(latencies: list, errors: int, wall_seconds: float, concurrency: int) -> dict:
+    return {
+        "concurrency": concurrency,
+        "goals": len(latencies) + errors,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "goals_per_second": round((len(latencies) + errors) / wall_seconds, 3) if wall_seconds else 0.0,
+        "wall_seconds": round(wall_seconds, 3),
+    }
+
+def configure_environment(server_url: str):
+    """
+    Points the agents at the mock server. Must run before `src` is imported,
+    because settings are read at import time.
+    """
+    os.environ["QWEN_BASE_URL"] = f"{server_url}/v1"
+    os.environ.setdefault("QWEN_API_KEY", "mock-key")
+    os.environ["SEARCH_BACKEND"] = "http"
+    os.environ["SEARCH_BASE_URL"] = server_url
+    os.environ.setdefault("TAVILY_API_KEY", "mock-key")
+    # Every request must reach the mock server, otherwise we measure the cache.
+    os.environ["COMPLETION_CACHE_MODE"] = "off"
+    # Keep drafted replies out of the real review store.
+    os.environ["REVIEW_STORE_PATH"] = ":memory:"
+
+def isolated_profile(business_profile: str, index: int) -> str:
+    """
+    The profile with a business_id of its own, so every goal starts with an
+    empty review watermark and does the same work.
+    """
+    return f"{business_profile.rstrip()}\nbusiness_id: benchmark-{index}\n"
+
+def run_sync_level(runs: list, concurrency: int) -> dict:
+    """Calls delegate_task for every (manager, goal) pair from `concurrency` threads."""
+    latencies, errors = [], 0
+
+    def timed(manager, goal):
+        started = time.perf_counter()
+        result = manager.delegate_task(goal)
+        return time.perf_counter() - started, result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(timed, manager, goal) for manager, goal in runs]:
+            try:
+                elapsed, result = future.result()
+                if isinstance(result, str) and result.startswith("Error:"):
+                    errors += 1
+                else:
+                    latencies.append(elapsed)
+            except Exception:
+                errors += 1
+    return summarize(latencies, errors, time.perf_counter() - started, concurrency)
+
+async def run_async_level(runs: list, concurrency: int) -> dict:
+    """Awaits adelegate_task for every (manager, goal) pair with at most `concurrency` goals in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def timed(manager, goal):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await manager.adelegate_task(goal)
+            except Exception:
+                errors += 1
+                return
+            if isinstance(result, str) and result.startswith("Error:"):
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(manager, goal) for manager, goal in runs))
+    return summarize(latencies, errors, time.perf_counter() - started, concurrency)
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def load_previous(config: dict):
+    """Returns the most recent stored run with the same configuration, if any."""
+    if not os.path.exists(RESULTS_PATH):
+        return None
+    previous = None
+    with open(RESULTS_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("config") == config:
+                previous = record
+    return previous
+
+def print_report(record: dict, previous: dict = None):
+    previous_levels = {level["concurrency"]: level for level in (previous or {}).get("levels", [])}
+    print(f"\nBenchmark @ {record['commit']} ({record['config']['mode']} mode)")
+    header = f"{'concurrency':>11} {'goals':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'goals/s':>9}"
+    print(header)
+    print("-" * len(header))
+    for level in record["levels"]:
+        print(f"{level['concurrency']:>11} {level['goals']:>6} {level['errors']:>6} {level['p50_ms']:>9} "
+              f"{level['p95_ms']:>9} {level['p99_ms']:>9} {level['goals_per_second']:>9}")
+        before = previous_levels.get(level["concurrency"])
+        if before:
+            def change(key):
+                return f"{(level[key] - before[key]) / before[key] * 100:+.1f}%" if before[key] else "n/a"
+            print(f"{'':>11} vs {previous['commit']}: p50 {change('p50_ms')}, p95 {change('p95_ms')}, "
+                  f"p99 {change('p99_ms')}, goals/s {change('goals_per_second')}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ManagerAgent.delegate_task against a local mock server.")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels.")
+    parser.add_argument("--goals", type=int, default=32, help="Goals per concurrency level.")
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync",
+                        help="sync: delegate_task from threads; async: adelegate_task on one event loop.")
+    parser.add_argument("--no-save", action="store_true", help="Do not append the results to the history file.")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockServer(config_from_args(args)).start()
+    configure_environment(server.url)
+
+    from src.agents.manager_agent import ManagerAgent
+    from src.core.rate_limit import RetryPolicy
+    from src.tools.web_search import clear_search_cache
+
+    profile_path = os.path.join(project_root, "data", "business_profile.txt")
+    with open(profile_path, "r") as f:
+        business_profile = f.read()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+    goals = [DEFAULT_GOALS[index % len(DEFAULT_GOALS)] for index in range(args.goals)]
+    retry_policy = RetryPolicy(max_attempts=5, base_delay=0.05, max_delay=1.0)
+    results = []
+    try:
+        for level_index, concurrency in enumerate(levels):
+            clear_search_cache()
+            # The agents log every step with print(); keep the report readable.
+            with redirect_stdout(io.StringIO()):
+                # The review store is shared by the whole process, so every goal gets a
+                # business of its own; otherwise later goals would find the reviews
+                # already drafted and skip the LLM calls.
+                runs = [
+                    (ManagerAgent(
+                        business_profile=isolated_profile(business_profile, level_index * len(goals) + index),
+                        retry_policy=retry_policy,
+                    ), goal)
+                    for index, goal in enumerate(goals)
+                ]
+                if args.mode == "sync":
+                    level = run_sync_level(runs, concurrency)
+                else:
+                    level = asyncio.run(run_async_level(runs, concurrency))
+            results.append(level)
+            print(f"concurrency={concurrency}: p50={level['p50_ms']}ms p95={level['p95_ms']}ms "
+                  f"p99={level['p99_ms']}ms goals/s={level['goals_per_second']} errors={level['errors']}")
+    finally:
+        server.stop()
+
+    config = {
+        "mode": args.mode,
+        "goals": args.goals,
+        "concurrency": levels,
+        "llm_latency_ms": args.llm_latency_ms,
+        "search_latency_ms": args.search_latency_ms,
+        "latency_distribution": args.latency_distribution,
+        "error_rate": args.error_rate,
+        "tool_calls_per_turn": args.tool_calls_per_turn,
+    }
+    record = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": config,
+              "levels": results}
+    print_report(record, load_previous(config))
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"\nResults appended to {os.path.relpath(RESULTS_PATH, project_root)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/startup_benchmark.py
+#
+# Measures cold-start cost: every run is a fresh Python process that imports
+# the ManagerAgent, builds it and handles one goal against the local mock
+# server. For each phase it reports the median and minimum over the runs, plus
+# which heavy libraries the goal ended up importing.
+#
+#   python benchmarks/startup_benchmark.py --runs 5 --goal "Create an Instagram post."
+#
+# Each run is appended to benchmarks/results/startup_history.jsonl and compared
+# with the last run of the same configuration.
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from benchmarks.mock_server import MockServer, add_mock_arguments, config_from_args
+from benchmarks.run_benchmark import configure_environment, git_commit
+
+RESULTS_PATH = os.path.join(project_root, "benchmarks", "results", "startup_history.jsonl")
+
+# Libraries whose import dominates start-up time when they are loaded eagerly.
+HEAVY_MODULES = ("openai", "tavily", "requests", "numpy", "tiktoken")
+
+PHASES = ("import_ms", "construct_ms", "first_goal_ms", "total_ms")
+
+# Runs in the child process; prints one JSON line with the timings.
+CHILD_SCRIPT = r"""
+import io, json, os, sys, time, resource
+from contextlib import redirect_stdout
+started = time.perf_counter()
+sys.path.insert(0, os.environ["STARTUP_PROJECT_ROOT"])
+goal = os.environ.get("STARTUP_GOAL", "")
+timings = {}
+with redirect_stdout(io.StringIO()):
+    from src.agents.manager_agent import ManagerAgent
+    from src.core.profiles import load_profile_file
+    timings["import_ms"] = (time.perf_counter() - started) * 1000
+    mark = time.perf_counter()
+    manager = ManagerAgent(load_profile_file(os.path.join(os.environ["STARTUP_PROJECT_ROOT"], "data", "business_profile.txt")))
+    timings["construct_ms"] = (time.perf_counter() - mark) * 1000
+    mark = time.perf_counter()
+    if goal:
+        manager.delegate_task(goal)
+    timings["first_goal_ms"] = (time.perf_counter() - mark) * 1000
+timings["total_ms"] = (time.perf_counter() - started) * 1000
+timings["modules"] = [name for name in json.loads(os.environ["STARTUP_HEAVY_MODULES"]) if name in sys.modules]
+timings["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(timings))
+"""
+
+def run_once(goal: str) -> dict:
+    env = dict(os.environ, STARTUP_PROJECT_ROOT=project_root, STARTUP_GOAL=goal,
+               STARTUP_HEAVY_MODULES=json.dumps(HEAVY_MODULES))
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT], cwd=project_root, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def summarize(samples: list) -> dict:
+    summary = {}
+    for phase in PHASES + ("max_rss_mb",):
+        values = [sample[phase] for sample in samples]
+        summary[phase] = {"median": round(statistics.median(values), 1), "min": round(min(values), 1)}
+    summary["modules"] = samples[-1]["modules"]
+    return summary
+
+def load_previous(config: dict):
+    """Returns the most recent stored run with the same configuration, if any."""
+    if not os.path.exists(RESULTS_PATH):
+        return None
+    previous = None
+    with open(RESULTS_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("config") == config:
+                previous = record
+    return previous
+
+def print_report(record: dict, previous: dict = None):
+    summary = record["summary"]
+    print(f"\nStartup benchmark @ {record['commit']} ({record['config']['runs']} runs, goal: "
+          f"{record['config']['goal'] or '(none)'})")
+    header = f"{'phase':>14} {'median':>9} {'min':>9}"
+    print(header)
+    print("-" * len(header))
+    for phase in PHASES + ("max_rss_mb",):
+        line = f"{phase:>14} {summary[phase]['median']:>9} {summary[phase]['min']:>9}"
+        if previous and previous["summary"][phase]["median"]:
+            before = previous["summary"][phase]["median"]
+            line += f"   vs {previous['commit']}: {(summary[phase]['median'] - before) / before * 100:+.1f}%"
+        print(line)
+    print(f"Heavy modules imported: {', '.join(summary['modules']) or 'none'}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and first-goal time in fresh processes.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh processes to measure.")
+    parser.add_argument("--goal", default="Create an engaging Instagram post about our weekly special.",
+                        help="Goal handled after start-up; pass an empty string to measure start-up only.")
+    parser.add_argument("--no-save", action="store_true", help="Do not append the results to the history file.")
+    add_mock_arguments(parser)
+    # Start-up cost is what is measured here, not the latency of the (mock) APIs.
+    parser.set_defaults(llm_latency_ms=0, search_latency_ms=0)
+    args = parser.parse_args()
+
+    server = MockServer(config_from_args(args)).start()
+    configure_environment(server.url)
+    try:
+        samples = []
+        for run in range(1, args.runs + 1):
+            sample = run_once(args.goal)
+            samples.append(sample)
+            print(f"run {run}: import={sample['import_ms']:.0f}ms construct={sample['construct_ms']:.0f}ms "
+                  f"first_goal={sample['first_goal_ms']:.0f}ms total={sample['total_ms']:.0f}ms")
+    finally:
+        server.stop()
+
+    config = {"runs": args.runs, "goal": args.goal}
+    record = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": config,
+              "summary": summarize(samples)}
+    print_report(record, load_previous(config))
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"\nResults appended to {os.path.relpath(RESULTS_PATH, project_root)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,645 @@
+import os
+import json
+import asyncio
+import inspect
+from src.config import settings
+from src.core.completion_cache import get_completion_cache, make_cache_key
+from src.core.rate_limit import RetryPolicy, estimate_request_tokens
+from src.core.context import ContextManager, ContextReport, truncate_text
+from src.core.deadlines import (
+    DeadlineExceeded, deadline_expired, mark_cut_short, time_budget, call_with_timeout, await_with_timeout,
+)
+from src.core.hedging import get_hedger
+from src.core.profiles import get_profile_store
+from src.core.tracing import get_tracer, annotate
+from src.tools.registry import get_tool, get_tool_schema
+
+class BaseAgent:
+    """
+    The BaseAgent holds the ReAct loop shared by the specialist agents.
+    Subclasses provide the system prompt, the tool schemas and the dispatcher
+    that maps tool names to Python functions.
+    """
+    agent_label = "Agent"
+    model = settings.QWEN_MODEL
+    base_url = settings.QWEN_BASE_URL
+    max_iterations = 5
+    log_tool_responses = True
+    # Names of the tools in src/tools/registry.py; their modules are imported on first use.
+    tool_names = ()
+    # Token limit per tool result quoted in a partial answer.
+    partial_result_tokens = 150
+    # While tools are offered, streamed text is shown once it is longer than this (see `_unreleased_text`).
+    stream_holdback_chars = 160
+
+    def __init__(self, business_profile: str, max_tool_concurrency: int = None, completion_cache=None,
+                 rate_limiter=None, retry_policy=None, context_manager=None, tracer=None, profile_store=None,
+                 hedger=None):
+        """
+        Initializes the agent with a dynamic business profile. A shared
+        `rate_limiter` and `retry_policy` (see src/core/rate_limit.py) schedule
+        and retry the requests made on the async path, the `context_manager`
+        keeps every prompt within the token budget, and the `tracer` records
+        spans for runs, LLM iterations and tool calls. The profile is compiled
+        through the shared `profile_store` (see src/core/profiles.py), and the
+        `hedger` (see src/core/hedging.py; on with LLM_HEDGING) hedges slow
+        non-streaming completions.
+        """
+        # The clients are created on first use, so building an agent does not import openai.
+        self._client = None
+        self._async_client = None
+        # Prompts use the compiled (normalized and condensed) profile text.
+        self.profile = (profile_store or get_profile_store()).compile(business_profile)
+        self.business_profile = self.profile.text
+        self.max_tool_concurrency = max_tool_concurrency or settings.TOOL_CONCURRENCY
+        self.completion_cache = completion_cache or get_completion_cache()
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.context_manager = context_manager or ContextManager()
+        self.tracer = tracer or get_tracer()
+        self.hedger = hedger or (get_hedger() if settings.LLM_HEDGING else None)
+        self._tools = None
+        self._tool_dispatcher = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+
+            # Retries are done by `_create`, which keeps them within the deadline.
+            self._client = OpenAI(
+                api_key=os.getenv("QWEN_API_KEY"),
+                base_url=self.base_url,
+                max_retries=0,
+            )
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+
+            # With a retry policy, the SDK must not retry on its own: its retries
+            # would bypass the rate limiter and multiply the policy's attempts.
+            self._async_client = AsyncOpenAI(
+                api_key=os.getenv("QWEN_API_KEY"),
+                base_url=self.base_url,
+                **({"max_retries": 0} if self.retry_policy else {}),
+            )
+        return self._async_client
+
+    @property
+    def tools(self) -> list:
+        """The schemas of the agent's tools, loaded on first use."""
+        if self._tools is None:
+            self._tools = [get_tool_schema(name) for name in self.tool_names]
+        return self._tools
+
+    @tools.setter
+    def tools(self, schemas: list):
+        self._tools = schemas
+
+    @property
+    def tool_dispatcher(self) -> dict:
+        """Maps tool names to their functions, importing the tool modules on first use."""
+        if self._tool_dispatcher is None:
+            self._tool_dispatcher = {name: get_tool(name) for name in self.tool_names}
+        return self._tool_dispatcher
+
+    @tool_dispatcher.setter
+    def tool_dispatcher(self, dispatcher: dict):
+        self._tool_dispatcher = dispatcher
+
+    def build_system_prompt(self) -> str:
+        raise NotImplementedError
+
+    @property
+    def system_prompt(self) -> str:
+        """
+        The system prompt, built once per profile and agent type and shared by
+        every agent instance, so each request starts with the same bytes.
+        """
+        return self.profile.system_prompt(type(self).__name__, self.build_system_prompt)
+
+    def _initial_messages(self, user_goal: str) -> list:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_goal}
+        ]
+
+    @staticmethod
+    def _assistant_message(response_message) -> dict:
+        """
+        Converts the assistant message returned by the client into a plain dict,
+        so the conversation history (and the completion cache) only ever contains
+        JSON-serializable data.
+        """
+        message = {"role": "assistant", "content": response_message.content}
+        if response_message.tool_calls:
+            message["tool_calls"] = [
+                {
+                    "id": tool_call.id,
+                    "type": "function",
+                    "function": {
+                        "name": tool_call.function.name,
+                        "arguments": tool_call.function.arguments,
+                    },
+                }
+                for tool_call in response_message.tool_calls
+            ]
+        return message
+
+    def _request_params(self, messages: list, use_tools: bool = True, **extra) -> dict:
+        """
+        Builds the request for one completion. `use_tools=False` leaves the
+        tools out; `extra` adds parameters such as `response_format`.
+        """
+        params = {
+            "model": self.model,
+            "messages": messages,
+        }
+        # The API rejects an empty tool list, so tool-less agents send none.
+        if use_tools and self.tools:
+            params["tools"] = self.tools
+            params["tool_choice"] = "auto"
+        params.update(extra)
+        return params
+
+    def _cache_lookup(self, params: dict):
+        """
+        Returns (cache_key, cached_message). The key is None when the cache is off.
+        """
+        if not self.completion_cache.enabled:
+            return None, None
+        cache_key = make_cache_key(**params)
+        cached = self.completion_cache.get(cache_key)
+        annotate(cache_hit=cached is not None)
+        if cached is not None:
+            print(f"⚡ {self.agent_label} reused a cached completion.")
+            return cache_key, cached["message"]
+        return cache_key, None
+
+    @staticmethod
+    def _usage_dict(response):
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return None
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+        }
+
+    def _record_response(self, cache_key: str, message: dict, response):
+        """
+        Records the token usage of a fresh response on the current span and
+        stores the message in the completion cache.
+        """
+        usage = self._usage_dict(response)
+        if usage:
+            annotate(prompt_tokens=usage["prompt_tokens"], completion_tokens=usage["completion_tokens"])
+        if cache_key is not None:
+            self.completion_cache.put(cache_key, {"message": message, "usage": usage})
+
+    def _complete(self, messages: list, **request_options) -> dict:
+        """
+        Sends one chat-completion request (or serves it from the completion
+        cache) and returns the assistant message as a dict. `request_options`
+        are passed to `_request_params`.
+        """
+        params = self._request_params(messages, **request_options)
+        cache_key, message = self._cache_lookup(params)
+        if message is not None:
+            return message
+        response = self._create(params)
+        message = self._assistant_message(response.choices[0].message)
+        self._record_response(cache_key, message, response)
+        return message
+
+    def _create(self, params: dict):
+        """
+        Sends a request with the sync client. The request is bounded by
+        LLM_REQUEST_TIMEOUT_SECONDS and by the time left before the deadline;
+        non-streaming requests are hedged when a hedger is configured. 429/5xx
+        errors are retried with the agent's retry policy (or one built from
+        settings) for as long as the deadline leaves time for the backoff.
+        """
+        def make_call():
+            timeout = time_budget(settings.LLM_REQUEST_TIMEOUT_SECONDS)
+            return self.client.chat.completions.create(**params, **({"timeout": timeout} if timeout else {}))
+
+        def attempt():
+            if self.hedger and not params.get("stream"):
+                return self.hedger.run_sync(make_call)
+            return make_call()
+
+        return (self.retry_policy or RetryPolicy.from_settings()).run_sync(attempt)
+
+    async def _acreate(self, params: dict):
+        """
+        Sends a request with the async client, waiting for the rate limiter
+        first and retrying 429/5xx errors when a retry policy is configured.
+        Everything, including the waits, is cancelled when the deadline passes.
+        """
+        async def make_call():
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(estimate_request_tokens(params))
+            timeout = time_budget(settings.LLM_REQUEST_TIMEOUT_SECONDS)
+            return await self.async_client.chat.completions.create(**params, **({"timeout": timeout} if timeout else {}))
+
+        async def attempt():
+            if self.hedger and not params.get("stream"):
+                return await self.hedger.run(make_call)
+            return await make_call()
+
+        budget = time_budget()
+        return await await_with_timeout(self.retry_policy.run(attempt) if self.retry_policy else attempt(), budget)
+
+    async def _acomplete(self, messages: list, **request_options) -> dict:
+        params = self._request_params(messages, **request_options)
+        cache_key, message = self._cache_lookup(params)
+        if message is not None:
+            return message
+        response = await self._acreate(params)
+        message = self._assistant_message(response.choices[0].message)
+        self._record_response(cache_key, message, response)
+        return message
+
+    @staticmethod
+    def _stream_params(params: dict) -> dict:
+        # stream_options asks the server to send token usage in the final chunk.
+        return dict(params, stream=True, stream_options={"include_usage": True})
+
+    @staticmethod
+    def _merge_chunk(chunk, content_parts: list, tool_calls_by_index: dict):
+        """
+        Merges one streamed chunk into the partial assistant message. Tool-call
+        deltas arrive in fragments keyed by `index`; their arguments are
+        concatenated until the stream ends.
+        """
+        if not chunk.choices:
+            # The last chunk only carries token usage.
+            return
+        delta = chunk.choices[0].delta
+        for tool_call_delta in delta.tool_calls or []:
+            tool_call = tool_calls_by_index.setdefault(
+                tool_call_delta.index,
+                {"id": None, "type": "function", "function": {"name": "", "arguments": ""}},
+            )
+            if tool_call_delta.id:
+                tool_call["id"] = tool_call_delta.id
+            if tool_call_delta.function:
+                if tool_call_delta.function.name and not tool_call["function"]["name"]:
+                    tool_call["function"]["name"] = tool_call_delta.function.name
+                if tool_call_delta.function.arguments:
+                    tool_call["function"]["arguments"] += tool_call_delta.function.arguments
+        if delta.content:
+            content_parts.append(delta.content)
+
+    def _unreleased_text(self, content_parts: list, tool_calls_by_index: dict, released: int, turn_over: bool):
+        """
+        Returns the streamed text that can be shown to the user now, or None.
+        Models often write a short preamble ("Let me look that up first.")
+        before a tool call, so while the request offers tools, the first
+        `stream_holdback_chars` characters are held back. Text longer than that
+        is a final answer and streams from then on; a turn that calls a tool
+        before that point never shows its text.
+        """
+        if tool_calls_by_index or released >= len(content_parts):
+            return None
+        if not turn_over and not released and sum(map(len, content_parts)) < self.stream_holdback_chars:
+            return None
+        return "".join(content_parts[released:])
+
+    @staticmethod
+    def _stopped(chunk) -> bool:
+        """True if the chunk ends the turn with a final answer (finish_reason "stop")."""
+        return bool(chunk.choices) and chunk.choices[0].finish_reason == "stop"
+
+    @staticmethod
+    def _streamed_message(content_parts: list, tool_calls_by_index: dict) -> dict:
+        message = {"role": "assistant", "content": "".join(content_parts) or None}
+        if tool_calls_by_index:
+            message["tool_calls"] = [tool_calls_by_index[index] for index in sorted(tool_calls_by_index)]
+        return message
+
+    @staticmethod
+    def _final_text(message: dict):
+        """Returns the text of a message if it is a final answer, otherwise None."""
+        if message.get("tool_calls"):
+            return None
+        return message.get("content")
+
+    def _complete_iter(self, messages: list, stream: bool):
+        """
+        Yields the visible text of one completion as it arrives, followed by the
+        complete assistant message as a dict. Without `stream`, or on a cache hit,
+        the text arrives as a single chunk.
+        """
+        if not stream:
+            message = self._complete(messages)
+            if self._final_text(message):
+                yield self._final_text(message)
+            yield message
+            return
+        params = self._request_params(messages)
+        cache_key, message = self._cache_lookup(params)
+        if message is None:
+            content_parts, tool_calls_by_index, last_chunk, released = [], {}, None, 0
+            # Without tools the turn is known to be the final answer, so its text streams right away.
+            tool_free = "tools" not in params
+            response_stream = self._create(self._stream_params(params))
+            try:
+                for chunk in response_stream:
+                    last_chunk = chunk
+                    self._merge_chunk(chunk, content_parts, tool_calls_by_index)
+                    turn_over = tool_free or self._stopped(chunk)
+                    text = self._unreleased_text(content_parts, tool_calls_by_index, released, turn_over)
+                    if text:
+                        released = len(content_parts)
+                        yield text
+                    if deadline_expired():
+                        raise DeadlineExceeded("The deadline passed while the answer was streaming.")
+            finally:
+                response_stream.close()
+            text = self._unreleased_text(content_parts, tool_calls_by_index, released, True)
+            if text:
+                yield text
+            message = self._streamed_message(content_parts, tool_calls_by_index)
+            self._record_response(cache_key, message, last_chunk)
+        elif self._final_text(message):
+            yield self._final_text(message)
+        yield message
+
+    async def _acomplete_iter(self, messages: list, stream: bool):
+        if not stream:
+            message = await self._acomplete(messages)
+            if self._final_text(message):
+                yield self._final_text(message)
+            yield message
+            return
+        params = self._request_params(messages)
+        cache_key, message = self._cache_lookup(params)
+        if message is None:
+            content_parts, tool_calls_by_index, last_chunk, released = [], {}, None, 0
+            # Without tools the turn is known to be the final answer, so its text streams right away.
+            tool_free = "tools" not in params
+            response_stream = await self._acreate(self._stream_params(params))
+            try:
+                async for chunk in response_stream:
+                    last_chunk = chunk
+                    self._merge_chunk(chunk, content_parts, tool_calls_by_index)
+                    turn_over = tool_free or self._stopped(chunk)
+                    text = self._unreleased_text(content_parts, tool_calls_by_index, released, turn_over)
+                    if text:
+                        released = len(content_parts)
+                        yield text
+                    if deadline_expired():
+                        raise DeadlineExceeded("The deadline passed while the answer was streaming.")
+            finally:
+                await response_stream.close()
+            text = self._unreleased_text(content_parts, tool_calls_by_index, released, True)
+            if text:
+                yield text
+            message = self._streamed_message(content_parts, tool_calls_by_index)
+            self._record_response(cache_key, message, last_chunk)
+        elif self._final_text(message):
+            yield self._final_text(message)
+        yield message
+
+    def _resolve_tool_call(self, tool_call: dict):
+        """
+        Looks up the function for a tool call and parses its arguments.
+        Returns (function_name, function_to_call, function_args).
+        """
+        function_name = tool_call["function"]["name"]
+        function_to_call = self.tool_dispatcher.get(function_name)
+        function_args = json.loads(tool_call["function"]["arguments"] or "{}") if function_to_call else {}
+        return function_name, function_to_call, function_args
+
+    def _tool_message(self, tool_call: dict, function_name: str, function_response: str) -> dict:
+        if self.log_tool_responses:
+            print(f"   - Function response: {function_response}")
+        else:
+            print(f"   - Function response received.")
+        return {
+            "tool_call_id": tool_call["id"],
+            "role": "tool",
+            "name": function_name,
+            "content": function_response,
+        }
+
+    def _execute_tool_call(self, tool_call: dict):
+        function_name, function_to_call, function_args = self._resolve_tool_call(tool_call)
+        if not function_to_call:
+            print(f"   - Error: Agent tried to call an unknown function: {function_name}")
+            return None
+        with self.tracer.span("tool_call", agent=self.agent_label, tool=function_name) as span:
+            print(f"   - Calling function: {function_name} with args: {function_args}")
+            try:
+                function_response = call_with_timeout(
+                    time_budget(settings.TOOL_TIMEOUT_SECONDS), function_to_call, **function_args
+                )
+            except TimeoutError:
+                span.set(timed_out=True)
+                function_response = self._tool_timeout_message(function_name)
+        return self._tool_message(tool_call, function_name, function_response)
+
+    async def _aexecute_tool_call(self, tool_call: dict, semaphore: asyncio.Semaphore):
+        function_name, function_to_call, function_args = self._resolve_tool_call(tool_call)
+        if not function_to_call:
+            print(f"   - Error: Agent tried to call an unknown function: {function_name}")
+            return None
+        async with semaphore:
+            with self.tracer.span("tool_call", agent=self.agent_label, tool=function_name) as span:
+                print(f"   - Calling function: {function_name} with args: {function_args}")
+                try:
+                    timeout = time_budget(settings.TOOL_TIMEOUT_SECONDS)
+                    if inspect.iscoroutinefunction(function_to_call):
+                        function_response = await await_with_timeout(function_to_call(**function_args), timeout)
+                    else:
+                        # Blocking tools (HTTP clients, file access) run in a worker thread
+                        # so they do not stall the event loop.
+                        function_response = await await_with_timeout(
+                            asyncio.to_thread(function_to_call, **function_args), timeout
+                        )
+                except (TimeoutError, asyncio.TimeoutError):
+                    span.set(timed_out=True)
+                    function_response = self._tool_timeout_message(function_name)
+        return self._tool_message(tool_call, function_name, function_response)
+
+    @staticmethod
+    def _tool_timeout_message(function_name: str) -> str:
+        print(f"   - Function {function_name} timed out.")
+        return f"Error: The tool '{function_name}' did not answer in time. Continue without its result."
+
+    @staticmethod
+    def _timed_out(error: Exception) -> bool:
+        """True if `error` is a timeout caused by the deadline of the goal (rather than by one request)."""
+        from openai import APITimeoutError
+
+        return isinstance(error, (TimeoutError, asyncio.TimeoutError, APITimeoutError)) and deadline_expired()
+
+    def _partial_answer(self, messages: list, answer_started: bool) -> str:
+        """
+        The best-effort answer returned when the deadline passes: a note if the
+        final answer was already streaming, otherwise the tool results gathered
+        so far.
+        """
+        if answer_started:
+            return "\n\n[Cut short: the time limit for this goal was reached.]"
+        findings = [
+            f"- {message['name']}: {truncate_text(message['content'], self.partial_result_tokens)}"
+            for message in messages
+            if message.get("role") == "tool" and not str(message.get("content", "")).startswith("Error:")
+        ]
+        if not findings:
+            return "Error: Agent could not complete the goal within the time limit."
+        return ("The time limit was reached before the goal was completed. Results gathered so far:\n"
+                + "\n".join(findings))
+
+    def _finish_run(self, run_span, context_report: ContextReport, completed: bool = True, timed_out: bool = False):
+        run_span.set(completed=completed, timed_out=timed_out, **context_report.as_dict())
+        print(f"📉 {self.agent_label} context: {context_report.tokens_after} prompt tokens sent over "
+              f"{context_report.requests} request(s), {context_report.tokens_saved} saved by compaction.")
+
+    def _steps(self, user_goal: str, stream: bool = False):
+        """
+        The ReAct loop. Thinks, calls tools and yields the final answer as text
+        chunks (token by token when `stream` is True). When the deadline of the
+        goal passes, it stops and yields a best-effort partial answer instead.
+        """
+        messages = self._initial_messages(user_goal)
+
+        print(f"🤖 {self.agent_label} starting with goal: '{user_goal}'")
+        context_report = ContextReport()
+
+        timed_out = answer_started = False
+        with self.tracer.span("agent_run", agent=self.agent_label, stream=stream) as run_span:
+            for iteration in range(1, self.max_iterations + 1):
+                if deadline_expired():
+                    timed_out = True
+                    break
+                print(f"🤔 {self.agent_label} is thinking...")
+                run_span.set(iterations=iteration)
+                response_message = None
+                with self.tracer.span("llm_iteration", agent=self.agent_label, iteration=iteration) as iteration_span:
+                    try:
+                        for item in self._complete_iter(self.context_manager.prepare(messages, context_report), stream):
+                            if isinstance(item, dict):
+                                response_message = item
+                            else:
+                                answer_started = True
+                                yield item
+                    except Exception as error:
+                        if not self._timed_out(error):
+                            raise
+                        timed_out = True
+                        iteration_span.set(timed_out=True)
+                        break
+                    tool_calls = response_message.get("tool_calls")
+                    iteration_span.set(tool_calls=len(tool_calls or []))
+
+                if tool_calls:
+                    print(f"🛠️ {self.agent_label} decided to use a tool.")
+                    messages.append(response_message)
+                    for tool_call in tool_calls:
+                        tool_message = self._execute_tool_call(tool_call)
+                        if tool_message:
+                            messages.append(tool_message)
+                    continue
+                else:
+                    print(f"✅ {self.agent_label} finished generating the final response.")
+                    self._finish_run(run_span, context_report)
+                    return
+            self._finish_run(run_span, context_report, completed=False, timed_out=timed_out)
+        if timed_out:
+            print(f"⏱️ {self.agent_label} ran out of time; returning a partial answer.")
+            mark_cut_short()
+            yield self._partial_answer(messages, answer_started)
+            return
+        yield "Error: Agent could not complete the goal within the iteration limit."
+
+    async def _asteps(self, user_goal: str, stream: bool = False):
+        """
+        The asyncio version of `_steps`. All tool calls requested in a single turn
+        are executed concurrently, bounded by `max_tool_concurrency`.
+        """
+        messages = self._initial_messages(user_goal)
+        semaphore = asyncio.Semaphore(self.max_tool_concurrency)
+
+        print(f"🤖 {self.agent_label} starting with goal: '{user_goal}'")
+        context_report = ContextReport()
+
+        timed_out = answer_started = False
+        with self.tracer.span("agent_run", agent=self.agent_label, stream=stream) as run_span:
+            for iteration in range(1, self.max_iterations + 1):
+                if deadline_expired():
+                    timed_out = True
+                    break
+                print(f"🤔 {self.agent_label} is thinking...")
+                run_span.set(iterations=iteration)
+                response_message = None
+                with self.tracer.span("llm_iteration", agent=self.agent_label, iteration=iteration) as iteration_span:
+                    try:
+                        async for item in self._acomplete_iter(self.context_manager.prepare(messages, context_report), stream):
+                            if isinstance(item, dict):
+                                response_message = item
+                            else:
+                                answer_started = True
+                                yield item
+                    except Exception as error:
+                        if not self._timed_out(error):
+                            raise
+                        timed_out = True
+                        iteration_span.set(timed_out=True)
+                        break
+                    tool_calls = response_message.get("tool_calls")
+                    iteration_span.set(tool_calls=len(tool_calls or []))
+
+                if tool_calls:
+                    print(f"🛠️ {self.agent_label} decided to use {len(tool_calls)} tool(s).")
+                    messages.append(response_message)
+                    tool_messages = await asyncio.gather(
+                        *(self._aexecute_tool_call(tool_call, semaphore) for tool_call in tool_calls)
+                    )
+                    messages.extend(message for message in tool_messages if message)
+                    continue
+                else:
+                    print(f"✅ {self.agent_label} finished generating the final response.")
+                    self._finish_run(run_span, context_report)
+                    return
+            self._finish_run(run_span, context_report, completed=False, timed_out=timed_out)
+        if timed_out:
+            print(f"⏱️ {self.agent_label} ran out of time; returning a partial answer.")
+            mark_cut_short()
+            yield self._partial_answer(messages, answer_started)
+            return
+        yield "Error: Agent could not complete the goal within the iteration limit."
+
+    def run(self, user_goal: str):
+        """
+        The main execution loop for the agent.
+        It takes a user's goal and works to achieve it by thinking,
+        using tools, and generating content.
+        """
+        return "".join(self._steps(user_goal))
+
+    def stream_run(self, user_goal: str):
+        """
+        Like `run`, but returns a generator that yields the final answer token
+        by token while it is being generated.
+        """
+        return self._steps(user_goal, stream=True)
+
+    async def arun(self, user_goal: str):
+        """
+        The asyncio version of `run`.
+        """
+        return "".join([chunk async for chunk in self._asteps(user_goal)])
+
+    def astream_run(self, user_goal: str):
+        """
+        The asyncio version of `stream_run`. Returns an async iterator of tokens.
+        """
+        return self._asteps(user_goal, stream=True)
@@ -0,0 +1,102 @@
+import re
+from typing import NamedTuple
+
+# Keywords for each intent with a weight: strong signals count 1.0,
+# generic verbs that also appear in other requests count less.
+DEFAULT_INTENT_KEYWORDS = {
+    "social_media": {
+        "post": 1.0, "instagram": 1.0, "social media": 1.0, "tweet": 1.0, "facebook": 1.0,
+        "content": 0.5, "create": 0.5,
+    },
+    "reputation": {
+        "review": 1.0, "reputation": 1.0, "feedback": 1.0, "rating": 1.0,
+        "comment": 0.5, "respond": 0.5, "reply": 0.5,
+    },
+}
+
+# Intents that change state (the Reputation Agent drafts replies and moves the
+# review watermark) only run alongside another intent when the goal asks for
+# their action. "Create a post about our best reviews" mentions reviews, but
+# does not ask for replies. Words are matched as prefixes, like the keywords.
+DEFAULT_SECONDARY_ACTIONS = {
+    "reputation": ("respond", "respons", "reply", "repli", "answer"),
+}
+
+class IntentMatch(NamedTuple):
+    intent: str
+    confidence: float
+    keywords: tuple
+
+class IntentRouter:
+    """
+    Matches a goal against every intent's keywords in a single pass, using one
+    compiled regular expression with a named group per intent, and returns all
+    intents that matched together with a confidence score.
+    """
+    def __init__(self, intent_keywords: dict = None, min_confidence: float = 0.25, relative_confidence: float = 0.6,
+                 secondary_actions: dict = None):
+        """
+        Args:
+            intent_keywords: Maps intent name -> {keyword: weight}.
+            min_confidence: Intents below this confidence are ignored.
+            relative_confidence: Secondary intents must reach this fraction of
+                                 the best intent's confidence to be kept.
+            secondary_actions: Maps intent name -> action words; when several
+                               intents match, such an intent is only kept if
+                               the goal contains one of them.
+        """
+        self.intent_keywords = intent_keywords or DEFAULT_INTENT_KEYWORDS
+        self.min_confidence = min_confidence
+        self.relative_confidence = relative_confidence
+        actions = DEFAULT_SECONDARY_ACTIONS if secondary_actions is None else secondary_actions
+        self._action_patterns = {
+            intent: re.compile(r"\b(?:" + "|".join(re.escape(word) for word in words) + r")\w*", re.IGNORECASE)
+            for intent, words in actions.items()
+        }
+        self._group_to_intent = {}
+        alternatives = []
+        for index, (intent, keywords) in enumerate(self.intent_keywords.items()):
+            group = f"intent{index}"
+            self._group_to_intent[group] = intent
+            # Longer keywords first so "social media" wins over a shorter overlap.
+            words = sorted(keywords, key=len, reverse=True)
+            alternatives.append(f"(?P<{group}>{'|'.join(re.escape(word) for word in words)})")
+        # Keywords must start at a word boundary; suffixes such as "posts" or
+        # "reviews" are still matched.
+        self._pattern = re.compile(r"\b(?:" + "|".join(alternatives) + r")\w*", re.IGNORECASE)
+
+    def route(self, text: str) -> list:
+        """
+        Returns the matching intents as a list of IntentMatch, best first.
+        Confidence is 1 - 0.5 ** (sum of keyword weights), so one strong
+        keyword gives 0.5 and every further keyword raises it towards 1.
+        When several intents match, those that need an action word and lack
+        one are dropped.
+        """
+        scores = {}
+        matched_keywords = {}
+        for match in self._pattern.finditer(text):
+            group = match.lastgroup
+            intent = self._group_to_intent[group]
+            keyword = match.group(group).lower()
+            if keyword in matched_keywords.setdefault(intent, []):
+                continue
+            matched_keywords[intent].append(keyword)
+            scores[intent] = scores.get(intent, 0.0) + self.intent_keywords[intent][keyword]
+
+        matches = [
+            IntentMatch(intent, round(1 - 0.5 ** score, 3), tuple(matched_keywords[intent]))
+            for intent, score in scores.items()
+        ]
+        matches = [match for match in matches if match.confidence >= self.min_confidence]
+        matches.sort(key=lambda match: match.confidence, reverse=True)
+        if matches:
+            best = matches[0].confidence
+            matches = [match for match in matches if match.confidence >= best * self.relative_confidence]
+        if len(matches) > 1:
+            matches = [match for match in matches if self._asks_for_action(match.intent, text)] or matches[:1]
+        return matches
+
+    def _asks_for_action(self, intent: str, text: str) -> bool:
+        pattern = self._action_patterns.get(intent)
+        return pattern is None or pattern.search(text) is not None
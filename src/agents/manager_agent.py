@@ -1,45 +1,186 @@
-from src.agents.social_media_agent import SocialMediaAgent
-from src.agents.reputation_agent import ReputationAgent
+import asyncio
+import importlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from src.agents.intent_router import IntentRouter
+from src.core.deadlines import deadline_scope
+from src.core.profiles import get_profile_store
+from src.core.tracing import get_tracer, annotate
+
+UNCLEAR_GOAL_MESSAGE = "Error: I'm not sure which specialist should handle this goal. Please be more specific. Try using words like 'post' for social media or 'review' for reputation management."
+
+# Display names used in logs and in the headings of merged multi-intent results.
+SPECIALIST_NAMES = {
+    "social_media": "Social Media ('Spark')",
+    "reputation": "Reputation ('Echo')",
+}
+
+# The class of each specialist. Its module is imported, and the agent built,
+# the first time a goal is routed to it.
+SPECIALIST_CLASSES = {
+    "social_media": ("src.agents.social_media_agent", "SocialMediaAgent"),
+    "reputation": ("src.agents.reputation_agent", "ReputationAgent"),
+}
 
 class ManagerAgent:
     """
     The ManagerAgent is the orchestrator of the multi-agent system.
     It analyzes the user's goal and delegates the task to the appropriate
-    specialist agent.
+    specialist agents, running them concurrently when a goal needs several.
     """
-    def __init__(self, business_profile: str):
+    def __init__(self, business_profile: str, router: IntentRouter = None, **agent_options):
         """
-        Initializes the ManagerAgent by creating specialist agents and passing
-        the dynamic business profile to them.
+        Initializes the ManagerAgent with the dynamic business profile. The
+        specialists are created on first use and get the same profile; extra
+        keyword arguments are forwarded to every specialist.
         """
-        print("ManagerAgent: Initializing specialist agents...")
-        self.social_media_agent = SocialMediaAgent(business_profile=business_profile)
-        self.reputation_agent = ReputationAgent(business_profile=business_profile)
-        print("ManagerAgent: Specialists are ready.")
+        print("ManagerAgent: Initializing...")
+        # The profile is compiled once here; the specialists get it from the same store.
+        agent_options.setdefault("profile_store", get_profile_store())
+        self.profile = agent_options["profile_store"].compile(business_profile)
+        self.business_profile = business_profile
+        self.agent_options = agent_options
+        self.router = router or IntentRouter()
+        self.tracer = agent_options.get("tracer") or get_tracer()
+        self._specialists = {}
+        self._specialists_lock = threading.Lock()
+        print("ManagerAgent: Ready. Specialists are created when a goal needs them.")
+
+    def specialist(self, intent: str):
+        """Returns the specialist for an intent, importing and building it on first use."""
+        with self._specialists_lock:
+            agent = self._specialists.get(intent)
+            if agent is None:
+                module_name, class_name = SPECIALIST_CLASSES[intent]
+                agent_class = getattr(importlib.import_module(module_name), class_name)
+                print(f"ManagerAgent: Initializing the {SPECIALIST_NAMES[intent]} specialist...")
+                agent = self._specialists[intent] = agent_class(
+                    business_profile=self.business_profile, **self.agent_options
+                )
+        return agent
+
+    @property
+    def social_media_agent(self):
+        return self.specialist("social_media")
+
+    @property
+    def reputation_agent(self):
+        return self.specialist("reputation")
 
-    def delegate_task(self, user_goal: str):
+    def _select_agents(self, user_goal: str) -> list:
         """
-        Analyzes the user's goal using simple keyword matching and routes it 
-        to the correct specialist agent.
+        Routes the user's goal and returns a list of (intent, agent, goal)
+        tuples, one for every specialist that should work on it.
         """
         print(f"\nManagerAgent: Received goal -> '{user_goal}'. Analyzing...")
 
-        social_keywords = ["post", "instagram", "social media", "tweet", "facebook", "content", "create"]
-        reputation_keywords = ["review", "reputation", "feedback", "comment", "rating", "respond"]
+        matches = self.router.route(user_goal)
+        annotate(intents=",".join(match.intent for match in matches))
+        if not matches:
+            print("ManagerAgent: Goal is unclear. Could not delegate to a specialist.")
+            return []
 
-        goal_lower = user_goal.lower()
+        for match in matches:
+            print(f"ManagerAgent: Goal identified for {SPECIALIST_NAMES[match.intent]} "
+                  f"(confidence {match.confidence:.2f}, keywords: {', '.join(match.keywords)}).")
+        if len(matches) == 1:
+            return [(matches[0].intent, self.specialist(matches[0].intent), user_goal)]
 
-        is_social_task = any(keyword in goal_lower for keyword in social_keywords)
-        is_reputation_task = any(keyword in goal_lower for keyword in reputation_keywords)
+        print(f"ManagerAgent: Goal has {len(matches)} intents. Delegating to the specialists concurrently...")
+        selected = []
+        for match in matches:
+            # Each specialist gets the whole goal, but is told which part is theirs.
+            focused_goal = (f"{user_goal}\n\n(Handle only the {match.intent.replace('_', ' ')} part of this goal; "
+                            f"another specialist covers the rest.)")
+            selected.append((match.intent, self.specialist(match.intent), focused_goal))
+        return selected
 
-        if is_social_task:
-            print("ManagerAgent: Goal identified for Social Media. Delegating to 'Spark'...")
-            return self.social_media_agent.run(user_goal)
-        
-        elif is_reputation_task:
-            print("ManagerAgent: Goal identified for Reputation. Delegating to 'Echo'...")
-            return self.reputation_agent.run(user_goal)
+    @staticmethod
+    def _section(intent: str, result: str) -> str:
+        return f"### {SPECIALIST_NAMES[intent]}\n\n{result}"
 
-        else:
-            print("ManagerAgent: Goal is unclear. Could not delegate to a specialist.")
-            return "Error: I'm not sure which specialist should handle this goal. Please be more specific. Try using words like 'post' for social media or 'review' for reputation management."
\ No newline at end of file
+    def _merge_results(self, selected: list, results: list) -> str:
+        if len(results) == 1:
+            return results[0]
+        return "\n\n".join(self._section(intent, result) for (intent, _, _), result in zip(selected, results))
+
+    @staticmethod
+    def _submit(executor: ThreadPoolExecutor, function, *args):
+        # Run in a copy of the current context so spans in the worker thread
+        # are nested under this delegate_task span.
+        return executor.submit(contextvars.copy_context().run, function, *args)
+
+    def delegate_task(self, user_goal: str, timeout: float = None):
+        """
+        Routes the goal to the correct specialist agents and runs them.
+        Multiple specialists run concurrently in worker threads. The goal has
+        `timeout` seconds (default: GOAL_TIMEOUT_SECONDS; 0 for no limit);
+        when they run out, the specialists return partial answers.
+        """
+        with self.tracer.span("delegate_task", mode="sync"), deadline_scope(timeout):
+            selected = self._select_agents(user_goal)
+            if not selected:
+                return UNCLEAR_GOAL_MESSAGE
+            if len(selected) == 1:
+                return selected[0][1].run(selected[0][2])
+            with ThreadPoolExecutor(max_workers=len(selected)) as executor:
+                futures = [self._submit(executor, agent.run, goal) for _, agent, goal in selected]
+                results = [future.result() for future in futures]
+            return self._merge_results(selected, results)
+
+    async def adelegate_task(self, user_goal: str, timeout: float = None):
+        """
+        The asyncio version of `delegate_task`. Many goals can be awaited
+        concurrently on a single event loop.
+        """
+        with self.tracer.span("delegate_task", mode="async"), deadline_scope(timeout):
+            selected = self._select_agents(user_goal)
+            if not selected:
+                return UNCLEAR_GOAL_MESSAGE
+            results = await asyncio.gather(*(agent.arun(goal) for _, agent, goal in selected))
+            return self._merge_results(selected, list(results))
+
+    def delegate_task_stream(self, user_goal: str, timeout: float = None):
+        """
+        Like `delegate_task`, but yields the specialist's final answer token by
+        token as it is generated. For multi-intent goals the first specialist is
+        streamed while the others run concurrently; their results follow.
+        """
+        with self.tracer.span("delegate_task", mode="stream"), deadline_scope(timeout):
+            selected = self._select_agents(user_goal)
+            if not selected:
+                yield UNCLEAR_GOAL_MESSAGE
+                return
+            if len(selected) == 1:
+                yield from selected[0][1].stream_run(selected[0][2])
+                return
+            (first_intent, first_agent, first_goal), others = selected[0], selected[1:]
+            with ThreadPoolExecutor(max_workers=len(others)) as executor:
+                futures = [self._submit(executor, agent.run, goal) for _, agent, goal in others]
+                yield f"### {SPECIALIST_NAMES[first_intent]}\n\n"
+                yield from first_agent.stream_run(first_goal)
+                for (intent, _, _), future in zip(others, futures):
+                    yield "\n\n" + self._section(intent, future.result())
+
+    async def adelegate_task_stream(self, user_goal: str, timeout: float = None):
+        """
+        The asyncio version of `delegate_task_stream`: an async iterator of tokens.
+        """
+        with self.tracer.span("delegate_task", mode="async_stream"), deadline_scope(timeout):
+            selected = self._select_agents(user_goal)
+            if not selected:
+                yield UNCLEAR_GOAL_MESSAGE
+                return
+            (first_intent, first_agent, first_goal), others = selected[0], selected[1:]
+            tasks = [asyncio.ensure_future(agent.arun(goal)) for _, agent, goal in others]
+            try:
+                if others:
+                    yield f"### {SPECIALIST_NAMES[first_intent]}\n\n"
+                async for token in first_agent.astream_run(first_goal):
+                    yield token
+                for (intent, _, _), task in zip(others, tasks):
+                    yield "\n\n" + self._section(intent, await task)
+            finally:
+                for task in tasks:
+                    task.cancel()
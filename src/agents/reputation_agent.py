@@ -1,33 +1,97 @@
-import os
+import re
 import json
-from openai import OpenAI
-from src.tools.reviews_api import get_latest_reviews, get_latest_reviews_schema
+import asyncio
+import contextvars
+from typing import NamedTuple
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from src.agents.base_agent import BaseAgent
+from src.config import settings
+from src.core.context import count_tokens
+from src.core.deadlines import deadline_expired, mark_cut_short
+from src.core.rate_limit import is_retryable_error
+from src.core.review_dedup import NearDuplicateIndex, adapt_reply
+from src.core.review_ingest import author_name, iter_review_batches
+from src.core.review_store import get_review_store
+from src.core.review_triage import ReviewTriage, templated_reply
+from src.core.tracing import annotate
+from src.tools.reviews_api import iter_review_pages
 
-class ReputationAgent:
+# Every drafted reply starts with a "### Review <id>" heading, which is how the
+# replies are matched back to their reviews once the answer is complete.
+_REPLY_HEADING = re.compile(r"^#{1,6}\s*Review\s+([\w.:-]+)[^\n]*$", re.MULTILINE)
+
+EXPORT_GOAL = "Draft a response to each of these customer reviews."
+
+def review_tokens(review: dict) -> int:
+    return count_tokens(json.dumps(review, ensure_ascii=False))
+
+def chunk_reviews(reviews: list, max_tokens: int) -> list:
+    """
+    Splits reviews into consecutive chunks of at most `max_tokens` tokens each
+    (a single review larger than that gets a chunk of its own).
+    """
+    chunks, current, current_tokens = [], [], 0
+    for review in reviews:
+        tokens = review_tokens(review)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(review)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+class ReplyPlan(NamedTuple):
+    replies: dict  # review_id -> reply known before drafting (reused or templated)
+    to_draft: list  # reviews the LLM has to draft
+    followers: dict  # representative review id -> near-duplicates in the same batch
+    signatures: dict  # review_id -> MinHash signature, indexed once the review has a reply
+    reused: set  # ids answered from an earlier near-duplicate
+    templated: set  # ids answered from a template
+
+def format_reply(review: dict, reply: str) -> str:
+    author = author_name(review)
+    details = f"{author}, {review.get('rating', '?')}★" if author else f"{review.get('rating', '?')}★"
+    return f"### Review {review['id']} ({details})\n{reply}"
+
+class ReputationAgent(BaseAgent):
     """
     The ReputationAgent is a specialized AI agent that monitors and manages
     the business's online reputation by responding to customer reviews.
+
+    Reviews are processed incrementally: the agent fetches only the reviews
+    newer than the business's watermark, sends those without a stored draft to
+    the LLM, and returns the stored drafts of earlier reviews as they are.
+    Large backlogs are split into chunks that are drafted concurrently,
+    simple positive reviews get a templated reply without an LLM call, and
+    near-duplicates of an answered review reuse its reply.
     """
-    def __init__(self, business_profile: str):
+    agent_label = "Reputation Agent"
+    # The reviews are fetched before the LLM is called and handed to it in the
+    # user message, so the model needs no tools.
+    tool_names = ()
+    # Review payloads are long JSON strings, so only their arrival is logged.
+    log_tool_responses = False
+
+    def __init__(self, business_profile: str, review_store=None, triage=None, dedup_index=None, **agent_options):
         """
-        Initializes the agent with a dynamic business profile.
+        Initializes the agent with a dynamic business profile. Extra keyword
+        arguments (e.g. `max_tool_concurrency`, `completion_cache`) are passed
+        on to BaseAgent.
         """
-        self.client = OpenAI(
-            api_key=os.getenv("QWEN_API_KEY"),
-            base_url="https://dashscope-intl.aliyuncs.com/compatible-mode/v1"
+        super().__init__(business_profile, **agent_options)
+        self.review_store = review_store or get_review_store()
+        self.business_id = self.profile.business_id
+        self.business_name = self.profile.business_name
+        self.triage = triage or (ReviewTriage() if settings.REVIEW_TRIAGE else None)
+        self.dedup_index = dedup_index or (
+            NearDuplicateIndex(self.review_store, self.business_id) if settings.REVIEW_DEDUP else None
         )
-        self.business_profile = business_profile
-        self.tools = [get_latest_reviews_schema]
-        self.tool_dispatcher = {
-            "get_latest_reviews": get_latest_reviews,
-        }
 
-    def run(self, user_goal: str):
-        """
-        The main execution loop for the agent. It fetches reviews, analyzes
-        them, and drafts appropriate responses.
-        """
-        system_prompt = f"""
+    def build_system_prompt(self) -> str:
+        return f"""
         You are a professional and empathetic AI Reputation Manager named 'Echo'.
         Your client is a local small business. Here is their profile:
         ---
@@ -39,51 +103,390 @@ class ReputationAgent:
         - For positive reviews (4-5 stars), be thankful and highlight something specific they mentioned.
         - For negative reviews (1-3 stars), be professional, apologize for the poor experience, and offer a way to make it right.
 
-        You must first use the `get_latest_reviews` tool to fetch the reviews.
-        Then, provide a drafted response for each review you've analyzed.
+        The new reviews are given to you as JSON in the user's message.
+        Provide exactly one drafted response for each review. Start each response with a heading line
+        of the form `### Review <id> (<author>, <rating>★)` using the review's `id`, followed by the reply text.
         """
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_goal}
-        ]
-        
-        print(f"🤖 Reputation Agent starting with goal: '{user_goal}'")
-
-        for _ in range(5):
-            print("🤔 Reputation Agent is thinking...")
-            response = self.client.chat.completions.create(
-                model="qwen-max",
-                messages=messages,
-                tools=self.tools,
-                tool_choice="auto"
+
+    def _fetch_new_reviews(self) -> list:
+        """Pages through every review created after the watermark, oldest first."""
+        since, after_id = self.review_store.get_watermark(self.business_id) or (None, None)
+        print("   - Fetching the reviews since the last check...")
+        with self.tracer.span("tool_call", agent=self.agent_label, tool="get_latest_reviews") as span:
+            reviews = [
+                review
+                for page in iter_review_pages(since=since, after_id=after_id, page_size=settings.REVIEW_FETCH_LIMIT)
+                for review in page
+            ]
+            span.set(reviews=len(reviews))
+        return reviews
+
+    def _pending_reviews(self):
+        """
+        Returns (fetched, pending): every review above the watermark, and the
+        ones among them that have no stored draft yet.
+        """
+        fetched = self._fetch_new_reviews()
+        drafted = self.review_store.get_drafts(self.business_id, [review["id"] for review in fetched])
+        pending = [review for review in fetched if review["id"] not in drafted]
+        return fetched, pending
+
+    @staticmethod
+    def _drafting_goal(user_goal: str, pending: list) -> str:
+        return (
+            f"{user_goal}\n\nHere are the {len(pending)} new customer review(s) to respond to, as JSON:\n"
+            f"{json.dumps(pending, ensure_ascii=False)}"
+        )
+
+    @staticmethod
+    def parse_replies(answer: str) -> list:
+        """Splits a drafted answer into (review_id, reply) pairs using the review headings."""
+        headings = list(_REPLY_HEADING.finditer(answer))
+        replies = []
+        for index, heading in enumerate(headings):
+            end = headings[index + 1].start() if index + 1 < len(headings) else len(answer)
+            reply = answer[heading.end():end].strip().rstrip("-").strip()
+            if reply:
+                replies.append((heading.group(1), reply))
+        return replies
+
+    def _valid_replies(self, answer: str, reviews: list) -> dict:
+        """
+        Returns {review_id: reply} for the reviews that received exactly one
+        reply. Replies to unknown ids and reviews answered twice are dropped.
+        """
+        expected = {review["id"] for review in reviews}
+        replies = self.parse_replies(answer)
+        counts = Counter(review_id for review_id, _ in replies)
+        valid = {review_id: reply for review_id, reply in replies if review_id in expected and counts[review_id] == 1}
+        rejected = len(replies) - len(valid)
+        if rejected:
+            print(f"   - Dropped {rejected} reply(ies) with an unknown or duplicated review id.")
+        return valid
+
+    def _store_drafts(self, fetched: list, pending: list, replies: dict) -> set:
+        """
+        Stores the drafted replies and moves the watermark to the newest review
+        that, like every review before it, has a draft. Reviews without a reply
+        stay above the watermark and are drafted next time. Returns the ids of
+        the reviews drafted in this run.
+        """
+        new_drafts = [(review, replies[review["id"]]) for review in pending if review["id"] in replies]
+        if new_drafts:
+            self.review_store.save_drafts(self.business_id, new_drafts)
+        handled = {review["id"] for review in fetched} - {review["id"] for review in pending}
+        handled.update(review["id"] for review, _ in new_drafts)
+        watermark = None
+        for review in fetched:
+            if review["id"] not in handled:
+                break
+            watermark = (review["created_at"], review["id"])
+        if watermark:
+            self.review_store.set_watermark(self.business_id, *watermark)
+        if len(new_drafts) < len(pending):
+            print(f"   - {len(pending) - len(new_drafts)} review(s) got no reply and will be retried next time.")
+        return {review["id"] for review, _ in new_drafts}
+
+    def _previous_drafts_text(self, exclude: set) -> str:
+        drafts = [
+            (review, reply)
+            for review, reply in self.review_store.recent_drafts(self.business_id, settings.REVIEW_CACHED_DRAFTS_SHOWN + len(exclude))
+            if review["id"] not in exclude
+        ][: settings.REVIEW_CACHED_DRAFTS_SHOWN]
+        if not drafts:
+            return ""
+        sections = [format_reply(review, reply) for review, reply in drafts]
+        return "\n\n---\n**Previously drafted replies**\n\n" + "\n\n".join(sections)
+
+    def _report(self, fetched: list, pending: list):
+        cached = len(fetched) - len(pending)
+        annotate(reviews_new=len(pending), reviews_cached=cached)
+        print(f"📬 {self.agent_label}: {len(pending)} new review(s) to draft, {cached} already drafted.")
+
+    def _triage(self, pending: list):
+        """
+        Returns ({review_id: templated reply}, reviews to draft with the LLM).
+        Without triage every review goes to the LLM.
+        """
+        if self.triage is None or not pending:
+            return {}, pending
+        templated, needs_llm = self.triage.split(pending)
+        if templated:
+            annotate(reviews_templated=len(templated))
+            print(f"   - {len(templated)} simple review(s) answered from a template.")
+        return {review["id"]: templated_reply(review, self.business_name) for review in templated}, needs_llm
+
+    def _plan_replies(self, pending: list) -> ReplyPlan:
+        """
+        Decides how each pending review is answered: near-duplicates of an
+        answered review reuse its reply, near-duplicates within the batch
+        follow the first review of their cluster, simple reviews get a
+        template, and the rest are left for the LLM.
+        """
+        replies, representatives, followers, signatures, reused = {}, [], {}, {}, set()
+        if self.dedup_index is None:
+            representatives = pending
+        else:
+            matches = self.dedup_index.cluster(pending)
+            batch_ids = {review["id"] for review in pending}
+            known = self.review_store.get_drafted_reviews(
+                self.business_id, [match for match, _ in matches if match and match not in batch_ids]
             )
+            for review, (match, signature) in zip(pending, matches):
+                signatures[review["id"]] = signature
+                if match in known:
+                    source_review, reply = known[match]
+                    replies[review["id"]] = adapt_reply(source_review, reply, review)
+                    reused.add(review["id"])
+                elif match in batch_ids:
+                    followers.setdefault(match, []).append(review)
+                else:
+                    representatives.append(review)
+            duplicates = len(pending) - len(representatives)
+            if duplicates:
+                annotate(reviews_deduplicated=duplicates)
+                print(f"   - {duplicates} near-duplicate review(s) reuse another review's reply.")
+        templated, to_draft = self._triage(representatives)
+        replies.update(templated)
+        return ReplyPlan(replies, to_draft, followers, signatures, reused, set(templated))
 
-            response_message = response.choices[0].message
-            tool_calls = response_message.tool_calls
-
-            if tool_calls:
-                print("🛠️ Reputation Agent decided to use a tool.")
-                messages.append(response_message)
-                for tool_call in tool_calls:
-                    function_name = tool_call.function.name
-                    function_to_call = self.tool_dispatcher.get(function_name)
-                    if function_to_call:
-                        print(f"   - Calling function: {function_name}")
-                        function_response = function_to_call()
-                        print(f"   - Function response received.")
-                        messages.append(
-                            {
-                                "tool_call_id": tool_call.id,
-                                "role": "tool",
-                                "name": function_name,
-                                "content": function_response,
-                            }
-                        )
-                    else:
-                        print(f"   - Error: Agent tried to call an unknown function: {function_name}")
+    def _finish_replies(self, plan: ReplyPlan, pending: list) -> list:
+        """
+        Copies each drafted reply to the near-duplicates that followed it and
+        indexes every answered review. Returns the followers that got a reply.
+        """
+        by_id = {review["id"]: review for review in pending}
+        answered_followers = []
+        for representative_id, followers in plan.followers.items():
+            reply = plan.replies.get(representative_id)
+            if reply is None:
                 continue
-            else:
-                print("✅ Reputation Agent finished generating the final response.")
-                final_response = response_message.content
-                return final_response
-        return "Error: Agent could not complete the goal within the iteration limit."
\ No newline at end of file
+            for review in followers:
+                plan.replies[review["id"]] = adapt_reply(by_id[representative_id], reply, review)
+                answered_followers.append(review)
+        if self.dedup_index is not None:
+            self.dedup_index.add(
+                [(review, plan.signatures.get(review["id"])) for review in pending if review["id"] in plan.replies]
+            )
+        return answered_followers
+
+    def _is_backlog(self, pending: list) -> bool:
+        return sum(review_tokens(review) for review in pending) > settings.REVIEW_CHUNK_TOKENS
+
+    # --- Backlog mode ---
+    # Each chunk is drafted in its own conversation. A chunk whose answer misses
+    # replies (or fails with a timeout or a retryable API error) is retried on
+    # its own, for the missing reviews only, up to REVIEW_CHUNK_MAX_ATTEMPTS
+    # times. Any other error fails the run.
+
+    def _chunk_attempt(self, index: int, attempt: int, remaining: list, replies: dict, answer: str = None,
+                       error: Exception = None) -> tuple:
+        """
+        Books one attempt at a chunk: adds the valid replies of `answer` to
+        `replies`, or re-raises `error` unless it is a timeout or a retryable
+        API error. Returns the reviews still without a reply and whether to
+        make another attempt.
+        """
+        if error is not None:
+            if not (isinstance(error, TimeoutError) or is_retryable_error(error)):
+                raise error
+            print(f"   - Chunk {index} attempt {attempt} failed: {error.__class__.__name__}: {error}")
+        else:
+            replies.update(self._valid_replies(answer, remaining))
+            remaining = [review for review in remaining if review["id"] not in replies]
+        return remaining, bool(remaining) and not deadline_expired()
+
+    def _draft_chunk(self, user_goal: str, chunk: list, index: int) -> dict:
+        replies, remaining = {}, chunk
+        with self.tracer.span("review_chunk", agent=self.agent_label, chunk=index, reviews=len(chunk)) as span:
+            for attempt in range(1, settings.REVIEW_CHUNK_MAX_ATTEMPTS + 1):
+                span.set(attempts=attempt)
+                try:
+                    answer = "".join(super()._steps(self._drafting_goal(user_goal, remaining)))
+                except Exception as error:
+                    remaining, again = self._chunk_attempt(index, attempt, remaining, replies, error=error)
+                else:
+                    remaining, again = self._chunk_attempt(index, attempt, remaining, replies, answer=answer)
+                if not again:
+                    break
+            if remaining and deadline_expired():
+                mark_cut_short()
+            span.set(missing=len(remaining))
+        return replies
+
+    async def _adraft_chunk(self, user_goal: str, chunk: list, index: int, semaphore: asyncio.Semaphore) -> dict:
+        replies, remaining = {}, chunk
+        async with semaphore:
+            with self.tracer.span("review_chunk", agent=self.agent_label, chunk=index, reviews=len(chunk)) as span:
+                for attempt in range(1, settings.REVIEW_CHUNK_MAX_ATTEMPTS + 1):
+                    span.set(attempts=attempt)
+                    try:
+                        parts = super()._asteps(self._drafting_goal(user_goal, remaining))
+                        answer = "".join([part async for part in parts])
+                    except Exception as error:
+                        remaining, again = self._chunk_attempt(index, attempt, remaining, replies, error=error)
+                    else:
+                        remaining, again = self._chunk_attempt(index, attempt, remaining, replies, answer=answer)
+                    if not again:
+                        break
+                if remaining and deadline_expired():
+                    mark_cut_short()
+                span.set(missing=len(remaining))
+        return replies
+
+    @staticmethod
+    def _chunk_text(chunk: list, replies: dict) -> str:
+        """Reassembles the replies of one chunk in review order."""
+        return "\n\n".join(format_reply(review, replies[review["id"]]) for review in chunk if review["id"] in replies)
+
+    def _backlog_steps(self, user_goal: str, pending: list, replies: dict):
+        """
+        Drafts the chunks on a thread pool and yields each chunk's replies in
+        review order as soon as it and every chunk before it are done.
+        """
+        chunks = chunk_reviews(pending, settings.REVIEW_CHUNK_TOKENS)
+        print(f"📚 {self.agent_label} drafting {len(pending)} reviews in {len(chunks)} chunk(s).")
+        annotate(review_chunks=len(chunks))
+        with ThreadPoolExecutor(max_workers=settings.REVIEW_DRAFT_CONCURRENCY) as executor:
+            futures = [
+                # A copy of the current context nests the chunk spans under this run.
+                executor.submit(contextvars.copy_context().run, self._draft_chunk, user_goal, chunk, index)
+                for index, chunk in enumerate(chunks, start=1)
+            ]
+            separator = ""
+            for chunk, future in zip(chunks, futures):
+                chunk_replies = future.result()
+                replies.update(chunk_replies)
+                text = self._chunk_text(chunk, chunk_replies)
+                if text:
+                    yield separator + text
+                    separator = "\n\n"
+
+    async def _abacklog_steps(self, user_goal: str, pending: list, replies: dict):
+        chunks = chunk_reviews(pending, settings.REVIEW_CHUNK_TOKENS)
+        print(f"📚 {self.agent_label} drafting {len(pending)} reviews in {len(chunks)} chunk(s).")
+        annotate(review_chunks=len(chunks))
+        semaphore = asyncio.Semaphore(settings.REVIEW_DRAFT_CONCURRENCY)
+        tasks = [
+            asyncio.create_task(self._adraft_chunk(user_goal, chunk, index, semaphore))
+            for index, chunk in enumerate(chunks, start=1)
+        ]
+        try:
+            separator = ""
+            for chunk, task in zip(chunks, tasks):
+                chunk_replies = await task
+                replies.update(chunk_replies)
+                text = self._chunk_text(chunk, chunk_replies)
+                if text:
+                    yield separator + text
+                    separator = "\n\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _steps(self, user_goal: str, stream: bool = False):
+        fetched, pending = self._pending_reviews()
+        self._report(fetched, pending)
+        plan = self._plan_replies(pending)
+        replies, to_draft = plan.replies, plan.to_draft
+        if not pending:
+            yield "There are no new customer reviews since the last check."
+        elif replies:
+            yield self._chunk_text(pending, replies) + ("\n\n" if to_draft else "")
+        if to_draft and self._is_backlog(to_draft):
+            yield from self._backlog_steps(user_goal, to_draft, replies)
+        elif to_draft:
+            chunks = []
+            for chunk in super()._steps(self._drafting_goal(user_goal, to_draft), stream):
+                chunks.append(chunk)
+                yield chunk
+            replies.update(self._valid_replies("".join(chunks), to_draft))
+        followers = self._finish_replies(plan, pending)
+        if followers:
+            yield "\n\n" + self._chunk_text(followers, replies)
+        drafted = self._store_drafts(fetched, pending, replies) if fetched else set()
+        previous = self._previous_drafts_text(drafted)
+        if previous:
+            yield previous
+
+    async def _asteps(self, user_goal: str, stream: bool = False):
+        # Fetching and the SQLite lookups block, so they run in a worker thread.
+        fetched, pending = await asyncio.to_thread(self._pending_reviews)
+        self._report(fetched, pending)
+        plan = await asyncio.to_thread(self._plan_replies, pending)
+        replies, to_draft = plan.replies, plan.to_draft
+        if not pending:
+            yield "There are no new customer reviews since the last check."
+        elif replies:
+            yield self._chunk_text(pending, replies) + ("\n\n" if to_draft else "")
+        if to_draft and self._is_backlog(to_draft):
+            async for chunk in self._abacklog_steps(user_goal, to_draft, replies):
+                yield chunk
+        elif to_draft:
+            chunks = []
+            async for chunk in super()._asteps(self._drafting_goal(user_goal, to_draft), stream):
+                chunks.append(chunk)
+                yield chunk
+            replies.update(self._valid_replies("".join(chunks), to_draft))
+        followers = await asyncio.to_thread(self._finish_replies, plan, pending)
+        if followers:
+            yield "\n\n" + self._chunk_text(followers, replies)
+        drafted = await asyncio.to_thread(self._store_drafts, fetched, pending, replies) if fetched else set()
+        previous = await asyncio.to_thread(self._previous_drafts_text, drafted)
+        if previous:
+            yield previous
+
+    def process_export(self, path: str, output_path: str = None, user_goal: str = EXPORT_GOAL,
+                       batch_size: int = None) -> dict:
+        """
+        Drafts replies for every review in a JSONL export. The file is streamed
+        in batches; reviews that already have a stored draft are skipped, simple
+        ones get a templated reply and the rest are drafted by the LLM in
+        concurrent chunks, once per cluster of near-duplicates. Replies are
+        stored in the review store (and appended to `output_path` as JSON lines
+        when given). Returns the run's counters.
+        """
+        stats = {"reviews": 0, "already_drafted": 0, "deduplicated": 0, "templated": 0, "llm": 0, "missing": 0,
+                 "malformed": 0}
+        output = open(output_path, "a", encoding="utf-8") if output_path else None
+        with self.tracer.span("review_export", agent=self.agent_label) as span:
+            try:
+                for batch in iter_review_batches(path, batch_size or settings.REVIEW_INGEST_BATCH_SIZE, stats):
+                    drafted = self.review_store.get_drafts(self.business_id, [review["id"] for review in batch])
+                    pending = [review for review in batch if review["id"] not in drafted]
+                    plan = self._plan_replies(pending)
+                    replies = plan.replies
+                    if plan.to_draft:
+                        for _ in self._backlog_steps(user_goal, plan.to_draft, replies):
+                            pass
+                    followers = {review["id"] for review in self._finish_replies(plan, pending)}
+                    deduplicated = plan.reused | followers
+                    new_drafts = [(review, replies[review["id"]]) for review in pending if review["id"] in replies]
+                    self.review_store.save_drafts(self.business_id, new_drafts)
+                    if output:
+                        for review, reply in new_drafts:
+                            if review["id"] in deduplicated:
+                                source = "duplicate"
+                            elif review["id"] in plan.templated:
+                                source = "template"
+                            else:
+                                source = "llm"
+                            output.write(json.dumps({"review_id": review["id"], "reply": reply, "source": source},
+                                                    ensure_ascii=False) + "\n")
+                        output.flush()
+                    stats["reviews"] += len(batch)
+                    stats["already_drafted"] += len(batch) - len(pending)
+                    stats["deduplicated"] += len(deduplicated)
+                    stats["templated"] += len(plan.templated)
+                    stats["llm"] += len(new_drafts) - len(plan.templated) - len(deduplicated)
+                    stats["missing"] += len(pending) - len(new_drafts)
+                    print(f"📦 {self.agent_label}: {stats['reviews']} reviews processed "
+                          f"({stats['deduplicated']} near-duplicates, {stats['templated']} templated, "
+                          f"{stats['llm']} drafted by the LLM).")
+            finally:
+                if output:
+                    output.close()
+                considered = stats["reviews"] - stats["already_drafted"]
+                stats["dedup_rate"] = round(stats["deduplicated"] / considered, 4) if considered else 0.0
+                span.set(**stats)
+        return stats
@@ -1,36 +1,44 @@
-import os
+import re
 import json
-from openai import OpenAI
-from src.tools.web_search import search_local_trends, search_local_trends_schema
-from src.tools.social_api import post_to_instagram, post_to_instagram_schema
+import asyncio
+import datetime
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from src.agents.base_agent import BaseAgent
+from src.config import settings
+from src.core.context import truncate_text
+from src.core.deadlines import call_with_timeout, deadline_expired, mark_cut_short, time_budget
+from src.core.tracing import annotate
+from src.tools.registry import get_tool
+from src.tools.social_api import post_to_instagram_schema, queue_instagram_posts, validate_tool_arguments
 
-class SocialMediaAgent:
+# JSON-mode answers sometimes still arrive wrapped in a Markdown code fence.
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+def calendar_slots(start_date: datetime.date, days: int, posts_per_day: int = 1) -> list:
+    """One {"slot", "date"} entry per post of the calendar, in order."""
+    slots = []
+    for offset in range(days):
+        date = (start_date + datetime.timedelta(days=offset)).isoformat()
+        for _ in range(posts_per_day):
+            slots.append({"slot": len(slots) + 1, "date": date})
+    return slots
+
+class SocialMediaAgent(BaseAgent):
     """
     The SocialMediaAgent is a specialized AI agent responsible for creating
     and managing social media content for a local SMB.
+
+    Besides single posts (`run`), it can plan a whole content calendar
+    (`plan_calendar`): the trend research is done once for the date range,
+    the posts are generated in a few structured-output completions, and the
+    validated posts are queued in one bulk call.
     """
-    def __init__(self, business_profile: str):
-        """
-        Initializes the agent with a dynamic business profile.
-        """
-        self.client = OpenAI(
-            api_key=os.getenv("QWEN_API_KEY"),
-            base_url="https://dashscope-intl.aliyuncs.com/compatible-mode/v1",
-        )
-        self.business_profile = business_profile
-        self.tools = [search_local_trends_schema, post_to_instagram_schema]
-        self.tool_dispatcher = {
-            "search_local_trends": search_local_trends,
-            "post_to_instagram": post_to_instagram
-        }
-
-    def run(self, user_goal: str):
-        """
-        The main execution loop for the agent.
-        It takes a user's goal and works to achieve it by thinking,
-        using tools, and generating content.
-        """
-        system_prompt = f"""
+    agent_label = "Agent"
+    tool_names = ("search_local_trends", "post_to_instagram")
+
+    def build_system_prompt(self) -> str:
+        return f"""
         You are a highly skilled, autonomous AI Social Media Manager named 'Spark'.
         Your client is a local small business. Here is their profile:
         ---
@@ -46,49 +54,189 @@ class SocialMediaAgent:
         If you have enough information to generate the post directly, do that.
         Your final output should be the complete, ready-to-post content.
         """
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_goal}
+
+    # --- Calendar mode ---
+
+    def calendar_research_queries(self, slots: list) -> list:
+        """The searches shared by every post of a calendar."""
+        location = self.profile.field("location", "our neighborhood")
+        business_type = self.profile.field("business_type", "local business")
+        first, last = slots[0]["date"], slots[-1]["date"]
+        month = datetime.date.fromisoformat(first).strftime("%B %Y")
+        return [
+            f"local events near {location} from {first} to {last}",
+            f"{business_type} social media trends {month}",
+        ]
+
+    def _research(self, query: str) -> str:
+        with self.tracer.span("tool_call", agent=self.agent_label, tool="search_local_trends") as span:
+            print(f"   - Calling function: search_local_trends with args: {{'query': {query!r}}}")
+            try:
+                result = call_with_timeout(time_budget(settings.TOOL_TIMEOUT_SECONDS), get_tool("search_local_trends"),
+                                           query=query)
+            except TimeoutError:
+                span.set(timed_out=True)
+                result = self._tool_timeout_message("search_local_trends")
+            return truncate_text(result, settings.CONTEXT_MAX_TOOL_RESULT_TOKENS)
+
+    def _calendar_messages(self, slots: list, research: dict, theme: str) -> list:
+        findings = "\n\n".join(f"Search: {query}\n{result}" for query, result in research.items())
+        request = (
+            f"Plan {len(slots)} Instagram post(s) for our content calendar"
+            + (f" with this theme: {theme}" if theme else "")
+            + ".\n\nTrend research for the whole period (use it where it fits, don't repeat an idea twice):\n"
+            + findings
+            + "\n\nWrite one post for each of these slots:\n"
+            + json.dumps(slots)
+            + '\n\nAnswer with a JSON object of the form {"posts": [{"slot": <slot>, "date": "<date>", '
+              '"caption": "<full caption with hashtags>", "image_description": "<prompt for an image generator>"}]} '
+              "and nothing else."
+        )
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": request},
         ]
-        
-        print(f"🤖 Agent starting with goal: '{user_goal}'")
-
-        for _ in range(5):
-            print("🤔 Agent is thinking...")
-            response = self.client.chat.completions.create(
-                model="qwen-max",
-                messages=messages,
-                tools=self.tools,
-                tool_choice="auto"
-            )
-
-            response_message = response.choices[0].message
-            tool_calls = response_message.tool_calls
-
-            if tool_calls:
-                print("🛠️ Agent decided to use a tool.")
-                messages.append(response_message)
-                for tool_call in tool_calls:
-                    function_name = tool_call.function.name
-                    function_to_call = self.tool_dispatcher.get(function_name)
-                    if function_to_call:
-                        function_args = json.loads(tool_call.function.arguments)
-                        print(f"   - Calling function: {function_name} with args: {function_args}")
-                        function_response = function_to_call(**function_args)
-                        print(f"   - Function response: {function_response}")
-                        messages.append(
-                            {
-                                "tool_call_id": tool_call.id,
-                                "role": "tool",
-                                "name": function_name,
-                                "content": function_response,
-                            }
-                        )
-                    else:
-                        print(f"   - Error: Agent tried to call an unknown function: {function_name}")
+
+    @staticmethod
+    def _valid_posts(content: str, slots: list) -> dict:
+        """
+        Parses a calendar answer and returns {slot: post} for the posts that
+        belong to a requested slot, appear once and pass the
+        `post_to_instagram` schema.
+        """
+        try:
+            posts = json.loads(_CODE_FENCE.sub("", (content or "").strip())).get("posts", [])
+        except (json.JSONDecodeError, AttributeError):
+            print("   - The calendar answer was not valid JSON.")
+            return {}
+        dates = {slot["slot"]: slot["date"] for slot in slots}
+        seen, valid = set(), {}
+        for post in posts if isinstance(posts, list) else []:
+            slot = post.get("slot") if isinstance(post, dict) else None
+            if slot not in dates or slot in seen:
                 continue
-            else:
-                print("✅ Agent finished generating the final response.")
-                final_response = response_message.content
-                return final_response
-        return "Error: Agent could not complete the goal within the iteration limit."
\ No newline at end of file
+            seen.add(slot)
+            arguments = {key: post.get(key) for key in ("caption", "image_description")}
+            errors = validate_tool_arguments(post_to_instagram_schema, arguments)
+            if errors:
+                print(f"   - Post for slot {slot} rejected: {'; '.join(errors)}")
+                continue
+            valid[slot] = dict(arguments, slot=slot, date=dates[slot])
+        return valid
+
+    def _draft_calendar_batch(self, slots: list, research: dict, theme: str, index: int) -> dict:
+        """
+        Drafts one batch of slots; slots without a valid post are requested
+        again on their own. Stops early, keeping what it has, at the deadline.
+        """
+        posts, remaining = {}, slots
+        with self.tracer.span("calendar_batch", agent=self.agent_label, batch=index, posts=len(slots)) as span:
+            for attempt in range(1, settings.CALENDAR_MAX_ATTEMPTS + 1):
+                span.set(attempts=attempt)
+                try:
+                    message = self._complete(self._calendar_messages(remaining, research, theme), use_tools=False,
+                                             response_format={"type": "json_object"})
+                except Exception as error:
+                    if not self._timed_out(error):
+                        raise
+                    break
+                posts.update(self._valid_posts(message.get("content"), remaining))
+                remaining = [slot for slot in remaining if slot["slot"] not in posts]
+                if not remaining or deadline_expired():
+                    break
+            if remaining and deadline_expired():
+                mark_cut_short()
+            span.set(missing=len(remaining))
+        return posts
+
+    async def _adraft_calendar_batch(self, slots: list, research: dict, theme: str, index: int,
+                                     semaphore: asyncio.Semaphore) -> dict:
+        posts, remaining = {}, slots
+        async with semaphore:
+            with self.tracer.span("calendar_batch", agent=self.agent_label, batch=index, posts=len(slots)) as span:
+                for attempt in range(1, settings.CALENDAR_MAX_ATTEMPTS + 1):
+                    span.set(attempts=attempt)
+                    try:
+                        message = await self._acomplete(self._calendar_messages(remaining, research, theme),
+                                                        use_tools=False, response_format={"type": "json_object"})
+                    except Exception as error:
+                        if not self._timed_out(error):
+                            raise
+                        break
+                    posts.update(self._valid_posts(message.get("content"), remaining))
+                    remaining = [slot for slot in remaining if slot["slot"] not in posts]
+                    if not remaining or deadline_expired():
+                        break
+                if remaining and deadline_expired():
+                    mark_cut_short()
+                span.set(missing=len(remaining))
+        return posts
+
+    @staticmethod
+    def _calendar_batches(slots: list) -> list:
+        size = settings.CALENDAR_POSTS_PER_REQUEST
+        return [slots[start:start + size] for start in range(0, len(slots), size)]
+
+    def _finish_calendar(self, slots: list, posts: dict, queue: bool) -> list:
+        """Orders the posts, queues them in one call and records the outcome on the span."""
+        ordered = [posts[slot["slot"]] for slot in slots if slot["slot"] in posts]
+        annotate(calendar_posts=len(ordered), calendar_missing=len(slots) - len(ordered))
+        if queue and ordered:
+            with self.tracer.span("tool_call", agent=self.agent_label, tool="queue_instagram_posts"):
+                result = json.loads(queue_instagram_posts(
+                    [dict(post, scheduled_for=post["date"]) for post in ordered]
+                ))
+            # Rejected posts get no id, so the ids are matched by position in the request.
+            for queued in result["queued"]:
+                ordered[queued["index"]]["queue_id"] = queued["id"]
+        print(f"✅ {self.agent_label} planned {len(ordered)} of {len(slots)} calendar post(s).")
+        return ordered
+
+    def plan_calendar(self, start_date: datetime.date = None, days: int = 7, posts_per_day: int = 1,
+                      theme: str = "", queue: bool = True) -> list:
+        """
+        Plans `days * posts_per_day` posts starting at `start_date` (default:
+        today). Returns the posts in calendar order as dicts with `slot`,
+        `date`, `caption`, `image_description` and, once queued, `queue_id`.
+        """
+        slots = calendar_slots(start_date or datetime.date.today(), days, posts_per_day)
+        if not slots:
+            return []
+        print(f"📅 {self.agent_label} planning {len(slots)} post(s) from {slots[0]['date']} to {slots[-1]['date']}.")
+        with self.tracer.span("calendar_run", agent=self.agent_label, posts=len(slots)):
+            queries = self.calendar_research_queries(slots)
+            batches = self._calendar_batches(slots)
+            posts = {}
+            with ThreadPoolExecutor(max_workers=settings.CALENDAR_CONCURRENCY) as executor:
+                # Copies of the current context nest the worker spans under this run.
+                searches = [executor.submit(contextvars.copy_context().run, self._research, query) for query in queries]
+                research = {query: search.result() for query, search in zip(queries, searches)}
+                futures = [
+                    executor.submit(contextvars.copy_context().run, self._draft_calendar_batch, batch, research,
+                                    theme, index)
+                    for index, batch in enumerate(batches, start=1)
+                ]
+                for future in futures:
+                    posts.update(future.result())
+            return self._finish_calendar(slots, posts, queue)
+
+    async def aplan_calendar(self, start_date: datetime.date = None, days: int = 7, posts_per_day: int = 1,
+                             theme: str = "", queue: bool = True) -> list:
+        """
+        The asyncio version of `plan_calendar`.
+        """
+        slots = calendar_slots(start_date or datetime.date.today(), days, posts_per_day)
+        if not slots:
+            return []
+        print(f"📅 {self.agent_label} planning {len(slots)} post(s) from {slots[0]['date']} to {slots[-1]['date']}.")
+        with self.tracer.span("calendar_run", agent=self.agent_label, posts=len(slots)):
+            queries = self.calendar_research_queries(slots)
+            results = await asyncio.gather(*(asyncio.to_thread(self._research, query) for query in queries))
+            research = dict(zip(queries, results))
+            semaphore = asyncio.Semaphore(settings.CALENDAR_CONCURRENCY)
+            batch_posts = await asyncio.gather(*(
+                self._adraft_calendar_batch(batch, research, theme, index, semaphore)
+                for index, batch in enumerate(self._calendar_batches(slots), start=1)
+            ))
+            posts = {slot: post for batch in batch_posts for slot, post in batch.items()}
+            return await asyncio.to_thread(self._finish_calendar, slots, posts, queue)
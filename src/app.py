@@ -1,8 +1,6 @@
 import streamlit as st
 import os
 import sys
-import io
-from contextlib import redirect_stdout
 from dotenv import load_dotenv
 
 # This import handling block ensures the app can find the 'src' modules.
@@ -13,19 +11,34 @@ sys.path.insert(0, project_root)
 # This is the crucial fix. It must be called before any agent is initialized.
 load_dotenv()
 
-from src.agents.manager_agent import ManagerAgent
+import uuid
+from src.core.jobs import JobExecutor
+from src.core.profiles import load_profile_file
+from src.core.tracing import format_spans
+
+@st.cache_resource
+def get_job_executor():
+    """
+    One job executor per server process, shared by every session and browser
+    tab. It keeps warm, connection-pooled agents per business profile.
+    """
+    return JobExecutor()
 
 def load_business_profile():
     """A helper function to load the initial business profile."""
     try:
-        profile_path = os.path.join(project_root, "data", "business_profile.txt")
-        with open(profile_path, "r") as f:
-            return f.read()
+        # Cached by modification time, so a rerun does not read the file again.
+        return load_profile_file(os.path.join(project_root, "data", "business_profile.txt"))
     except FileNotFoundError:
         return "Could not find data/business_profile.txt"
 
 st.set_page_config(page_title="AI Marketing Agent", page_icon="🤖", layout="wide")
 
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+executor = get_job_executor()
+
 st.title("🤖 Autonomous AI Marketing Agent")
 st.markdown("This tool uses a multi-agent system to help your business with its marketing tasks. You can edit the business profile below, provide a goal, and let the agents work.")
 
@@ -41,24 +54,33 @@ with col2:
     user_goal = st.text_input("What would you like the agent to do?", placeholder="e.g., 'create a post' or 'respond to reviews'")
     run_button = st.button("Run Agent")
 
-st.subheader("Agent Live Output")
-log_container = st.expander("Show Agent's Thought Process", expanded=False)
-log_output = log_container.empty()
-final_output_container = st.empty()
-
 if run_button:
     if not user_goal:
         st.warning("Please enter a marketing goal.")
     elif not business_profile:
         st.warning("Please provide a business profile.")
     else:
-        with st.spinner("The AI agents are collaborating... Please wait."):
-            log_stream = io.StringIO()
-            with redirect_stdout(log_stream):
-                manager = ManagerAgent(business_profile=business_profile)
-                final_result = manager.delegate_task(user_goal)
-
-            log_output.code(log_stream.getvalue(), language='text')
-            
-            final_output_container.markdown("### Final Result")
-            final_output_container.markdown(final_result)
+        # Submitting returns immediately; the agents work in the background
+        # while the page stays responsive and more goals can be queued.
+        job_id = executor.submit(user_goal, business_profile, owner=st.session_state.session_id)
+        st.toast(f"Job {job_id} submitted.")
+
+STATUS_ICONS = {"queued": "⏳", "running": "🔄", "done": "✅", "error": "❌"}
+
+@st.fragment(run_every=1)
+def render_jobs():
+    """Re-renders this session's jobs every second while the rest of the page stays idle."""
+    jobs = executor.jobs_for(st.session_state.session_id)
+    st.subheader("Agent Jobs")
+    if not jobs:
+        st.caption("No jobs yet. Enter a goal and press 'Run Agent'.")
+        return
+    for job in jobs:
+        label = f"{STATUS_ICONS[job.status]} {job.goal} · {job.status} · {job.elapsed_seconds:.1f}s · job {job.id}"
+        with st.expander(label, expanded=not job.finished or job is jobs[0]):
+            if job.error:
+                st.error(job.error)
+            st.markdown(job.output or "_Waiting for the agents..._")
+            st.code(format_spans(list(job.spans)) or "No spans finished yet.", language='text')
+
+render_jobs()
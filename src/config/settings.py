@@ -0,0 +1,149 @@
+# src/config/settings.py
+#
+# Central place for runtime settings that are shared by the agents and tools.
+# Every value can be overridden with an environment variable (or the .env file).
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- LLM Endpoint ---
+# Any OpenAI-compatible endpoint works, e.g. the local mock server used by the
+# benchmarks (benchmarks/mock_server.py).
+QWEN_BASE_URL = os.getenv("QWEN_BASE_URL", "https://dashscope-intl.aliyuncs.com/compatible-mode/v1")
+QWEN_MODEL = os.getenv("QWEN_MODEL", "qwen-max")
+
+# --- Agent Loop ---
+# Maximum number of tool calls from a single LLM turn that run at the same time
+# on the async execution path (`arun` / `adelegate_task`).
+TOOL_CONCURRENCY = int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
+
+# --- Deadlines & Hedging ---
+# Every goal handed to the ManagerAgent must finish within GOAL_TIMEOUT_SECONDS;
+# once it has passed, the agents stop and return what they have so far. Single
+# LLM requests and tool calls are also bounded on their own. 0 disables a limit.
+GOAL_TIMEOUT_SECONDS = float(os.getenv("GOAL_TIMEOUT_SECONDS", "180"))
+LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "60"))
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "30"))
+# Hedged requests: a non-streaming completion that is slower than the observed
+# LLM_HEDGE_QUANTILE of recent latencies gets a duplicate; the first answer wins.
+# Until LLM_HEDGE_MIN_SAMPLES latencies are known, LLM_HEDGE_INITIAL_DELAY is used.
+LLM_HEDGING = os.getenv("LLM_HEDGING", "off").lower() in ("1", "true", "on", "yes")
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_INITIAL_DELAY = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "5.0"))
+# At most this share of requests is hedged.
+LLM_HEDGE_MAX_RATE = float(os.getenv("LLM_HEDGE_MAX_RATE", "0.1"))
+
+# --- Completion Cache ---
+# Mode is one of: off, on, record, replay (see src/core/completion_cache.py).
+COMPLETION_CACHE_MODE = os.getenv("COMPLETION_CACHE_MODE", "on")
+COMPLETION_CACHE_PATH = os.getenv(
+    "COMPLETION_CACHE_PATH", os.path.join(PROJECT_ROOT, "data", "cache", "completions.sqlite")
+)
+COMPLETION_CACHE_TTL_SECONDS = float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", "3600"))
+COMPLETION_CACHE_MAX_ENTRIES = int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", "5000"))
+
+# --- Web Search ---
+# Backend for `search_local_trends`: "tavily" uses the Tavily SDK, "http" posts a
+# Tavily-compatible request to SEARCH_BASE_URL (e.g. the local mock server).
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "tavily")
+SEARCH_BASE_URL = os.getenv("SEARCH_BASE_URL", "https://api.tavily.com")
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_TIMEOUT_SECONDS", "30"))
+# Results of `search_local_trends` are cached in memory, keyed on the normalized query.
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "900"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+
+# --- Batch Runs & API Quotas ---
+# Used by the batch runner (`python src/main.py --batch goals.jsonl`).
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "100000"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "5"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30.0"))
+
+# --- Context Management ---
+# Token budget for the prompt of each request in the agent loop, the size above
+# which a single tool result is truncated, and how many of the most recent
+# tool turns are always kept verbatim.
+CONTEXT_PROMPT_BUDGET = int(os.getenv("CONTEXT_PROMPT_BUDGET", "6000"))
+CONTEXT_MAX_TOOL_RESULT_TOKENS = int(os.getenv("CONTEXT_MAX_TOOL_RESULT_TOKENS", "1500"))
+CONTEXT_KEEP_RECENT_TURNS = int(os.getenv("CONTEXT_KEEP_RECENT_TURNS", "2"))
+
+# --- Tracing & Metrics ---
+# When set, every finished span (goal, LLM iteration, tool call) is appended to
+# this JSON-lines file. Metrics are always aggregated in memory; when the
+# textfile path is set, the CLI writes them there in Prometheus text format.
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH", "")
+METRICS_TEXTFILE_PATH = os.getenv("METRICS_TEXTFILE_PATH", "")
+
+# --- Background Jobs ---
+# Used by the Streamlit app: number of goals that run at the same time, how many
+# finished jobs are remembered, and how many warm per-profile agents are kept.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_HISTORY_LIMIT = int(os.getenv("JOB_HISTORY_LIMIT", "200"))
+AGENT_POOL_MAX_PROFILES = int(os.getenv("AGENT_POOL_MAX_PROFILES", "32"))
+
+# --- HTTP Service ---
+# `python src/server.py` serves the job API. SERVICE_WORKERS goals run at once;
+# when SERVICE_MAX_QUEUE more are waiting, new submissions get a 429. Jobs are
+# kept in SERVICE_JOB_STORE_PATH and deleted SERVICE_JOB_RETENTION_SECONDS after
+# they finish. When SERVICE_API_TOKEN is set, requests need it as a Bearer token.
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "8"))
+SERVICE_MAX_QUEUE = int(os.getenv("SERVICE_MAX_QUEUE", "100"))
+SERVICE_JOB_STORE_PATH = os.getenv(
+    "SERVICE_JOB_STORE_PATH", os.path.join(PROJECT_ROOT, "data", "state", "jobs.sqlite")
+)
+SERVICE_JOB_RETENTION_SECONDS = float(os.getenv("SERVICE_JOB_RETENTION_SECONDS", "604800"))
+SERVICE_API_TOKEN = os.getenv("SERVICE_API_TOKEN", "")
+
+# --- Review Processing ---
+# The ReputationAgent remembers, per business, which reviews it has already
+# answered. Reviews are fetched in pages of REVIEW_FETCH_LIMIT, and up to
+# REVIEW_CACHED_DRAFTS_SHOWN earlier drafts are returned alongside new ones.
+REVIEW_STORE_PATH = os.getenv(
+    "REVIEW_STORE_PATH", os.path.join(PROJECT_ROOT, "data", "state", "reviews.sqlite")
+)
+REVIEW_FETCH_LIMIT = int(os.getenv("REVIEW_FETCH_LIMIT", "50"))
+REVIEW_CACHED_DRAFTS_SHOWN = int(os.getenv("REVIEW_CACHED_DRAFTS_SHOWN", "10"))
+# Backlog mode: when the new reviews exceed REVIEW_CHUNK_TOKENS, they are split
+# into chunks of that size and drafted by up to REVIEW_DRAFT_CONCURRENCY
+# concurrent completions. Replies missing from a chunk are retried on their own.
+REVIEW_CHUNK_TOKENS = int(os.getenv("REVIEW_CHUNK_TOKENS", "1500"))
+REVIEW_DRAFT_CONCURRENCY = int(os.getenv("REVIEW_DRAFT_CONCURRENCY", "4"))
+REVIEW_CHUNK_MAX_ATTEMPTS = int(os.getenv("REVIEW_CHUNK_MAX_ATTEMPTS", "3"))
+# Reviews can be read from a JSONL export instead of the sample data; exports
+# are streamed in batches of REVIEW_INGEST_BATCH_SIZE. Local triage gives short,
+# clearly positive reviews (rating >= REVIEW_TRIAGE_MIN_RATING, at most
+# REVIEW_TRIAGE_MAX_WORDS words) a templated reply instead of an LLM draft.
+REVIEWS_SOURCE_PATH = os.getenv("REVIEWS_SOURCE_PATH", "")
+REVIEW_INGEST_BATCH_SIZE = int(os.getenv("REVIEW_INGEST_BATCH_SIZE", "500"))
+REVIEW_TRIAGE = os.getenv("REVIEW_TRIAGE", "on").lower() in ("1", "true", "on", "yes")
+REVIEW_TRIAGE_MIN_RATING = float(os.getenv("REVIEW_TRIAGE_MIN_RATING", "4"))
+REVIEW_TRIAGE_MAX_WORDS = int(os.getenv("REVIEW_TRIAGE_MAX_WORDS", "60"))
+REVIEW_TRIAGE_MIN_SCORE = float(os.getenv("REVIEW_TRIAGE_MIN_SCORE", "1.0"))
+# Near-duplicate reviews (estimated Jaccard similarity of their text at least
+# REVIEW_DEDUP_THRESHOLD) reuse one drafted reply instead of each getting a new one.
+REVIEW_DEDUP = os.getenv("REVIEW_DEDUP", "on").lower() in ("1", "true", "on", "yes")
+REVIEW_DEDUP_THRESHOLD = float(os.getenv("REVIEW_DEDUP_THRESHOLD", "0.8"))
+REVIEW_DEDUP_NUM_PERM = int(os.getenv("REVIEW_DEDUP_NUM_PERM", "64"))
+
+# --- Content Calendar ---
+# SocialMediaAgent.plan_calendar writes up to CALENDAR_POSTS_PER_REQUEST posts
+# per structured-output completion, runs up to CALENDAR_CONCURRENCY requests at
+# once, and asks again (at most CALENDAR_MAX_ATTEMPTS times) for invalid posts.
+CALENDAR_POSTS_PER_REQUEST = int(os.getenv("CALENDAR_POSTS_PER_REQUEST", "7"))
+CALENDAR_CONCURRENCY = int(os.getenv("CALENDAR_CONCURRENCY", "4"))
+CALENDAR_MAX_ATTEMPTS = int(os.getenv("CALENDAR_MAX_ATTEMPTS", "2"))
+
+# --- Business Profiles ---
+# Profiles are compiled (normalized and condensed to at most PROFILE_MAX_TOKENS)
+# once and kept in an LRU store of PROFILE_STORE_MAX_ENTRIES tenants.
+PROFILE_STORE_MAX_ENTRIES = int(os.getenv("PROFILE_STORE_MAX_ENTRIES", "1024"))
+PROFILE_MAX_TOKENS = int(os.getenv("PROFILE_MAX_TOKENS", "800"))
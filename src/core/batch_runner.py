@@ -0,0 +1,160 @@
+# src/core/batch_runner.py
+#
+# Runs many goals (across many business profiles) through the ManagerAgent on
+# a bounded pool of asyncio workers. Every LLM request is scheduled through a
+# shared rate limiter and retried with backoff. Results are appended to an
+# output JSONL file as each goal completes; that file doubles as the
+# checkpoint, so re-running a crashed batch skips the goals already done.
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+from src.config import settings
+from src.core.deadlines import deadline_scope
+from src.core.rate_limit import RateLimiter, RetryPolicy
+
+def _goal_id(goal: str, profile: str) -> str:
+    return hashlib.sha256(f"{profile}\n{goal}".encode("utf-8")).hexdigest()[:16]
+
+def load_goals(input_path: str, default_profile: str = None) -> list:
+    """
+    Reads goals from a JSONL file. Each line is an object with a `goal` and
+    either a `profile` (the profile text) or a `profile_path`; lines without
+    either use `default_profile`. An `id` is optional and derived from the
+    goal and profile when missing, so it stays stable across runs.
+    """
+    goals = []
+    base_dir = os.path.dirname(os.path.abspath(input_path))
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if "goal" not in entry:
+                raise ValueError(f"{input_path}:{line_number}: every line needs a 'goal'.")
+            profile = entry.get("profile")
+            if profile is None and entry.get("profile_path"):
+                with open(os.path.join(base_dir, entry["profile_path"]), "r", encoding="utf-8") as profile_file:
+                    profile = profile_file.read()
+            if profile is None:
+                profile = default_profile
+            if not profile:
+                raise ValueError(f"{input_path}:{line_number}: no business profile given.")
+            goals.append({
+                "id": str(entry.get("id") or _goal_id(entry["goal"], profile)),
+                "goal": entry["goal"],
+                "profile": profile,
+            })
+    return goals
+
+def load_completed_ids(output_path: str) -> set:
+    """
+    Returns the ids of goals that already finished successfully in a previous
+    run. A partially written last line (from a crash) is ignored.
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["id"])
+    return completed
+
+class BatchRunner:
+    """
+    Runs a list of goals concurrently with `workers` asyncio workers. One
+    ManagerAgent is created per distinct business profile and reused, and all
+    of them share the same rate limiter and retry policy.
+    """
+    def __init__(self, workers: int = None, requests_per_minute: float = None, tokens_per_minute: float = None,
+                 retry_policy: RetryPolicy = None):
+        self.workers = workers or settings.BATCH_WORKERS
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=requests_per_minute or settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=tokens_per_minute or settings.LLM_TOKENS_PER_MINUTE,
+        )
+        self.retry_policy = retry_policy or RetryPolicy.from_settings()
+        self._managers = {}
+
+    def _manager_for(self, profile: str):
+        # Imported here so the batch module can be loaded without the agent stack.
+        from src.agents.manager_agent import ManagerAgent
+
+        profile_key = hashlib.sha256(profile.encode("utf-8")).hexdigest()
+        if profile_key not in self._managers:
+            self._managers[profile_key] = ManagerAgent(
+                business_profile=profile,
+                rate_limiter=self.rate_limiter,
+                retry_policy=self.retry_policy,
+            )
+        return self._managers[profile_key]
+
+    async def _run_goal(self, item: dict) -> dict:
+        started = time.perf_counter()
+        record = {"id": item["id"], "goal": item["goal"]}
+        try:
+            with deadline_scope() as deadline:
+                record["result"] = await self._manager_for(item["profile"]).adelegate_task(item["goal"])
+            # A partial answer (the goal ran out of time) is not "ok", so a resumed batch runs the goal again.
+            record["status"] = "partial" if deadline is not None and deadline.cut_short else "ok"
+        except Exception as error:
+            record["status"] = "error"
+            record["error"] = f"{error.__class__.__name__}: {error}"
+        record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return record
+
+    async def arun(self, goals: list, output_path: str) -> dict:
+        """
+        Runs every goal that is not already marked done in `output_path` and
+        appends one result line per goal as soon as it finishes.
+        """
+        completed_ids = load_completed_ids(output_path)
+        pending = [item for item in goals if item["id"] not in completed_ids]
+        print(f"BatchRunner: {len(goals)} goals, {len(goals) - len(pending)} already done, "
+              f"{len(pending)} to run with {self.workers} workers.")
+
+        queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+        summary = {"total": len(goals), "skipped": len(goals) - len(pending), "ok": 0, "partial": 0, "error": 0}
+        write_lock = asyncio.Lock()
+
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(output_dir, exist_ok=True)
+        with open(output_path, "a", encoding="utf-8") as output_file:
+            async def worker():
+                while True:
+                    try:
+                        item = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    record = await self._run_goal(item)
+                    async with write_lock:
+                        output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        output_file.flush()
+                        os.fsync(output_file.fileno())
+                        summary[record["status"]] += 1
+                        done = summary["ok"] + summary["partial"] + summary["error"]
+                        print(f"BatchRunner: [{done}/{len(pending)}] {record['id']} -> {record['status']} "
+                              f"({record['elapsed_seconds']}s)")
+
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, len(pending)) or 1)))
+
+        print(f"BatchRunner: Finished. {summary}")
+        return summary
+
+def run_batch(input_path: str, output_path: str, default_profile: str = None, **runner_options) -> dict:
+    """
+    Convenience entry point: loads goals from `input_path`, runs them, and
+    streams the results to `output_path`.
+    """
+    goals = load_goals(input_path, default_profile=default_profile)
+    return asyncio.run(BatchRunner(**runner_options).arun(goals, output_path))
@@ -0,0 +1,174 @@
+# src/core/completion_cache.py
+#
+# A persistent cache that sits in front of the chat-completion calls made by
+# the agents. Entries are stored in SQLite, keyed by a stable hash of the
+# request, and evicted by age (TTL) and by size (least recently used first).
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from src.config import settings
+
+# Cache modes:
+#   off    - the cache is bypassed entirely.
+#   on     - serve hits from the cache, call the API on a miss and store the result.
+#   record - always call the API and overwrite the stored result.
+#   replay - serve only from the cache; a miss raises CompletionCacheMiss.
+CACHE_MODES = ("off", "on", "record", "replay")
+
+class CompletionCacheMiss(LookupError):
+    """Raised in replay mode when a request has no cached completion."""
+
+def make_cache_key(model: str, messages: list, tools: list = None, **params) -> str:
+    """
+    Builds a stable SHA-256 key for a chat-completion request. The payload is
+    serialized with sorted keys so dict ordering never changes the key.
+    """
+    payload = {"model": model, "messages": messages, "tools": tools or [], "params": params}
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class CompletionCache:
+    """
+    An SQLite-backed completion cache with TTL and LRU size eviction.
+    It is safe to share a single instance between threads.
+    """
+    def __init__(self, path: str, mode: str = "on", ttl_seconds: float = 3600, max_entries: int = 5000):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown completion cache mode '{mode}'. Expected one of {CACHE_MODES}.")
+        self.path = path
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if mode != "off":
+            self._connect()
+
+    def _connect(self):
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_access ON completions (last_access)")
+        self._conn.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def reads(self) -> bool:
+        return self.mode in ("on", "replay")
+
+    @property
+    def writes(self) -> bool:
+        return self.mode in ("on", "record")
+
+    def get(self, key: str):
+        """
+        Returns the cached value for a key, or None on a miss. Expired entries
+        are deleted on read. In replay mode, a miss raises CompletionCacheMiss.
+        """
+        if not self.reads:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl_seconds and now - row[1] > self.ttl_seconds and self.mode != "replay":
+                # Replay mode ignores the TTL so recorded fixtures never expire.
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row:
+                self._conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.hits += 1
+                return json.loads(row[0])
+            self.misses += 1
+        if self.mode == "replay":
+            raise CompletionCacheMiss(f"No cached completion for key {key[:12]}... (replay mode).")
+        return None
+
+    def put(self, key: str, value: dict):
+        """
+        Stores a value and evicts the least recently used entries if the cache
+        has grown past `max_entries`.
+        """
+        if not self.writes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            if self.max_entries:
+                self._conn.execute(
+                    """
+                    DELETE FROM completions WHERE key IN (
+                        SELECT key FROM completions ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Deletes every expired entry and returns how many were removed."""
+        if not self.enabled or not self.ttl_seconds:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM completions WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        entries = 0
+        if self.enabled:
+            with self._lock:
+                entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "entries": entries}
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_completion_cache() -> CompletionCache:
+    """
+    Returns the process-wide completion cache configured from settings.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = CompletionCache(
+                path=settings.COMPLETION_CACHE_PATH,
+                mode=settings.COMPLETION_CACHE_MODE,
+                ttl_seconds=settings.COMPLETION_CACHE_TTL_SECONDS,
+                max_entries=settings.COMPLETION_CACHE_MAX_ENTRIES,
+            )
+        return _default_cache
@@ -0,0 +1,170 @@
+# src/core/context.py
+#
+# Keeps the prompt that the ReAct loop sends on every iteration within a token
+# budget. Before each completion request the ContextManager:
+#   1. counts the tokens of every message,
+#   2. truncates oversized tool results,
+#   3. if still over budget, drops the oldest tool turns and folds a short
+#      summary of them into the user goal,
+#   4. as a last resort, shrinks the remaining tool results further.
+# The full history is never modified; only the copy that is sent is compacted.
+
+from src.config import settings
+
+# The tokenizer is loaded on the first count, which keeps importing this module cheap.
+_encoding = None
+_encoding_loaded = False
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # tiktoken is optional. Without it we use the common ~4 characters/token estimate.
+            _encoding = None
+        _encoding_loaded = True
+    return _encoding
+
+# Fixed per-message overhead for role and separators in chat formats.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+def message_tokens(message: dict) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or []:
+        tokens += count_tokens(tool_call["function"]["name"]) + count_tokens(tool_call["function"]["arguments"])
+    return tokens
+
+def messages_tokens(messages: list) -> int:
+    return sum(message_tokens(message) for message in messages)
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """
+    Shortens text to roughly `max_tokens`, keeping the beginning and the end,
+    which usually hold the answer and the most relevant details.
+    """
+    # A token is at least one character, so short texts need no tokenizer.
+    if len(text) <= max_tokens:
+        return text
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep_chars = max(len(text) * max_tokens // tokens, 0)
+    head = text[: keep_chars * 3 // 4]
+    tail = text[len(text) - keep_chars // 4:] if keep_chars // 4 else ""
+    return f"{head}\n...[truncated {tokens - max_tokens} tokens]...\n{tail}"
+
+class ContextReport:
+    """Token accounting for a single agent run."""
+    def __init__(self):
+        self.requests = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "prompt_tokens_before": self.tokens_before,
+            "prompt_tokens_sent": self.tokens_after,
+            "prompt_tokens_saved": self.tokens_saved,
+        }
+
+class ContextManager:
+    """
+    Compacts the message list before each chat-completion request so the prompt
+    stays within `prompt_budget` tokens.
+    """
+    def __init__(self, prompt_budget: int = None, max_tool_result_tokens: int = None, keep_recent_turns: int = None):
+        self.prompt_budget = prompt_budget or settings.CONTEXT_PROMPT_BUDGET
+        self.max_tool_result_tokens = max_tool_result_tokens or settings.CONTEXT_MAX_TOOL_RESULT_TOKENS
+        self.keep_recent_turns = settings.CONTEXT_KEEP_RECENT_TURNS if keep_recent_turns is None else keep_recent_turns
+
+    @staticmethod
+    def _split_turns(messages: list):
+        """
+        Splits the history into the leading messages (system prompt and user goal)
+        and a list of turns. A turn is an assistant message plus the tool results
+        that answer it; they must be kept or dropped together.
+        """
+        head_length = 0
+        while head_length < len(messages) and messages[head_length]["role"] in ("system", "user"):
+            head_length += 1
+        turns = []
+        for message in messages[head_length:]:
+            if message["role"] == "tool" and turns:
+                turns[-1].append(message)
+            else:
+                turns.append([message])
+        return messages[:head_length], turns
+
+    @staticmethod
+    def _summarize_turns(turns: list) -> str:
+        lines = []
+        for turn in turns:
+            for message in turn:
+                if message["role"] == "assistant":
+                    for tool_call in message.get("tool_calls") or []:
+                        lines.append(f"- Called {tool_call['function']['name']}({tool_call['function']['arguments']})")
+                    if message.get("content"):
+                        lines.append(f"- Noted: {truncate_text(message['content'], 40)}")
+                elif message["role"] == "tool":
+                    lines.append(f"  -> {truncate_text(message.get('content') or '', 60)}")
+        return "\n".join(lines)
+
+    def _truncate_tool_results(self, turns: list, max_tokens: int) -> list:
+        compacted = []
+        for turn in turns:
+            new_turn = []
+            for message in turn:
+                if message["role"] == "tool" and message_tokens(message) > max_tokens:
+                    message = dict(message, content=truncate_text(message.get("content") or "", max_tokens))
+                new_turn.append(message)
+            compacted.append(new_turn)
+        return compacted
+
+    def prepare(self, messages: list, report: ContextReport = None) -> list:
+        """
+        Returns a copy of `messages` that fits the prompt budget, and records
+        the before/after token counts in `report`.
+        """
+        tokens_before = messages_tokens(messages)
+        head, turns = self._split_turns(messages)
+        turns = self._truncate_tool_results(turns, self.max_tool_result_tokens)
+
+        def total(head, turns):
+            return messages_tokens(head) + sum(messages_tokens(turn) for turn in turns)
+
+        dropped = []
+        while total(head, turns) > self.prompt_budget and len(turns) > self.keep_recent_turns:
+            dropped.append(turns.pop(0))
+        if dropped:
+            # Fold a short summary of the dropped turns into the last user message.
+            summary = self._summarize_turns(dropped)
+            head = list(head)
+            last_user = head[-1]
+            head[-1] = dict(last_user, content=f"{last_user['content']}\n\n[Summary of earlier steps]\n{summary}")
+
+        limit = self.max_tool_result_tokens
+        while total(head, turns) > self.prompt_budget and limit > 64:
+            limit //= 2
+            turns = self._truncate_tool_results(turns, limit)
+
+        compacted = list(head) + [message for turn in turns for message in turn]
+        if report is not None:
+            report.requests += 1
+            report.tokens_before += tokens_before
+            report.tokens_after += messages_tokens(compacted)
+        return compacted
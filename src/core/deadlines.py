@@ -0,0 +1,125 @@
+# src/core/deadlines.py
+#
+# Per-goal deadlines with cooperative cancellation. ManagerAgent opens a
+# deadline scope for every goal; the deadline lives in a context variable, so
+# it follows the goal into worker threads (started with a copied context) and
+# asyncio tasks without being passed through every call. The agent loop checks
+# it before each iteration, bounds every LLM request and tool call by the time
+# that is left, and returns a best-effort partial answer once it has expired.
+
+import time
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager
+from src.config import settings
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the deadline of the current goal has passed."""
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        # Set when work was cut short by this deadline, i.e. the answer is partial.
+        self.cut_short = False
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self) -> float:
+        """Returns the remaining seconds, or raises DeadlineExceeded if there are none."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"The deadline of {self.seconds:.0f}s has passed.")
+        return remaining
+
+_current_deadline = contextvars.ContextVar("current_deadline", default=None)
+
+def current_deadline():
+    """The deadline of the goal being worked on, or None."""
+    return _current_deadline.get()
+
+def deadline_expired() -> bool:
+    deadline = _current_deadline.get()
+    return deadline is not None and deadline.expired
+
+def mark_cut_short():
+    """Records that the current goal returns a partial answer because its deadline passed."""
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.cut_short = True
+
+@contextmanager
+def deadline_scope(seconds: float = None):
+    """
+    Runs the enclosed code under a deadline of `seconds` (default:
+    GOAL_TIMEOUT_SECONDS; 0 disables it). An enclosing deadline that expires
+    earlier is kept. Yields the deadline in effect (None without one); its
+    `cut_short` tells the caller afterwards whether the answer is partial.
+    """
+    seconds = settings.GOAL_TIMEOUT_SECONDS if seconds is None else seconds
+    outer = _current_deadline.get()
+    deadline = Deadline(seconds) if seconds and seconds > 0 else None
+    if deadline is None or (outer is not None and outer.expires_at <= deadline.expires_at):
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        if deadline is not None and deadline.cut_short and outer is not None:
+            outer.cut_short = True
+        try:
+            _current_deadline.reset(token)
+        except ValueError:
+            # A generator was resumed from another context; restore the outer deadline directly.
+            _current_deadline.set(outer)
+
+def time_budget(limit: float = None):
+    """
+    The time allowed for one operation: the smaller of `limit` and the time
+    left before the current deadline. None means unbounded. Raises
+    DeadlineExceeded when the deadline has already passed.
+    """
+    deadline = _current_deadline.get()
+    remaining = deadline.check() if deadline is not None else None
+    limit = limit if limit and limit > 0 else None
+    if remaining is None:
+        return limit
+    return remaining if limit is None else min(limit, remaining)
+
+def call_with_timeout(timeout, function, /, **kwargs):
+    """
+    Calls a blocking function and raises TimeoutError if it has not returned
+    within `timeout` seconds (None waits forever). Python threads cannot be killed, so a function
+    that times out keeps running in a daemon thread and its result is dropped.
+    """
+    if timeout is None:
+        return function(**kwargs)
+    outcome = {}
+    context = contextvars.copy_context()
+
+    def target():
+        try:
+            outcome["result"] = context.run(function, **kwargs)
+        except BaseException as error:
+            outcome["error"] = error
+
+    worker = threading.Thread(target=target, daemon=True, name="timed-call")
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        raise TimeoutError(f"No result within {timeout:.1f}s.")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+async def await_with_timeout(awaitable, timeout: float = None):
+    """Awaits with an optional timeout; on timeout the awaitable is cancelled."""
+    if timeout is None:
+        return await awaitable
+    return await asyncio.wait_for(awaitable, timeout)
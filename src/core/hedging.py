@@ -0,0 +1,156 @@
+# src/core/hedging.py
+#
+# Hedged LLM requests against tail latency. The Hedger tracks the latency of
+# recent completions; when a request has not answered within the observed p95
+# (configurable quantile), an identical backup request is sent. Whichever
+# answers first wins and the other one is cancelled. Only a few percent of
+# requests are duplicated, while the slow tail is cut off; the share of hedged
+# requests is capped, so a slow provider does not get twice the load.
+
+import time
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from src.config import settings
+
+class Hedger:
+    def __init__(self, quantile: float = None, min_samples: int = None, initial_delay: float = None,
+                 max_rate: float = None, window: int = 200):
+        self.quantile = quantile or settings.LLM_HEDGE_QUANTILE
+        self.max_rate = max_rate if max_rate is not None else settings.LLM_HEDGE_MAX_RATE
+        self.min_samples = min_samples or settings.LLM_HEDGE_MIN_SAMPLES
+        self.initial_delay = initial_delay if initial_delay is not None else settings.LLM_HEDGE_INITIAL_DELAY
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def delay(self) -> float:
+        """Seconds to wait before sending the backup request."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self._latencies)
+        return ordered[min(int(self.quantile * len(ordered)), len(ordered) - 1)]
+
+    def _start(self):
+        with self._lock:
+            self.requests += 1
+
+    def _reserve_hedge(self) -> bool:
+        """Counts a backup request, unless that would exceed `max_rate`."""
+        with self._lock:
+            if self.hedged + 1 > self.max_rate * self.requests:
+                return False
+            self.hedged += 1
+            return True
+
+    @staticmethod
+    def _winner(done: set):
+        """The future to take from a set that finished together: one that succeeded, if any."""
+        return next((future for future in done if future.exception() is None), next(iter(done)))
+
+    def _finish(self, started: float, backup_won: bool = False):
+        with self._lock:
+            self.hedge_wins += backup_won
+        self.observe(time.monotonic() - started)
+
+    async def run(self, make_call):
+        """
+        Awaits `make_call()`; if it is slower than `delay()`, races it against a
+        second `make_call()` and cancels the slower one. If the first finisher
+        fails, the other one's outcome is used.
+        """
+        started = time.monotonic()
+        self._start()
+        primary = asyncio.ensure_future(make_call())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.delay())
+            if done or not self._reserve_hedge():
+                result = primary.result() if done else await primary
+                self._finish(started)
+                return result
+            backup = asyncio.ensure_future(make_call())
+            tasks.append(backup)
+            pending = {primary, backup}
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = self._winner(done)
+                if winner.exception() is None or not pending:
+                    break
+            result = winner.result()
+            self._finish(started, backup_won=winner is backup)
+            return result
+        finally:
+            # Also reached when the caller is cancelled: no call may outlive it.
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+            return self._executor
+
+    def _submit(self, call):
+        # Each call runs in its own copy of the caller's context (deadline, spans).
+        return self._pool().submit(contextvars.copy_context().run, call)
+
+    def run_sync(self, call):
+        """
+        The blocking version of `run`. A request that is already in flight
+        cannot be interrupted from another thread, so the losing call is left
+        to finish in the background and its result is dropped.
+        """
+        started = time.monotonic()
+        self._start()
+        primary = self._submit(call)
+        done, _ = wait({primary}, timeout=self.delay())
+        if done or not self._reserve_hedge():
+            result = primary.result()
+            self._finish(started)
+            return result
+        backup = self._submit(call)
+        pending = {primary, backup}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = self._winner(done)
+            if winner.exception() is None or not pending:
+                break
+        for future in pending:
+            future.cancel()
+        result = winner.result()
+        self._finish(started, backup_won=winner is backup)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+            }
+
+_default_hedger = None
+_default_hedger_lock = threading.Lock()
+
+def get_hedger() -> Hedger:
+    """
+    Returns the process-wide hedger configured from settings.
+    """
+    global _default_hedger
+    with _default_hedger_lock:
+        if _default_hedger is None:
+            _default_hedger = Hedger()
+        return _default_hedger
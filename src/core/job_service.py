@@ -0,0 +1,179 @@
+# src/core/job_service.py
+#
+# The job queue behind the HTTP service (src/server.py). Submitted goals are
+# stored in the JobStore and run by a fixed number of asyncio workers on the
+# async agent path, so every LLM request goes through one shared rate limiter
+# and retry policy. Warm ManagerAgents are reused per business profile through
+# an AgentPool. When more than `max_queue` jobs are waiting, `submit` refuses
+# new work with QueueFull instead of letting the backlog grow without bound.
+
+import math
+import time
+import asyncio
+from src.config import settings
+from src.core import job_store as states
+from src.core.deadlines import deadline_scope
+from src.core.job_store import JobStore
+from src.core.jobs import AgentPool
+from src.core.rate_limit import RateLimiter, RetryPolicy
+from src.core.tracing import get_prometheus_exporter
+
+class QueueFull(Exception):
+    """Raised by `submit` when the queue is full; `retry_after` is a hint in seconds."""
+    def __init__(self, retry_after: int):
+        super().__init__(f"The job queue is full. Retry in {retry_after}s.")
+        self.retry_after = retry_after
+
+class JobService:
+    """
+    Runs the jobs of a JobStore on `workers` asyncio workers. `start` must be
+    awaited on the event loop that serves the requests; it re-queues the jobs
+    left over from the previous run.
+    """
+    def __init__(self, job_store: JobStore = None, workers: int = None, max_queue: int = None,
+                 agent_pool: AgentPool = None, retention_seconds: float = None):
+        self.job_store = job_store or JobStore(settings.SERVICE_JOB_STORE_PATH)
+        self.workers = workers or settings.SERVICE_WORKERS
+        self.max_queue = max_queue or settings.SERVICE_MAX_QUEUE
+        self.retention_seconds = retention_seconds or settings.SERVICE_JOB_RETENTION_SECONDS
+        self.agent_pool = agent_pool or AgentPool(
+            rate_limiter=RateLimiter(
+                requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+                tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            ),
+            retry_policy=RetryPolicy.from_settings(),
+        )
+        self.metrics = get_prometheus_exporter().registry
+        self._queue = None
+        self._worker_tasks = []
+        self._running = {}  # job_id -> asyncio.Task of the running job
+        self._outputs = {}  # job_id -> chunks of the answer streamed so far
+        self._waiting = set()  # ids of the queued jobs that have not been cancelled
+        # Moving average of the job run time, used for the Retry-After hint.
+        self._average_seconds = 10.0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        pruned = self.job_store.prune(self.retention_seconds)
+        recovered = self.job_store.recover()
+        for job_id in recovered:
+            self._enqueue(job_id)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"JobService: {self.workers} workers started, {len(recovered)} job(s) re-queued, "
+              f"{pruned} old job(s) pruned.")
+
+    async def stop(self):
+        """
+        Stops the workers. Jobs that are still running stay marked as running
+        in the store and are re-queued by the next `start`.
+        """
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def _enqueue(self, job_id: str):
+        self._waiting.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    def retry_after(self) -> int:
+        """Roughly how long until a queue slot frees up, in whole seconds."""
+        return max(1, math.ceil(self._average_seconds * max(self.queued, 1) / self.workers))
+
+    def submit(self, goal: str, business_profile: str, timeout: float = None) -> dict:
+        if self.queued >= self.max_queue:
+            self.metrics.inc("service_jobs_rejected_total", help_text="Jobs refused because the queue was full.")
+            raise QueueFull(self.retry_after())
+        job = self.job_store.create(goal, business_profile, timeout=timeout)
+        self._enqueue(job["id"])
+        self.metrics.inc("service_jobs_submitted_total", help_text="Jobs accepted by the service.")
+        return job
+
+    def get(self, job_id: str):
+        """The stored job, plus the answer streamed so far while it is running."""
+        job = self.job_store.get(job_id)
+        if job is not None and job["status"] == states.RUNNING and job_id in self._outputs:
+            job["result"] = "".join(self._outputs[job_id])
+        return job
+
+    def cancel(self, job_id: str):
+        """
+        Cancels a queued or running job and returns it (None if unknown). A
+        cancelled job keeps the part of the answer produced before it stopped.
+        """
+        if self.job_store.get(job_id) is None:
+            return None
+        if self.job_store.cancel_queued(job_id):
+            self._waiting.discard(job_id)
+        elif job_id in self._running:
+            self._running[job_id].cancel()
+        return self.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        self._waiting.discard(job_id)
+        if not self.job_store.mark_running(job_id):
+            # Cancelled while it was waiting in the queue.
+            return
+        job = self.job_store.get(job_id)
+        self.metrics.observe("service_job_queue_seconds", job["started_at"] - job["created_at"],
+                             help_text="Time jobs spent waiting in the queue.")
+        chunks = self._outputs[job_id] = []
+        task = self._running[job_id] = asyncio.create_task(self._execute(job, chunks))
+        started = time.monotonic()
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            # The service is stopping: the job stays "running" and is re-queued on start-up.
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise
+        finally:
+            self._running.pop(job_id, None)
+            self._outputs.pop(job_id, None)
+
+        elapsed = time.monotonic() - started
+        if task.cancelled():
+            status, error = states.CANCELLED, None
+        elif task.exception() is not None:
+            status, error = states.ERROR, f"{task.exception().__class__.__name__}: {task.exception()}"
+        elif task.result():
+            status, error = states.TIMED_OUT, "The time limit was reached; the result is partial."
+        else:
+            status, error = states.DONE, None
+            self._average_seconds = 0.8 * self._average_seconds + 0.2 * elapsed
+        self.job_store.finish(job_id, status, result="".join(chunks), error=error)
+        self.metrics.inc("service_jobs_finished_total", help_text="Finished jobs by status.", status=status)
+        self.metrics.observe("service_job_duration_seconds", elapsed, help_text="Run time of finished jobs.",
+                             status=status)
+        print(f"JobService: {job_id} -> {status} ({elapsed:.1f}s)")
+
+    async def _execute(self, job: dict, chunks: list) -> bool:
+        """Runs the job's goal, collecting the answer in `chunks`. Returns True if it was cut short by the deadline."""
+        business_profile = self.job_store.get_profile(job["profile_hash"])
+        with deadline_scope(job["timeout"]) as deadline:
+            # Building a ManagerAgent for a new profile does some blocking set-up work.
+            manager = await asyncio.to_thread(self.agent_pool.get, business_profile)
+            async for chunk in manager.adelegate_task_stream(job["goal"], timeout=job["timeout"]):
+                chunks.append(chunk)
+        return deadline is not None and deadline.cut_short
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": len(self._running),
+            "max_queue": self.max_queue,
+            "jobs": self.job_store.counts(),
+        }
@@ -0,0 +1,152 @@
+# src/core/job_store.py
+#
+# Persistent state of the HTTP service (src/server.py). Every submitted goal is
+# a row in the jobs table, with its status, result and timings; the business
+# profiles are stored once per content hash. On start-up the service re-queues
+# the jobs that were queued or running when it stopped, so accepted work
+# survives a restart.
+
+import os
+import time
+import uuid
+import sqlite3
+import threading
+from src.core.profiles import content_hash
+
+QUEUED, RUNNING, DONE, ERROR, CANCELLED = "queued", "running", "done", "error", "cancelled"
+# Finished, but the goal ran out of time: the result is a partial answer.
+TIMED_OUT = "timed_out"
+FINISHED_STATUSES = (DONE, TIMED_OUT, ERROR, CANCELLED)
+
+_JOB_COLUMNS = ("id", "goal", "profile_hash", "status", "result", "error", "timeout",
+                "created_at", "started_at", "finished_at")
+
+class JobStore:
+    """
+    An SQLite-backed store of service jobs. It is safe to share a single
+    instance between threads.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS profiles (
+                profile_hash TEXT PRIMARY KEY,
+                business_profile TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                goal TEXT NOT NULL,
+                profile_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                timeout REAL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+            """
+        )
+        self._conn.commit()
+
+    def create(self, goal: str, business_profile: str, timeout: float = None) -> dict:
+        """Stores a new queued job and returns it."""
+        job = {
+            "id": uuid.uuid4().hex[:16], "goal": goal, "profile_hash": content_hash(business_profile),
+            "status": QUEUED, "result": None, "error": None, "timeout": timeout,
+            "created_at": time.time(), "started_at": None, "finished_at": None,
+        }
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO profiles (profile_hash, business_profile) VALUES (?, ?)",
+                (job["profile_hash"], business_profile),
+            )
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(_JOB_COLUMNS)}) VALUES ({', '.join('?' for _ in _JOB_COLUMNS)})",
+                tuple(job[column] for column in _JOB_COLUMNS),
+            )
+            self._conn.commit()
+        return job
+
+    def get(self, job_id: str):
+        """Returns the job as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return dict(zip(_JOB_COLUMNS, row)) if row else None
+
+    def get_profile(self, profile_hash: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT business_profile FROM profiles WHERE profile_hash = ?", (profile_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def mark_running(self, job_id: str) -> bool:
+        """Moves a queued job to running. Returns False if it is no longer queued (e.g. cancelled)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, time.time(), job_id, QUEUED),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def finish(self, job_id: str, status: str, result: str = None, error: str = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, result, error, time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def cancel_queued(self, job_id: str) -> bool:
+        """Cancels a job that has not started yet. Returns False if it is not queued."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def recover(self) -> list:
+        """
+        Re-queues the jobs that were running when the service stopped and
+        returns the ids of all queued jobs, oldest first.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING)
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def counts(self) -> dict:
+        """The number of jobs per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Deletes finished jobs older than `max_age_seconds` and profiles no job uses any more."""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' for _ in FINISHED_STATUSES)}) AND finished_at < ?",
+                (*FINISHED_STATUSES, time.time() - max_age_seconds),
+            )
+            self._conn.execute(
+                "DELETE FROM profiles WHERE profile_hash NOT IN (SELECT DISTINCT profile_hash FROM jobs)"
+            )
+            self._conn.commit()
+        return cursor.rowcount
@@ -0,0 +1,147 @@
+# src/core/jobs.py
+#
+# Background execution of goals for interactive front ends. A JobExecutor runs
+# goals on a shared thread pool and returns a job id immediately; callers poll
+# the Job for its status, the answer streamed so far and the spans finished so
+# far. Agents are reused per business profile through an AgentPool, so their
+# HTTP clients (and connection pools) survive across jobs and sessions.
+
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from src.config import settings
+from src.core.profiles import content_hash as profile_hash
+from src.core.tracing import get_tracer
+
+class AgentPool:
+    """
+    An LRU-bounded map from profile hash to a warm ManagerAgent. Agents are
+    created on first use and shared by every job with the same profile.
+    """
+    def __init__(self, max_profiles: int = None, **agent_options):
+        self.max_profiles = max_profiles or settings.AGENT_POOL_MAX_PROFILES
+        self.agent_options = agent_options
+        self._agents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, business_profile: str):
+        # Imported here so this module stays cheap to import.
+        from src.agents.manager_agent import ManagerAgent
+
+        key = profile_hash(business_profile)
+        with self._lock:
+            manager = self._agents.get(key)
+            if manager is not None:
+                self._agents.move_to_end(key)
+                return manager
+        # Build outside the lock; if two threads race, the first one stored wins.
+        manager = ManagerAgent(business_profile=business_profile, **self.agent_options)
+        with self._lock:
+            manager = self._agents.setdefault(key, manager)
+            self._agents.move_to_end(key)
+            while len(self._agents) > self.max_profiles:
+                self._agents.popitem(last=False)
+        return manager
+
+    def __len__(self):
+        with self._lock:
+            return len(self._agents)
+
+class Job:
+    """The state of one submitted goal. Fields are updated by the worker thread."""
+    QUEUED, RUNNING, DONE, ERROR = "queued", "running", "done", "error"
+
+    def __init__(self, goal: str, business_profile: str, owner: str = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.goal = goal
+        self.business_profile = business_profile
+        self.owner = owner
+        self.status = Job.QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.spans = []
+        self._chunks = []
+        self._lock = threading.Lock()
+
+    def append_output(self, chunk: str):
+        with self._lock:
+            self._chunks.append(chunk)
+
+    @property
+    def output(self) -> str:
+        """The answer streamed so far (the complete answer once the job is done)."""
+        with self._lock:
+            return "".join(self._chunks)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (Job.DONE, Job.ERROR)
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+class JobExecutor:
+    """
+    Runs goals on a bounded thread pool. `submit` returns a job id right away;
+    `get` and `jobs_for` are used to poll progress.
+    """
+    def __init__(self, max_workers: int = None, agent_pool: AgentPool = None, history_limit: int = None):
+        self.agent_pool = agent_pool or AgentPool()
+        self.history_limit = history_limit or settings.JOB_HISTORY_LIMIT
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.JOB_WORKERS, thread_name_prefix="agent-job"
+        )
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, goal: str, business_profile: str, owner: str = None) -> str:
+        job = Job(goal, business_profile, owner=owner)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job.id
+
+    def _prune(self):
+        """Forgets the oldest finished jobs beyond `history_limit`. Called with `_lock` held."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(len(self._jobs) - self.history_limit, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job):
+        job.status = Job.RUNNING
+        job.started_at = time.time()
+        # Spans are collected into the job as they finish, which doubles as
+        # live progress information for the UI.
+        with get_tracer().capture() as spans:
+            job.spans = spans
+            try:
+                manager = self.agent_pool.get(job.business_profile)
+                for chunk in manager.delegate_task_stream(job.goal):
+                    job.append_output(chunk)
+                job.status = Job.DONE
+            except Exception as error:
+                job.error = f"{error.__class__.__name__}: {error}"
+                job.status = Job.ERROR
+            finally:
+                job.finished_at = time.time()
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs_for(self, owner: str) -> list:
+        """All known jobs of one owner (e.g. a browser session), newest first."""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.owner == owner]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,179 @@
+# src/core/profiles.py
+#
+# Business profiles are compiled once and shared. Compiling a profile parses
+# its "key: value" lines, normalizes keys and whitespace, orders the fields
+# canonically and condenses the result into a compact text. Compiled profiles
+# are stored by the hash of their raw content in an LRU-bounded ProfileStore,
+# which the ManagerAgent and the specialists share. Each compiled profile
+# also memoizes the system prompt of every agent type, so all requests of a
+# tenant start with a byte-identical prefix that provider-side prompt caching
+# can reuse. Profile files are read through a small cache that only re-reads a
+# file when its modification time or size has changed.
+
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from src.config import settings
+from src.core.context import truncate_text
+
+# Fields that come first, in this order, in the compiled text.
+CANONICAL_FIELDS = (
+    "business_name", "business_type", "location", "target_audience", "brand_voice", "products", "weekly_special",
+)
+
+_FIELD_LINE = re.compile(r"^\s*([A-Za-z][\w \-]{0,40}?)\s*:\s*(.*?)\s*$")
+_WHITESPACE = re.compile(r"\s+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _clean_value(value: str) -> str:
+    value = _WHITESPACE.sub(" ", value).strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        value = value[1:-1].strip()
+    return value
+
+def parse_profile(business_profile: str) -> tuple:
+    """
+    Returns (fields, notes): the "key: value" lines as a dict with snake_case
+    keys (the first occurrence of a key wins), and the remaining non-empty
+    lines as free-text notes.
+    """
+    fields, notes = {}, []
+    for line in business_profile.splitlines():
+        if not line.strip():
+            continue
+        match = _FIELD_LINE.match(line)
+        if match and match.group(2):
+            key = _WHITESPACE.sub("_", match.group(1).strip().lower()).replace("-", "_")
+            fields.setdefault(key, _clean_value(match.group(2)))
+        else:
+            note = _clean_value(line)
+            if note and note not in notes:
+                notes.append(note)
+    return fields, notes
+
+# Fields that, without an explicit `business_id`, tell two tenants apart.
+IDENTITY_FIELDS = ("business_name", "location")
+
+def business_id_for(fields: dict, business_profile: str) -> str:
+    """
+    A stable id for a business, used to key its stored review state. An
+    explicit `business_id` field in the profile wins. Otherwise the id is
+    derived from the business name and location, so editing the rest of
+    the profile keeps the history but two businesses that share a name do
+    not share state. It falls back to the whole text when the profile has
+    no name.
+    """
+    if fields.get("business_id"):
+        source = f"id:{fields['business_id']}"
+    elif fields.get("business_name"):
+        source = "\n".join(fields.get(field, "").lower() for field in IDENTITY_FIELDS)
+    else:
+        source = business_profile
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+class CompiledProfile:
+    """
+    A normalized, condensed business profile. `text` is what the agents put
+    in their prompts; `system_prompt` returns the memoized prompt of an agent.
+    """
+    def __init__(self, business_profile: str, max_tokens: int = None):
+        self.content_hash = content_hash(business_profile)
+        self.fields, self.notes = parse_profile(business_profile)
+        ordered = [key for key in CANONICAL_FIELDS if key in self.fields]
+        ordered += sorted(key for key in self.fields if key not in CANONICAL_FIELDS)
+        lines = [f"{key}: {self.fields[key]}" for key in ordered] + self.notes
+        self.text = truncate_text("\n".join(lines), max_tokens or settings.PROFILE_MAX_TOKENS)
+        self.business_name = self.fields.get("business_name")
+        self.business_id = business_id_for(self.fields, business_profile)
+        self._prompts = {}
+        self._lock = threading.Lock()
+
+    def field(self, name: str, default: str = "") -> str:
+        return self.fields.get(name, default)
+
+    def system_prompt(self, key: str, build) -> str:
+        """
+        Returns the system prompt stored under `key` (usually the agent class),
+        building it with `build()` on first use. The indentation of the prompt
+        templates is stripped, and the result never changes afterwards.
+        """
+        with self._lock:
+            prompt = self._prompts.get(key)
+        if prompt is None:
+            lines = (line.strip() for line in build().splitlines())
+            prompt = _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+            with self._lock:
+                prompt = self._prompts.setdefault(key, prompt)
+        return prompt
+
+class ProfileStore:
+    """
+    An LRU-bounded map from the hash of a raw profile to its CompiledProfile.
+    It is safe to share a single instance between threads.
+    """
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or settings.PROFILE_STORE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, business_profile: str) -> CompiledProfile:
+        key = content_hash(business_profile)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is not None:
+                self._profiles.move_to_end(key)
+                self.hits += 1
+                return profile
+            self.misses += 1
+        # Compile outside the lock; if two threads race, the first one stored wins.
+        profile = CompiledProfile(business_profile)
+        with self._lock:
+            profile = self._profiles.setdefault(key, profile)
+            self._profiles.move_to_end(key)
+            while len(self._profiles) > self.max_entries:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._profiles), "hits": self.hits, "misses": self.misses}
+
+_profile_files = {}  # path -> ((mtime_ns, size), text)
+_profile_files_lock = threading.Lock()
+
+def load_profile_file(path: str) -> str:
+    """
+    Returns the text of a profile file, reading it from disk only when it has
+    changed since the last call. Raises FileNotFoundError like `open`.
+    """
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _profile_files_lock:
+        cached = _profile_files.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    with _profile_files_lock:
+        _profile_files[path] = (version, text)
+    return text
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_profile_store() -> ProfileStore:
+    """
+    Returns the process-wide profile store configured from settings.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ProfileStore()
+        return _default_store
@@ -0,0 +1,137 @@
+# src/core/rate_limit.py
+#
+# Client-side scheduling for LLM requests: token buckets that keep us under the
+# provider's requests-per-minute and tokens-per-minute quotas, and a retry
+# policy with exponential backoff and jitter for 429 and 5xx responses.
+
+import json
+import time
+import random
+import asyncio
+from src.config import settings
+from src.core.deadlines import time_budget
+
+class TokenBucket:
+    """
+    A token bucket that refills continuously at `rate_per_minute`. Callers
+    that need more tokens than are available wait (in FIFO order) until the
+    bucket has refilled enough.
+    """
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1):
+        # A single request larger than the bucket would wait forever, so cap it.
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate_per_second)
+
+class RateLimiter:
+    """
+    Combines a requests-per-minute bucket and a tokens-per-minute bucket.
+    Either limit can be disabled by passing None (or 0).
+    """
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    async def acquire(self, tokens: int = 0):
+        if self.request_bucket:
+            await self.request_bucket.acquire(1)
+        if self.token_bucket and tokens:
+            await self.token_bucket.acquire(tokens)
+
+def estimate_request_tokens(params: dict, completion_reserve: int = 512) -> int:
+    """
+    A cheap estimate of the tokens a chat-completion request will consume:
+    roughly four characters per prompt token plus a reserve for the completion.
+    """
+    prompt = json.dumps([params.get("messages", []), params.get("tools", [])], default=str)
+    return len(prompt) // 4 + completion_reserve
+
+def is_retryable_error(error: Exception) -> bool:
+    """Rate limits (429), server errors (5xx) and connection problems are retried."""
+    # Imported here: errors only come from requests, by which time openai is loaded.
+    import openai
+
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, openai.APIConnectionError)
+
+class RetryPolicy:
+    """
+    Retries retryable API errors with exponential backoff and full jitter.
+    A `Retry-After` header sent by the server takes precedence.
+    """
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_attempts=settings.LLM_MAX_ATTEMPTS,
+            base_delay=settings.LLM_RETRY_BASE_DELAY,
+            max_delay=settings.LLM_RETRY_MAX_DELAY,
+        )
+
+    def backoff_delay(self, attempt: int, error: Exception = None) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(self.max_delay, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _next_delay(self, attempt: int, error: Exception) -> float:
+        """
+        Returns how long to wait before the next attempt, or re-raises `error`
+        when it should not be retried: it is not retryable, it was the last
+        attempt, or the wait would outlast the deadline of the current goal.
+        """
+        if attempt == self.max_attempts - 1 or not is_retryable_error(error):
+            raise error
+        delay = self.backoff_delay(attempt, error)
+        budget = time_budget()
+        if budget is not None and delay >= budget:
+            raise error
+        print(f"⏳ Retryable API error ({error.__class__.__name__}), retrying in {delay:.1f}s...")
+        return delay
+
+    async def run(self, make_call):
+        """
+        Awaits `make_call()` until it succeeds, the error is not retryable,
+        or `max_attempts` is reached.
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                return await make_call()
+            except Exception as error:
+                delay = self._next_delay(attempt, error)
+            await asyncio.sleep(delay)
+
+    def run_sync(self, call):
+        """The blocking version of `run`, for the sync client."""
+        for attempt in range(self.max_attempts):
+            try:
+                return call()
+            except Exception as error:
+                delay = self._next_delay(attempt, error)
+            time.sleep(delay)
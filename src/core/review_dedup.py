@@ -0,0 +1,211 @@
+# src/core/review_dedup.py
+#
+# Near-duplicate detection for review texts. Every review is reduced to a
+# MinHash signature of its character shingles; signatures are bucketed with
+# locality-sensitive hashing (LSH bands), so finding the reviews similar to a
+# new one only compares it with the few reviews that share a band. The index
+# is kept in memory and persisted per business in the review store, so
+# clusters carry over between runs: a review close enough to one that already
+# has a reply reuses that reply instead of a new completion.
+
+import re
+import zlib
+import random
+import threading
+from array import array
+from src.config import settings
+from src.core.review_ingest import author_name
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional; without it signatures are computed with plain Python.
+    np = None
+
+_PRIME = (1 << 31) - 1
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+def normalize_text(text: str) -> str:
+    return _NON_WORD.sub(" ", (text or "").lower()).strip()
+
+def shingles(text: str, size: int = 4) -> set:
+    """The set of overlapping `size`-character substrings of the normalized text."""
+    text = normalize_text(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[index:index + size] for index in range(len(text) - size + 1)}
+
+def choose_bands(num_perm: int, threshold: float) -> tuple:
+    """
+    Picks (bands, rows) with bands * rows == num_perm whose LSH threshold,
+    (1 / bands) ** (1 / rows), is closest to the requested similarity.
+    """
+    options = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+def sentiment_bucket(review: dict) -> int:
+    """Reviews only cluster with reviews of the same sentiment: 1 positive, 0 neutral/negative, -1 unknown."""
+    rating = review.get("rating")
+    if not isinstance(rating, (int, float)):
+        return -1
+    return 1 if rating >= 4 else 0
+
+def _drop_name(reply: str, name: str) -> str:
+    """Removes a name from a reply together with the comma or space that set it off."""
+    name = re.escape(name)
+    # "Dear Ann," -> "Hello,"
+    reply = re.sub(rf"\bDear\s+{name}\b", "Hello", reply)
+    # "Thank you, Ann!" -> "Thank you!"
+    reply = re.sub(rf",\s*\b{name}\b", "", reply)
+    # "Ann, thank you!" -> "Thank you!"
+    reply = re.sub(
+        rf"(^|[.!?]\s+)\b{name}\b[,!]?\s+(\w)", lambda match: match.group(1) + match.group(2).upper(), reply,
+        flags=re.MULTILINE,
+    )
+    # "Hi Ann!" -> "Hi!"
+    return re.sub(rf"\s*\b{name}\b", "", reply)
+
+def adapt_reply(source_review: dict, reply: str, target_review: dict) -> str:
+    """
+    Reuses a reply drafted for `source_review` for a near-duplicate review by
+    swapping the reviewer's name, or dropping it when the target review has
+    no real author.
+    """
+    source_author = author_name(source_review)
+    target_author = author_name(target_review)
+    if not source_author:
+        return reply
+    if not target_author:
+        return _drop_name(reply, source_author)
+    # A function replacement, so the name is inserted as-is (a backslash in it is not a group reference).
+    return re.sub(rf"\b{re.escape(source_author)}\b", lambda _: target_author, reply)
+
+class NearDuplicateIndex:
+    """
+    A MinHash/LSH index over the review texts of one business. `cluster`
+    assigns each incoming review to a similar indexed review (or to an
+    earlier review of the same batch); `add` indexes reviews once they have a
+    reply. Two reviews are near-duplicates when their estimated Jaccard
+    similarity is at least `threshold`.
+    """
+    def __init__(self, review_store, business_id: str, threshold: float = None, num_perm: int = None,
+                 shingle_size: int = 4, seed: int = 1):
+        self.review_store = review_store
+        self.business_id = business_id
+        self.threshold = threshold if threshold is not None else settings.REVIEW_DEDUP_THRESHOLD
+        self.num_perm = num_perm or settings.REVIEW_DEDUP_NUM_PERM
+        self.shingle_size = shingle_size
+        self.bands, self.rows = choose_bands(self.num_perm, self.threshold)
+        rng = random.Random(seed)
+        self._a = [rng.randrange(1, _PRIME) for _ in range(self.num_perm)]
+        self._b = [rng.randrange(0, _PRIME) for _ in range(self.num_perm)]
+        self._signatures = {}  # review_id -> (sentiment bucket, signature)
+        self._buckets = {}  # (band, band values) -> [review_id, ...]
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.duplicates = 0
+
+    def signature(self, text: str):
+        """The MinHash signature of a text as a tuple of ints, or None for an empty text."""
+        hashes = [zlib.crc32(shingle.encode("utf-8")) % _PRIME for shingle in shingles(text, self.shingle_size)]
+        if not hashes:
+            return None
+        if np is not None:
+            values = np.array(hashes, dtype=np.uint64)
+            a = np.array(self._a, dtype=np.uint64)[:, None]
+            b = np.array(self._b, dtype=np.uint64)[:, None]
+            return tuple(((a * values + b) % _PRIME).min(axis=1).tolist())
+        return tuple(min((a * value + b) % _PRIME for value in hashes) for a, b in zip(self._a, self._b))
+
+    @staticmethod
+    def similarity(first: tuple, second: tuple) -> float:
+        """Estimated Jaccard similarity: the share of equal MinHash values."""
+        return sum(x == y for x, y in zip(first, second)) / len(first)
+
+    def _band_keys(self, signature: tuple):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def _insert(self, buckets: dict, review_id: str, signature: tuple):
+        for key in self._band_keys(signature):
+            buckets.setdefault(key, []).append(review_id)
+
+    def _ensure_loaded(self):
+        """Loads the persisted signatures of this business. Called with `_lock` held."""
+        if self._loaded:
+            return
+        for review_id, bucket, blob in self.review_store.load_signatures(self.business_id):
+            signature = tuple(array("I", blob))
+            if len(signature) != self.num_perm:
+                continue
+            self._signatures[review_id] = (bucket, signature)
+            self._insert(self._buckets, review_id, signature)
+        self._loaded = True
+
+    def _best_match(self, bucket: int, signature: tuple, buckets: dict, signatures: dict):
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(buckets.get(key, ()))
+        best_id, best_similarity = None, self.threshold
+        for candidate in candidates:
+            candidate_bucket, candidate_signature = signatures[candidate]
+            if candidate_bucket != bucket:
+                continue
+            similarity = self.similarity(signature, candidate_signature)
+            if similarity >= best_similarity:
+                best_id, best_similarity = candidate, similarity
+        return best_id
+
+    def cluster(self, reviews: list) -> list:
+        """
+        Returns one (match_id, signature) pair per review. `match_id` is the id
+        of an indexed review, or of an earlier review in `reviews`, that the
+        review duplicates; it is None for a review that starts a new cluster.
+        """
+        results = []
+        batch_buckets, batch_signatures = {}, {}
+        with self._lock:
+            self._ensure_loaded()
+            for review in reviews:
+                self.queries += 1
+                signature = self.signature(review.get("comment", ""))
+                if signature is None:
+                    results.append((None, None))
+                    continue
+                bucket = sentiment_bucket(review)
+                match = self._best_match(bucket, signature, self._buckets, self._signatures)
+                if match is None:
+                    match = self._best_match(bucket, signature, batch_buckets, batch_signatures)
+                if match is None:
+                    batch_signatures[review["id"]] = (bucket, signature)
+                    self._insert(batch_buckets, review["id"], signature)
+                else:
+                    self.duplicates += 1
+                results.append((match, signature))
+        return results
+
+    def add(self, entries: list):
+        """Indexes and persists (review, signature) pairs of reviews that now have a reply."""
+        rows = []
+        with self._lock:
+            self._ensure_loaded()
+            for review, signature in entries:
+                if signature is None or review["id"] in self._signatures:
+                    continue
+                bucket = sentiment_bucket(review)
+                self._signatures[review["id"]] = (bucket, signature)
+                self._insert(self._buckets, review["id"], signature)
+                rows.append((review["id"], bucket, array("I", signature).tobytes()))
+        if rows:
+            self.review_store.save_signatures(self.business_id, rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "indexed": len(self._signatures),
+                "queries": self.queries,
+                "duplicates": self.duplicates,
+                "dedup_rate": round(self.duplicates / self.queries, 4) if self.queries else 0.0,
+            }
@@ -0,0 +1,111 @@
+# src/core/review_ingest.py
+#
+# Streaming access to review exports (JSONL, one review per line). Files are
+# read line by line and handed out in batches, so a multi-GB export never has
+# to fit in memory. Exports from different platforms name their fields
+# differently; every review is normalized to the shape used by the
+# reviews tool: id, created_at, author, rating, comment.
+
+import os
+import json
+import heapq
+
+_TEXT_FIELDS = ("comment", "text", "body", "content", "review")
+_AUTHOR_FIELDS = ("author", "user", "name", "reviewer")
+_RATING_FIELDS = ("rating", "stars", "score")
+_ID_FIELDS = ("id", "review_id")
+_CREATED_FIELDS = ("created_at", "date", "time", "timestamp")
+
+# The author of reviews exported without one.
+ANONYMOUS_AUTHOR = "anonymous"
+
+def _first(entry: dict, fields: tuple):
+    for field in fields:
+        value = entry.get(field)
+        if value not in (None, ""):
+            return value
+    return None
+
+def normalize_review(entry: dict, fallback_id: str) -> dict:
+    """
+    Maps one exported review onto the standard fields. The rating becomes a
+    number (None when missing or invalid), and reviews without an id get
+    `fallback_id`, which must be stable across runs (e.g. file and line).
+    """
+    rating = _first(entry, _RATING_FIELDS)
+    try:
+        rating = float(rating) if rating is not None else None
+    except (TypeError, ValueError):
+        rating = None
+    if rating is not None and rating.is_integer():
+        rating = int(rating)
+    return {
+        "id": str(_first(entry, _ID_FIELDS) or fallback_id),
+        "created_at": str(_first(entry, _CREATED_FIELDS) or ""),
+        "author": str(_first(entry, _AUTHOR_FIELDS) or ANONYMOUS_AUTHOR),
+        "rating": rating,
+        "comment": str(_first(entry, _TEXT_FIELDS) or ""),
+    }
+
+def author_name(review: dict):
+    """The reviewer's name, or None for reviews without a (real) author."""
+    author = str(review.get("author") or "").strip()
+    return author if author and author.lower() != ANONYMOUS_AUTHOR else None
+
+def iter_reviews(path: str, stats: dict = None):
+    """
+    Yields normalized reviews from a JSONL export, one line at a time. Blank
+    lines are ignored; malformed lines are skipped and counted in
+    `stats["malformed"]` when a stats dict is given.
+    """
+    source = os.path.basename(path)
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                entry = None
+            if not isinstance(entry, dict):
+                if stats is not None:
+                    stats["malformed"] = stats.get("malformed", 0) + 1
+                continue
+            yield normalize_review(entry, fallback_id=f"{source}:{line_number}")
+
+def iter_review_batches(path: str, batch_size: int, stats: dict = None):
+    """Yields lists of up to `batch_size` normalized reviews, in file order."""
+    batch = []
+    for review in iter_reviews(path, stats):
+        batch.append(review)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def review_key(review: dict) -> tuple:
+    """The order of reviews: by creation time, then by id for reviews created at the same time."""
+    return (review["created_at"], review["id"])
+
+def is_after(review: dict, since: str = None, after_id: str = None) -> bool:
+    """
+    True if the review comes after the cursor (`since`, `after_id`): the
+    `created_at` and `id` of the last review already read. Without `after_id`,
+    only reviews created strictly after `since` count.
+    """
+    if after_id is not None:
+        return review_key(review) > (since or "", after_id)
+    return not since or review["created_at"] > since
+
+def read_review_page(path: str, since: str = None, after_id: str = None, limit: int = None) -> list:
+    """
+    Returns the reviews of an export after the cursor (`since`, `after_id`),
+    oldest first, and at most `limit` of them. The file is streamed, so only
+    `limit` reviews are held in memory however large the export is.
+    """
+    reviews = (review for review in iter_reviews(path) if is_after(review, since, after_id))
+    if limit:
+        return heapq.nsmallest(limit, reviews, key=review_key)
+    return sorted(reviews, key=review_key)
@@ -0,0 +1,180 @@
+# src/core/review_store.py
+#
+# Persistent state for incremental review processing. For every business the
+# store keeps a watermark (the `created_at` and `id` of the newest review that
+# has been fully handled) and the reply drafted for each review. The ReputationAgent
+# only sends reviews above the watermark that have no stored draft to the LLM.
+# Businesses are identified by CompiledProfile.business_id (src/core/profiles.py).
+# It also persists the MinHash signatures of the near-duplicate index
+# (see src/core/review_dedup.py).
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from src.config import settings
+
+class ReviewStore:
+    """
+    An SQLite-backed store of per-business watermarks and drafted replies.
+    It is safe to share a single instance between threads.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS watermarks (
+                business_id TEXT PRIMARY KEY,
+                since TEXT NOT NULL,
+                after_id TEXT NOT NULL DEFAULT '',
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS drafts (
+                business_id TEXT NOT NULL,
+                review_id TEXT NOT NULL,
+                review TEXT NOT NULL,
+                reply TEXT NOT NULL,
+                review_created_at TEXT NOT NULL,
+                drafted_at REAL NOT NULL,
+                PRIMARY KEY (business_id, review_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_drafts_created ON drafts (business_id, review_created_at);
+            CREATE TABLE IF NOT EXISTS review_signatures (
+                business_id TEXT NOT NULL,
+                review_id TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                signature BLOB NOT NULL,
+                PRIMARY KEY (business_id, review_id)
+            );
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(watermarks)")}
+        if "after_id" not in columns:
+            # Stores created before watermarks had an id. An empty id re-reads the
+            # reviews created at the old watermark, which are skipped as already drafted.
+            self._conn.execute("ALTER TABLE watermarks ADD COLUMN after_id TEXT NOT NULL DEFAULT ''")
+        self._conn.commit()
+
+    def get_watermark(self, business_id: str):
+        """
+        Returns the (created_at, id) of the newest fully handled review, or
+        None. They are the `since` and `after_id` cursor of the reviews tool.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT since, after_id FROM watermarks WHERE business_id = ?", (business_id,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def set_watermark(self, business_id: str, since: str, after_id: str):
+        """Moves the watermark forward. It never moves backwards."""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO watermarks (business_id, since, after_id, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(business_id) DO UPDATE SET
+                    since = excluded.since, after_id = excluded.after_id, updated_at = excluded.updated_at
+                WHERE (excluded.since, excluded.after_id) > (watermarks.since, watermarks.after_id)
+                """,
+                (business_id, since, after_id, time.time()),
+            )
+            self._conn.commit()
+
+    def get_drafts(self, business_id: str, review_ids: list) -> dict:
+        """Returns {review_id: reply} for the given reviews that already have a draft."""
+        drafts = {}
+        # Queried in slices to stay below SQLite's limit on bound parameters.
+        for start in range(0, len(review_ids), 500):
+            ids = review_ids[start:start + 500]
+            placeholders = ",".join("?" for _ in ids)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT review_id, reply FROM drafts WHERE business_id = ? AND review_id IN ({placeholders})",
+                    (business_id, *ids),
+                ).fetchall()
+            drafts.update(rows)
+        return drafts
+
+    def get_drafted_reviews(self, business_id: str, review_ids: list) -> dict:
+        """Returns {review_id: (review, reply)} for the given reviews that have a draft."""
+        drafts = {}
+        for start in range(0, len(review_ids), 500):
+            ids = review_ids[start:start + 500]
+            placeholders = ",".join("?" for _ in ids)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT review_id, review, reply FROM drafts WHERE business_id = ? AND review_id IN ({placeholders})",
+                    (business_id, *ids),
+                ).fetchall()
+            drafts.update((review_id, (json.loads(review), reply)) for review_id, review, reply in rows)
+        return drafts
+
+    def save_drafts(self, business_id: str, drafts: list):
+        """Stores (review, reply) pairs; a review drafted again replaces its old reply."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT OR REPLACE INTO drafts (business_id, review_id, review, reply, review_created_at, drafted_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (business_id, review["id"], json.dumps(review), reply, review["created_at"], now)
+                    for review, reply in drafts
+                ],
+            )
+            self._conn.commit()
+
+    def recent_drafts(self, business_id: str, limit: int) -> list:
+        """Returns up to `limit` (review, reply) pairs, newest review first."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT review, reply FROM drafts WHERE business_id = ?
+                ORDER BY review_created_at DESC, review_id DESC LIMIT ?
+                """,
+                (business_id, limit),
+            ).fetchall()
+        return [(json.loads(review), reply) for review, reply in rows]
+
+    def load_signatures(self, business_id: str) -> list:
+        """Returns every (review_id, bucket, signature) row stored for a business."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT review_id, bucket, signature FROM review_signatures WHERE business_id = ?", (business_id,)
+            ).fetchall()
+
+    def save_signatures(self, business_id: str, rows: list):
+        """Stores (review_id, bucket, signature) rows of the near-duplicate index."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO review_signatures (business_id, review_id, bucket, signature) VALUES (?, ?, ?, ?)",
+                [(business_id, review_id, bucket, signature) for review_id, bucket, signature in rows],
+            )
+            self._conn.commit()
+
+    def reset(self, business_id: str):
+        """Forgets the watermark and drafts of one business, so every review is drafted again."""
+        with self._lock:
+            self._conn.execute("DELETE FROM watermarks WHERE business_id = ?", (business_id,))
+            self._conn.execute("DELETE FROM drafts WHERE business_id = ?", (business_id,))
+            self._conn.execute("DELETE FROM review_signatures WHERE business_id = ?", (business_id,))
+            self._conn.commit()
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_review_store() -> ReviewStore:
+    """
+    Returns the process-wide review store configured from settings.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ReviewStore(settings.REVIEW_STORE_PATH)
+        return _default_store
@@ -0,0 +1,142 @@
+# src/core/review_triage.py
+#
+# A cheap local pass that decides which reviews actually need the LLM.
+# Every review is reduced to a few numeric features (rating, counts of
+# positive, negative and contrast words, questions, length), and the features
+# of a whole batch are scored at once. Short, clearly positive, high-rating
+# reviews get a templated thank-you reply; everything ambiguous or negative is
+# left for the model.
+
+import re
+import zlib
+from typing import NamedTuple
+from src.config import settings
+from src.core.review_ingest import author_name
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is in requirements.txt, but the triage keeps working without it:
+    # the same scores are then computed review by review in plain Python.
+    np = None
+
+POSITIVE_WORDS = frozenset({
+    "amazing", "awesome", "best", "cozy", "delicious", "excellent", "fantastic", "favorite", "favourite",
+    "friendly", "great", "good", "love", "loved", "lovely", "nice", "perfect", "recommend", "tasty",
+    "wonderful", "fresh", "helpful", "welcoming", "beautiful", "incredible", "outstanding", "enjoyed",
+})
+NEGATIVE_WORDS = frozenset({
+    "bad", "awful", "terrible", "horrible", "rude", "dirty", "stale", "cold", "lukewarm", "slow", "worst",
+    "disappointed", "disappointing", "overpriced", "expensive", "never", "not", "no", "wrong", "sick",
+    "refund", "complaint", "poor", "mediocre", "bland", "burnt", "crowded", "noisy", "wait", "waited",
+})
+# Words that usually introduce a complaint inside an otherwise positive review.
+CONTRAST_WORDS = frozenset({"but", "however", "although", "though", "except", "unfortunately", "wish"})
+
+_WORD_PATTERN = re.compile(r"[a-z']+")
+
+def review_features(review: dict) -> tuple:
+    """Returns (rating, positive, negative, contrast, questions, words) for one review."""
+    text = review.get("comment") or ""
+    words = _WORD_PATTERN.findall(text.lower())
+    rating = review.get("rating")
+    return (
+        float(rating) if isinstance(rating, (int, float)) else float("nan"),
+        sum(word in POSITIVE_WORDS for word in words),
+        sum(word in NEGATIVE_WORDS for word in words),
+        sum(word in CONTRAST_WORDS for word in words),
+        text.count("?"),
+        len(words),
+    )
+
+def batch_features(reviews: list):
+    """
+    Returns the features of a whole batch as an (n, 6) NumPy array, one row
+    per review with the columns of `review_features`. The words of all
+    reviews are matched against the lexicons in one pass. Requires NumPy.
+    """
+    texts = [review.get("comment") or "" for review in reviews]
+    words = [_WORD_PATTERN.findall(text.lower()) for text in texts]
+    counts = np.array([len(review_words) for review_words in words], dtype=np.int64)
+    # Every word of the batch, and the row of the review it came from.
+    all_words = np.array([word for review_words in words for word in review_words], dtype=str)
+    rows = np.repeat(np.arange(len(reviews)), counts)
+
+    def lexicon_counts(lexicon):
+        return np.bincount(rows[np.isin(all_words, sorted(lexicon))], minlength=len(reviews))
+
+    ratings = [review.get("rating") for review in reviews]
+    return np.column_stack((
+        np.array([rating if isinstance(rating, (int, float)) else np.nan for rating in ratings], dtype=float),
+        lexicon_counts(POSITIVE_WORDS),
+        lexicon_counts(NEGATIVE_WORDS),
+        lexicon_counts(CONTRAST_WORDS),
+        np.char.count(np.array(texts, dtype=str), "?"),
+        counts,
+    )).astype(float)
+
+class TriageResult(NamedTuple):
+    templated: list  # reviews that get a templated reply
+    needs_llm: list  # reviews that are drafted by the model
+
+class ReviewTriage:
+    """
+    Splits reviews into a templated-reply path and an LLM path. A review is
+    "simple" when its rating is at least `min_rating`, it has no negative or
+    contrast words and no questions, it has at most `max_words` words, and its
+    score (rating plus positive words) reaches `min_score`.
+    """
+    def __init__(self, min_rating: float = None, max_words: int = None, min_score: float = None):
+        self.min_rating = min_rating if min_rating is not None else settings.REVIEW_TRIAGE_MIN_RATING
+        self.max_words = max_words if max_words is not None else settings.REVIEW_TRIAGE_MAX_WORDS
+        self.min_score = min_score if min_score is not None else settings.REVIEW_TRIAGE_MIN_SCORE
+
+    def simple_mask(self, reviews: list) -> list:
+        """Returns one boolean per review: True if it can get a templated reply."""
+        if not reviews:
+            return []
+        if np is not None:
+            rating, positive, negative, contrast, questions, words = batch_features(reviews).T
+            score = (np.nan_to_num(rating) - 3.0) / 2.0 + 0.25 * positive
+            mask = (
+                (np.nan_to_num(rating) >= self.min_rating)
+                & (negative == 0) & (contrast == 0) & (questions == 0)
+                & (words <= self.max_words) & (score >= self.min_score)
+            )
+            return mask.tolist()
+        mask = []
+        for rating, positive, negative, contrast, questions, words in map(review_features, reviews):
+            rating = 0.0 if rating != rating else rating
+            score = (rating - 3.0) / 2.0 + 0.25 * positive
+            mask.append(
+                rating >= self.min_rating and not negative and not contrast and not questions
+                and words <= self.max_words and score >= self.min_score
+            )
+        return mask
+
+    def split(self, reviews: list) -> TriageResult:
+        templated, needs_llm = [], []
+        for review, simple in zip(reviews, self.simple_mask(reviews)):
+            (templated if simple else needs_llm).append(review)
+        return TriageResult(templated, needs_llm)
+
+# The replies do not assume a kind of business, since they are sent for every
+# tenant. Each template has a version for reviews without an author name.
+TEMPLATES = (
+    ("Thank you so much, {author}! We're thrilled you had a great experience with {business}.",
+     "Thank you so much! We're thrilled you had a great experience with {business}."),
+    ("{author}, this made our day! Thank you for the kind words about {business}. We hope to see you again soon.",
+     "This made our day! Thank you for the kind words about {business}. We hope to see you again soon."),
+    ("Thanks for the wonderful review, {author}! Feedback like yours means a lot to our whole team.",
+     "Thanks for the wonderful review! Feedback like yours means a lot to our whole team."),
+)
+
+def templated_reply(review: dict, business_name: str = None) -> str:
+    """
+    Returns a thank-you reply for a simple positive review. The template is
+    picked from the review id, so the same review always gets the same reply.
+    """
+    named, anonymous = TEMPLATES[zlib.crc32(review["id"].encode("utf-8")) % len(TEMPLATES)]
+    author = author_name(review)
+    template = named if author else anonymous
+    return template.format(author=author, business=business_name or "our team")
@@ -0,0 +1,301 @@
+# src/core/tracing.py
+#
+# Lightweight structured tracing for agent runs. Code wraps units of work in
+# spans (`with get_tracer().span("tool_call", tool=name):`); finished spans are
+# handed to exporters. The current span lives in a contextvar, so nesting is
+# tracked correctly across threads and asyncio tasks without any global state
+# such as redirected stdout.
+#
+# Two exporters ship with the module:
+#   - JsonLinesExporter writes one JSON object per finished span.
+#   - PrometheusExporter aggregates spans into counters and histograms and
+#     renders them in the Prometheus text exposition format.
+
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from src.config import settings
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_span_collector = contextvars.ContextVar("span_collector", default=None)
+
+class Span:
+    """A timed unit of work with free-form attributes."""
+    def __init__(self, name: str, parent=None, attributes: dict = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.start_time = time.time()
+        self._start_counter = time.perf_counter()
+        self.duration_seconds = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, name: str, amount: float = 1):
+        """Adds to a numeric attribute, e.g. `span.add("prompt_tokens", 120)`."""
+        self.attributes[name] = self.attributes.get(name, 0) + amount
+
+    def end(self):
+        self.duration_seconds = time.perf_counter() - self._start_counter
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round((self.duration_seconds or 0) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+def current_span():
+    return _current_span.get()
+
+def annotate(**attributes):
+    """Sets attributes on the current span, if there is one."""
+    span = _current_span.get()
+    if span is not None:
+        span.set(**attributes)
+
+def annotate_add(name: str, amount: float = 1):
+    """Adds to a numeric attribute of the current span, if there is one."""
+    span = _current_span.get()
+    if span is not None:
+        span.add(name, amount)
+
+class Tracer:
+    """Creates spans and passes every finished span to the exporters."""
+    def __init__(self, exporters: list = None):
+        self.exporters = list(exporters or [])
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = _current_span.get()
+        span = Span(name, parent=parent, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except (GeneratorExit, KeyboardInterrupt):
+            span.status = "cancelled"
+            raise
+        except BaseException as error:
+            # asyncio.CancelledError is a BaseException as well.
+            span.status = "cancelled" if error.__class__.__name__ == "CancelledError" else "error"
+            span.set(error=f"{error.__class__.__name__}: {error}")
+            raise
+        finally:
+            span.end()
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # A generator was resumed from another context; restore the parent directly.
+                _current_span.set(parent)
+            self._export(span)
+
+    def _export(self, span: Span):
+        collector = _span_collector.get()
+        if collector is not None:
+            collector.append(span)
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as error:
+                print(f"Tracer: exporter {exporter.__class__.__name__} failed: {error}")
+
+    @contextmanager
+    def capture(self):
+        """
+        Collects every span finished inside this block (including spans from
+        threads and tasks started from it) into a list, e.g. to show one run's
+        trace in the UI.
+        """
+        spans = []
+        token = _span_collector.set(spans)
+        try:
+            yield spans
+        finally:
+            _span_collector.reset(token)
+
+class JsonLinesExporter:
+    """Appends each finished span as one JSON line to a file."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+# Histogram buckets in seconds, from a cached completion to a slow agent run.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+ITERATION_BUCKETS = (1, 2, 3, 4, 5, 10)
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by metric name and labels."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # name -> {labels: value}
+        self._histograms = {}  # name -> (buckets, {labels: [bucket_counts, sum, count]})
+        self._help = {}
+
+    @staticmethod
+    def _labels_key(labels: dict) -> tuple:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, amount: float = 1, help_text: str = "", **labels):
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            series = self._counters.setdefault(name, {})
+            key = self._labels_key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, buckets: tuple = DURATION_BUCKETS, help_text: str = "", **labels):
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            bucket_bounds, series = self._histograms.setdefault(name, (buckets, {}))
+            key = self._labels_key(labels)
+            state = series.setdefault(key, [[0] * len(bucket_bounds), 0.0, 0])
+            for index, bound in enumerate(bucket_bounds):
+                if value <= bound:
+                    state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @staticmethod
+    def _format_labels(key: tuple, extra: tuple = ()) -> str:
+        pairs = list(key) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+    def render_prometheus(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if self._help.get(name):
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{self._format_labels(key)} {value:g}")
+            for name, (bounds, series) in sorted(self._histograms.items()):
+                if self._help.get(name):
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, (bucket_counts, total, count) in sorted(series.items()):
+                    for bound, bucket_count in zip(bounds, bucket_counts):
+                        lines.append(f"{name}_bucket{self._format_labels(key, (('le', f'{bound:g}'),))} {bucket_count}")
+                    lines.append(f"{name}_bucket{self._format_labels(key, (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{self._format_labels(key)} {total:g}")
+                    lines.append(f"{name}_count{self._format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+class PrometheusExporter:
+    """
+    Turns finished spans into metrics: span durations, LLM token usage,
+    completion/search cache hits, tool calls and iterations per agent run.
+    """
+    def __init__(self, registry: MetricsRegistry = None):
+        self.registry = registry or MetricsRegistry()
+
+    def export(self, span: Span):
+        attributes = span.attributes
+        agent = attributes.get("agent", "")
+        self.registry.observe("agent_span_duration_seconds", span.duration_seconds or 0,
+                              help_text="Wall time of agent spans.", span=span.name, agent=agent)
+        self.registry.inc("agent_spans_total", help_text="Finished spans by status.",
+                          span=span.name, agent=agent, status=span.status)
+        if span.name == "llm_iteration":
+            for kind in ("prompt", "completion"):
+                tokens = attributes.get(f"{kind}_tokens")
+                if tokens:
+                    self.registry.inc("agent_llm_tokens_total", tokens, help_text="Tokens reported in response.usage.",
+                                      agent=agent, kind=kind)
+            if "cache_hit" in attributes:
+                outcome = "hit" if attributes["cache_hit"] else "miss"
+                self.registry.inc("agent_completion_cache_requests_total", help_text="Completion cache lookups.",
+                                  agent=agent, outcome=outcome)
+        elif span.name == "tool_call":
+            self.registry.inc("agent_tool_calls_total", help_text="Tool calls by tool and status.",
+                              tool=attributes.get("tool", ""), status=span.status)
+            if "search_cache" in attributes:
+                self.registry.inc("agent_search_cache_requests_total", help_text="Web search cache lookups.",
+                                  outcome=attributes["search_cache"])
+        elif span.name == "agent_run" and "iterations" in attributes:
+            self.registry.observe("agent_run_iterations", attributes["iterations"], buckets=ITERATION_BUCKETS,
+                                  help_text="LLM iterations per agent run.", agent=agent)
+
+    def render(self) -> str:
+        return self.registry.render_prometheus()
+
+    def write_textfile(self, path: str):
+        """
+        Writes the metrics to a file atomically, e.g. for the node_exporter
+        textfile collector.
+        """
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temporary_path, path)
+
+def format_spans(spans: list) -> str:
+    """
+    Renders captured spans as an indented text tree (children under their
+    parent, in start order) for display in logs or the UI.
+    """
+    by_parent = {}
+    span_ids = {span.span_id for span in spans}
+    for span in sorted(spans, key=lambda span: span.start_time):
+        parent_id = span.parent_id if span.parent_id in span_ids else None
+        by_parent.setdefault(parent_id, []).append(span)
+
+    lines = []
+    def walk(parent_id, depth):
+        for span in by_parent.get(parent_id, []):
+            details = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+            status = "" if span.status == "ok" else f" [{span.status}]"
+            lines.append(f"{'  ' * depth}{span.name} {(span.duration_seconds or 0) * 1000:.0f}ms{status} {details}".rstrip())
+            walk(span.span_id, depth + 1)
+    walk(None, 0)
+    return "\n".join(lines)
+
+_tracer = None
+_prometheus_exporter = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """
+    Returns the process-wide tracer. Metrics are always aggregated in memory;
+    spans are also written to TRACE_JSONL_PATH when that setting is set.
+    """
+    global _tracer, _prometheus_exporter
+    with _tracer_lock:
+        if _tracer is None:
+            _prometheus_exporter = PrometheusExporter()
+            exporters = [_prometheus_exporter]
+            if settings.TRACE_JSONL_PATH:
+                exporters.append(JsonLinesExporter(settings.TRACE_JSONL_PATH))
+            _tracer = Tracer(exporters)
+        return _tracer
+
+def get_prometheus_exporter() -> PrometheusExporter:
+    get_tracer()
+    return _prometheus_exporter
@@ -2,6 +2,8 @@
 
 import os
 import sys
+import argparse
+import datetime
 from dotenv import load_dotenv
 
 # --- This import handling block is still required ---
@@ -11,17 +13,83 @@ sys.path.insert(0, project_root)
 
 # We now import the ManagerAgent, our new single point of entry.
 from src.agents.manager_agent import ManagerAgent
+from src.core.batch_runner import run_batch
+from src.core.profiles import load_profile_file
+from src.core.tracing import get_prometheus_exporter
+from src.config import settings
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the multi-agent marketing system.")
+    parser.add_argument("--batch", metavar="GOALS_JSONL",
+                        help="Run every goal in this JSONL file instead of the built-in demo goals.")
+    parser.add_argument("--output", metavar="RESULTS_JSONL", default="batch_results.jsonl",
+                        help="Where batch results are appended. Re-running with the same file resumes the batch.")
+    parser.add_argument("--workers", type=int, help="Number of goals that run concurrently.")
+    parser.add_argument("--rpm", type=float, help="LLM requests-per-minute limit.")
+    parser.add_argument("--tpm", type=float, help="LLM tokens-per-minute limit.")
+    parser.add_argument("--reviews", metavar="REVIEWS_JSONL",
+                        help="Draft replies for every review in this JSONL export.")
+    parser.add_argument("--reviews-output", metavar="REPLIES_JSONL", default="review_replies.jsonl",
+                        help="Where drafted review replies are appended.")
+    parser.add_argument("--calendar", metavar="DAYS", type=int,
+                        help="Plan and queue a content calendar of one post per day for this many days.")
+    parser.add_argument("--calendar-start", metavar="YYYY-MM-DD", type=datetime.date.fromisoformat,
+                        help="First day of the calendar (default: today).")
+    parser.add_argument("--calendar-theme", default="", help="Optional theme for the calendar posts.")
+    return parser.parse_args()
+
+def write_metrics():
+    """Writes the run's metrics in Prometheus text format if a path is configured."""
+    if settings.METRICS_TEXTFILE_PATH:
+        get_prometheus_exporter().write_textfile(settings.METRICS_TEXTFILE_PATH)
+        print(f"Metrics written to {settings.METRICS_TEXTFILE_PATH}")
 
 def main():
     """
     The main function to run the multi-agent marketing system.
     """
     load_dotenv()
+    args = parse_args()
     
     print("--- Multi-Agent Marketing System Initialized ---")
     
+    # Load the default business profile from the data folder
+    business_profile = load_profile_file(os.path.join(project_root, "data", "business_profile.txt"))
+
+    if args.batch:
+        run_batch(
+            args.batch,
+            args.output,
+            default_profile=business_profile,
+            workers=args.workers,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+        )
+        write_metrics()
+        return
+
+    # The specialists are imported only by the mode that needs them.
+    if args.reviews:
+        from src.agents.reputation_agent import ReputationAgent
+
+        agent = ReputationAgent(business_profile=business_profile)
+        stats = agent.process_export(args.reviews, output_path=args.reviews_output)
+        print(f"Review export done: {stats}")
+        write_metrics()
+        return
+
+    if args.calendar:
+        from src.agents.social_media_agent import SocialMediaAgent
+
+        agent = SocialMediaAgent(business_profile=business_profile)
+        posts = agent.plan_calendar(start_date=args.calendar_start, days=args.calendar, theme=args.calendar_theme)
+        for post in posts:
+            print(f"\n[{post['date']}] {post['caption']}\nIMAGE: {post['image_description']}")
+        write_metrics()
+        return
+
     # Instantiate the Manager Agent
-    manager = ManagerAgent()
+    manager = ManagerAgent(business_profile=business_profile)
     
     # A list of different goals to test the manager's delegation logic
     test_goals = [
@@ -32,12 +100,14 @@ def main():
     # Loop through the goals and let the manager delegate each one
     for i, goal in enumerate(test_goals):
         print(f"\n--- Starting Task {i+1}/{len(test_goals)} ---")
-        # The main interaction point is now the manager's delegate_task method
-        final_result = manager.delegate_task(goal)
-        
+        # The manager streams the specialist's final answer token by token,
+        # so we print each token as soon as it arrives.
         print(f"\n--- Task {i+1} Final Output ---")
-        print(final_result)
-        print("---------------------------------")
+        for token in manager.delegate_task_stream(goal):
+            print(token, end="", flush=True)
+        print("\n---------------------------------")
+
+    write_metrics()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
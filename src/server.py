@@ -0,0 +1,237 @@
+# src/server.py
+#
+# A headless HTTP service in front of the ManagerAgent, built on asyncio
+# streams from the standard library. Goals are submitted as jobs, run by the
+# JobService (src/core/job_service.py) and kept in an SQLite job store, so
+# accepted jobs survive a restart.
+#
+#   POST /jobs               {"goal": "...", "business_profile": "...", "timeout": 60}
+#                            -> 202 with the job; 429 with Retry-After when the queue is full
+#   GET  /jobs/<id>          the job's status (and the answer so far while it runs)
+#   GET  /jobs/<id>/result   the answer of a finished job; 409 while it is queued or running
+#   POST /jobs/<id>/cancel   cancels a queued or running job
+#   GET  /health             queue and worker statistics
+#   GET  /metrics            Prometheus text format
+#
+# Run it with `python src/server.py [--host HOST] [--port PORT]`.
+
+import os
+import re
+import sys
+import hmac
+import json
+import signal
+import asyncio
+import argparse
+from http import HTTPStatus
+from dotenv import load_dotenv
+
+# --- This import handling block is still required ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+# ----------------------------------------------------
+
+from src.config import settings
+from src.core import job_store as states
+from src.core.job_service import JobService, QueueFull
+from src.core.profiles import load_profile_file
+from src.core.tracing import get_prometheus_exporter
+
+MAX_BODY_BYTES = 1 << 20
+MAX_HEADER_LINES = 100
+KEEP_ALIVE_SECONDS = 30
+
+_JOB_PATH = re.compile(r"^/jobs/([0-9a-f]{16})(/result|/cancel)?$")
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str, headers: dict = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+def job_view(job: dict, include_result: bool = False) -> dict:
+    """The public representation of a job."""
+    view = {key: job[key] for key in ("id", "status", "goal", "timeout", "created_at", "started_at", "finished_at")}
+    if job["error"]:
+        view["error"] = job["error"]
+    if include_result or job["status"] == states.RUNNING:
+        view["result"] = job["result"] or ""
+    return view
+
+class ServiceApp:
+    """Maps HTTP requests to JobService calls."""
+    def __init__(self, service: JobService, default_profile: str = None, api_token: str = None):
+        self.service = service
+        self.default_profile = default_profile
+        self.api_token = api_token if api_token is not None else settings.SERVICE_API_TOKEN
+
+    def _authorize(self, headers: dict):
+        if not self.api_token:
+            return
+        supplied = headers.get("authorization", "")
+        if not hmac.compare_digest(supplied.encode("utf-8"), f"Bearer {self.api_token}".encode("utf-8")):
+            raise HttpError(401, "A valid bearer token is required.", {"WWW-Authenticate": "Bearer"})
+
+    def _submit(self, body: bytes):
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            raise HttpError(400, "The request body must be a JSON object.")
+        goal = payload.get("goal") if isinstance(payload, dict) else None
+        if not isinstance(goal, str) or not goal.strip():
+            raise HttpError(400, "'goal' must be a non-empty string.")
+        business_profile = payload.get("business_profile") or self.default_profile
+        if not isinstance(business_profile, str) or not business_profile.strip():
+            raise HttpError(400, "'business_profile' must be a non-empty string.")
+        timeout = payload.get("timeout")
+        if timeout is not None and (not isinstance(timeout, (int, float)) or timeout < 0):
+            raise HttpError(400, "'timeout' must be a non-negative number of seconds.")
+        try:
+            job = self.service.submit(goal.strip(), business_profile, timeout=timeout)
+        except QueueFull as error:
+            raise HttpError(429, str(error), {"Retry-After": str(error.retry_after)})
+        return 202, job_view(job), {"Location": f"/jobs/{job['id']}"}
+
+    def _job(self, method: str, job_id: str, action: str):
+        if action == "/cancel":
+            if method != "POST":
+                raise HttpError(405, "Use POST to cancel a job.", {"Allow": "POST"})
+            job = self.service.cancel(job_id)
+        else:
+            if method != "GET":
+                raise HttpError(405, "Use GET to read a job.", {"Allow": "GET"})
+            job = self.service.get(job_id)
+        if job is None:
+            raise HttpError(404, f"Unknown job '{job_id}'.")
+        if action == "/result":
+            if job["status"] not in states.FINISHED_STATUSES:
+                raise HttpError(409, f"Job '{job_id}' is still {job['status']}.")
+            return 200, job_view(job, include_result=True), {}
+        return 200, job_view(job), {}
+
+    async def handle(self, method: str, path: str, headers: dict, body: bytes):
+        """Returns (status, payload, extra headers); a str payload is sent as plain text."""
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            return 200, dict(self.service.stats(), status="ok"), {}
+        self._authorize(headers)
+        if path == "/metrics":
+            return 200, get_prometheus_exporter().render(), {}
+        if path == "/jobs":
+            if method != "POST":
+                raise HttpError(405, "Use POST to submit a job.", {"Allow": "POST"})
+            return self._submit(body)
+        match = _JOB_PATH.match(path)
+        if match:
+            return self._job(method, match.group(1), match.group(2))
+        raise HttpError(404, f"No route for {path}.")
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader):
+        """Returns (method, path, version, headers, body), or None when the client closed the connection."""
+        request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_SECONDS)
+        if not request_line:
+            return None
+        try:
+            method, path, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "Malformed request line.")
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HttpError(431, "Too many headers.")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length.")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "The request body is too large.")
+        body = await reader.readexactly(length) if length > 0 else b""
+        return method.upper(), path, version, headers, body
+
+    @staticmethod
+    def _response(status: int, payload, headers: dict, keep_alive: bool) -> bytes:
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        lines = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves the requests of one connection, keeping it open between requests (HTTP/1.1)."""
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, version, headers, body = request
+                    keep_alive = (headers.get("connection", "").lower() != "close"
+                                  if version == "HTTP/1.1" else headers.get("connection", "").lower() == "keep-alive")
+                    status, payload, extra_headers = await self.handle(method, path, headers, body)
+                except HttpError as error:
+                    status, payload, extra_headers = error.status, {"error": str(error)}, error.headers
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as error:
+                    print(f"Server: request failed: {error.__class__.__name__}: {error}")
+                    status, payload, extra_headers = 500, {"error": "Internal server error."}, {}
+                writer.write(self._response(status, payload, extra_headers, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+async def serve(host: str, port: int, service: JobService, default_profile: str = None):
+    """Runs the service until SIGINT/SIGTERM, then stops accepting requests and stops the workers."""
+    await service.start()
+    app = ServiceApp(service, default_profile=default_profile)
+    server = await asyncio.start_server(app.serve_connection, host, port)
+    print(f"Server: listening on http://{host}:{port}")
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows: Ctrl+C still raises KeyboardInterrupt.
+            pass
+    async with server:
+        await stop.wait()
+    print("Server: shutting down; running jobs will resume on the next start.")
+    await service.stop()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="HTTP job service for the multi-agent marketing system.")
+    parser.add_argument("--host", default=settings.SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVICE_PORT)
+    parser.add_argument("--workers", type=int, help="Number of goals that run concurrently.")
+    parser.add_argument("--max-queue", type=int, help="Queued jobs above which submissions get a 429.")
+    return parser.parse_args()
+
+def main():
+    load_dotenv()
+    args = parse_args()
+    # Jobs without a `business_profile` use the default profile from the data folder.
+    default_profile = load_profile_file(os.path.join(project_root, "data", "business_profile.txt"))
+    service = JobService(workers=args.workers, max_queue=args.max_queue)
+    asyncio.run(serve(args.host, args.port, service, default_profile=default_profile))
+
+if __name__ == "__main__":
+    main()
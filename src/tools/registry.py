@@ -0,0 +1,31 @@
+# src/tools/registry.py
+#
+# Where each tool lives. Agents refer to their tools by name and the tool
+# modules (and the client libraries they depend on, such as tavily) are only
+# imported when a tool is first used, so a goal only pays for the tools of the
+# agent that handles it. Every tool module exports the function `<name>` and
+# its schema `<name>_schema`.
+
+import importlib
+
+TOOL_MODULES = {
+    "search_local_trends": "src.tools.web_search",
+    "post_to_instagram": "src.tools.social_api",
+    "get_latest_reviews": "src.tools.reviews_api",
+}
+
+def _tool_module(name: str):
+    try:
+        module_name = TOOL_MODULES[name]
+    except KeyError:
+        raise KeyError(f"Unknown tool '{name}'. Register it in TOOL_MODULES.") from None
+    # import_module caches modules in sys.modules, so this is cheap after the first call.
+    return importlib.import_module(module_name)
+
+def get_tool(name: str):
+    """The function of a tool."""
+    return getattr(_tool_module(name), name)
+
+def get_tool_schema(name: str) -> dict:
+    """The JSON schema of a tool, as sent to the LLM."""
+    return getattr(_tool_module(name), f"{name}_schema")
@@ -1,6 +1,73 @@
 # src/tools/reviews_api.py
+import json
+from src.config import settings
+from src.core.review_ingest import is_after, read_review_page, review_key
 
-def get_latest_reviews() -> str:
+# A hardcoded list of reviews to simulate a real API response. Every review has
+# a stable id and an ISO-8601 creation timestamp, like the real platforms.
+MOCK_REVIEWS = [
+    {
+        "id": "rev-0001",
+        "created_at": "2025-06-02T09:15:00Z",
+        "author": "Alice",
+        "rating": 5,
+        "comment": "The 'Volcano' Dark Roast is absolutely life-changing! The atmosphere is so cozy and the staff are incredibly friendly. My new favorite spot!"
+    },
+    {
+        "id": "rev-0002",
+        "created_at": "2025-06-03T14:40:00Z",
+        "author": "Bob",
+        "rating": 4,
+        "comment": "Great coffee and fast Wi-Fi. It can get a little crowded during peak hours, but it's a solid place to work from."
+    },
+    {
+        "id": "rev-0003",
+        "created_at": "2025-06-04T08:05:00Z",
+        "author": "Charlie",
+        "rating": 2,
+        "comment": "The pastries were a bit stale and my latte was lukewarm. Was really hoping for more. Disappointed."
+    }
+]
+
+def fetch_reviews(since: str = None, after_id: str = None, limit: int = None) -> list:
+    """
+    Returns reviews as a list of dicts, oldest first (by `created_at`, then
+    `id`), and at most `limit` of them. Only reviews created strictly after
+    `since` are included; with `after_id`, reviews created at `since` with a
+    larger id are included too. To read the next page, pass the `created_at`
+    and `id` of the last review as `since` and `after_id`.
+    When REVIEWS_SOURCE_PATH points to a JSONL export, it is read instead of
+    the sample reviews.
+    """
+    if settings.REVIEWS_SOURCE_PATH:
+        return read_review_page(settings.REVIEWS_SOURCE_PATH, since=since, after_id=after_id, limit=limit)
+    reviews = [review for review in sorted(MOCK_REVIEWS, key=review_key) if is_after(review, since, after_id)]
+    if limit:
+        reviews = reviews[:limit]
+    return [dict(review) for review in reviews]
+
+def iter_review_pages(since: str = None, after_id: str = None, page_size: int = None):
+    """
+    Yields every review after the cursor (`since`, `after_id`) in pages of up
+    to `page_size`, oldest first. The sample reviews are paged like an API
+    would page them. An export (REVIEWS_SOURCE_PATH) is streamed once and
+    sorted, rather than streamed again from the start for every page.
+    """
+    if settings.REVIEWS_SOURCE_PATH:
+        reviews = read_review_page(settings.REVIEWS_SOURCE_PATH, since=since, after_id=after_id)
+        size = page_size or len(reviews) or 1
+        for start in range(0, len(reviews), size):
+            yield reviews[start:start + size]
+        return
+    while True:
+        page = fetch_reviews(since=since, after_id=after_id, limit=page_size)
+        if page:
+            yield page
+        if not page_size or len(page) < page_size:
+            return
+        since, after_id = page[-1]["created_at"], page[-1]["id"]
+
+def get_latest_reviews(since: str = None, after_id: str = None, limit: int = None) -> str:
     """
     Retrieves the latest customer reviews from a mock database.
 
@@ -9,39 +76,25 @@ def get_latest_reviews() -> str:
     JSON string of sample reviews to simulate the API response. This allows
     the Reputation Agent to have consistent data to work with.
 
+    Args:
+        since: Optional ISO-8601 timestamp; only reviews created after it are returned.
+        after_id: Optional id of the last review of the previous page; reviews created
+            at `since` with a larger id are returned as well.
+        limit: Optional maximum number of reviews to return.
+
     Returns:
-        A JSON string containing a list of recent customer reviews.
+        A JSON string containing a list of customer reviews, oldest first.
     """
     print("--- MOCK REVIEWS API ---")
     print("   - Fetching latest customer reviews...")
-    
-    # A hardcoded list of reviews to simulate a real API response.
-    mock_reviews = [
-        {
-            "author": "Alice",
-            "rating": 5,
-            "comment": "The 'Volcano' Dark Roast is absolutely life-changing! The atmosphere is so cozy and the staff are incredibly friendly. My new favorite spot!"
-        },
-        {
-            "author": "Bob",
-            "rating": 4,
-            "comment": "Great coffee and fast Wi-Fi. It can get a little crowded during peak hours, but it's a solid place to work from."
-        },
-        {
-            "author": "Charlie",
-            "rating": 2,
-            "comment": "The pastries were a bit stale and my latte was lukewarm. Was really hoping for more. Disappointed."
-        }
-    ]
-    
+
     # We return the reviews as a JSON string, as this is a common
     # format for API responses and easy for the LLM to parse.
-    import json
-    return json.dumps(mock_reviews)
+    return json.dumps(fetch_reviews(since=since, after_id=after_id, limit=limit))
 
 # --- Tool Schema ---
-# This describes the tool to the LLM. Notice it has no parameters,
-# as it always fetches the latest reviews by default.
+# This describes the tool to the LLM. Both parameters are optional; without
+# them the tool fetches every available review.
 get_latest_reviews_schema = {
     "type": "function",
     "function": {
@@ -49,8 +102,21 @@ get_latest_reviews_schema = {
         "description": "Fetches the most recent customer reviews for the business from online platforms.",
         "parameters": {
             "type": "object",
-            "properties": {}, # No parameters needed for this tool
+            "properties": {
+                "since": {
+                    "type": "string",
+                    "description": "Only return reviews created after this ISO-8601 timestamp, e.g. '2025-06-01T00:00:00Z'."
+                },
+                "after_id": {
+                    "type": "string",
+                    "description": "To read the next page, the id of the last review of the previous page (pass its created_at as 'since')."
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "The maximum number of reviews to return."
+                }
+            },
             "required": []
         }
     }
-}
\ No newline at end of file
+}
@@ -1,3 +1,7 @@
+import json
+import uuid
+import threading
+
 def post_to_instagram(caption: str, image_description: str) -> str:
     """
     Posts content to a mock Instagram account.
@@ -44,4 +48,70 @@ post_to_instagram_schema = {
             "required": ["caption", "image_description"]
         }
     }
-}
\ No newline at end of file
+}
+# --- Bulk Scheduling ---
+# Content calendars queue many posts at once. The mock queue keeps them in
+# memory; a real implementation would create scheduled media containers.
+_queue_lock = threading.Lock()
+_scheduled_posts = []
+
+_JSON_TYPES = {"string": str, "integer": int, "number": (int, float), "boolean": bool, "object": dict, "array": list}
+
+def validate_tool_arguments(schema: dict, arguments: dict) -> list:
+    """
+    Checks arguments against a tool schema's parameters: required fields,
+    basic JSON types and non-empty strings. Returns a list of problems
+    (empty when the arguments are valid).
+    """
+    parameters = schema["function"].get("parameters", {})
+    properties = parameters.get("properties", {})
+    if not isinstance(arguments, dict):
+        return ["arguments must be an object"]
+    errors = [f"'{name}' is required" for name in parameters.get("required", []) if name not in arguments]
+    for name, value in arguments.items():
+        expected = properties.get(name, {}).get("type")
+        if name not in properties or expected not in _JSON_TYPES:
+            continue
+        if not isinstance(value, _JSON_TYPES[expected]) or (expected == "string" and not value.strip()):
+            errors.append(f"'{name}' must be a non-empty {expected}")
+    return errors
+
+def queue_instagram_posts(posts: list) -> str:
+    """
+    Queues several Instagram posts for publishing in a single call.
+
+    Every post is a dict with the `post_to_instagram` arguments (`caption`,
+    `image_description`) and a `scheduled_for` date. Invalid posts are
+    rejected individually; the rest are queued.
+
+    Returns:
+        A JSON string with the queued posts (`index` in `posts` and queue
+        `id`) and the rejected ones (`index`, `scheduled_for` and `errors`).
+    """
+    queued, rejected, indexes = [], [], []
+    for index, post in enumerate(posts):
+        arguments = {key: post.get(key) for key in ("caption", "image_description") if key in post}
+        errors = validate_tool_arguments(post_to_instagram_schema, arguments)
+        if errors:
+            rejected.append({"index": index, "scheduled_for": post.get("scheduled_for"), "errors": errors})
+            continue
+        queued.append(dict(arguments, id=uuid.uuid4().hex[:12], scheduled_for=post.get("scheduled_for")))
+        indexes.append(index)
+    with _queue_lock:
+        _scheduled_posts.extend(queued)
+
+    print("--- MOCK INSTAGRAM QUEUE ---")
+    for post in queued:
+        print(f"{post['scheduled_for']}: {post['caption'][:60]}")
+    print(f"Queued {len(queued)} post(s), rejected {len(rejected)}.")
+    print("----------------------------")
+
+    return json.dumps({
+        "queued": [{"index": index, "id": post["id"]} for index, post in zip(indexes, queued)],
+        "rejected": rejected,
+    })
+
+def get_scheduled_posts() -> list:
+    """Returns a copy of the mock posting queue."""
+    with _queue_lock:
+        return list(_scheduled_posts)
@@ -1,40 +1,177 @@
 import os
-from tavily import TavilyClient
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from src.config import settings
+from src.core.tracing import annotate
+
+# --- Shared Client, Result Cache and In-Flight Requests ---
+# A single TavilyClient (or requests.Session for the "http" backend) is reused
+# across calls so its connections are pooled. Results are cached in memory for a short time,
+# and concurrent identical searches share one upstream request.
+_client = None
+_client_api_key = None
+_http_session = None
+_lock = threading.Lock()
+_result_cache = OrderedDict()  # cache_key -> (expires_at, result)
+_in_flight = {}  # cache_key -> Future
+_stats = {"hits": 0, "misses": 0, "deduplicated": 0, "upstream_calls": 0, "errors": 0}
+
+def _get_client(api_key: str):
+    """Returns the pooled TavilyClient, creating it on first use or when the key changes."""
+    # The HTTP client libraries are imported on first use to keep start-up fast.
+    from tavily import TavilyClient
+
+    global _client, _client_api_key
+    with _lock:
+        if _client is None or _client_api_key != api_key:
+            _client = TavilyClient(api_key=api_key)
+            _client_api_key = api_key
+        return _client
+
+def _get_http_session():
+    import requests
+
+    global _http_session
+    with _lock:
+        if _http_session is None:
+            _http_session = requests.Session()
+        return _http_session
+
+def _search_upstream(api_key: str, query: str, search_depth: str, include_answer: bool) -> dict:
+    """
+    Sends one search to the configured backend and returns the raw response.
+    The "http" backend speaks Tavily's REST API, so it works against Tavily
+    itself or against a local stand-in server.
+    """
+    if settings.SEARCH_BACKEND == "http":
+        response = _get_http_session().post(
+            f"{settings.SEARCH_BASE_URL.rstrip('/')}/search",
+            json={"api_key": api_key, "query": query, "search_depth": search_depth, "include_answer": include_answer},
+            timeout=settings.SEARCH_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        return response.json()
+    tavily = _get_client(api_key)
+    return tavily.search(query=query, search_depth=search_depth, include_answer=include_answer)
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def _cache_key(query: str, search_depth: str, include_answer: bool) -> tuple:
+    return (_normalize_query(query), search_depth, include_answer)
+
+def _cache_get(cache_key: tuple):
+    """Returns a cached result or None. Must be called with `_lock` held."""
+    entry = _result_cache.get(cache_key)
+    if entry is None:
+        return None
+    expires_at, result = entry
+    if expires_at < time.monotonic():
+        del _result_cache[cache_key]
+        return None
+    _result_cache.move_to_end(cache_key)
+    return result
+
+def _cache_put(cache_key: tuple, result: str):
+    """Stores a result, evicting the least recently used entries. Must be called with `_lock` held."""
+    _result_cache[cache_key] = (time.monotonic() + settings.SEARCH_CACHE_TTL_SECONDS, result)
+    _result_cache.move_to_end(cache_key)
+    while len(_result_cache) > settings.SEARCH_CACHE_MAX_ENTRIES:
+        _result_cache.popitem(last=False)
+
+def get_search_cache_stats() -> dict:
+    """
+    Returns the counters of the search cache. A search is a hit, a miss, or
+    `deduplicated` when it waited for an identical search already in flight,
+    so the three add up to the number of searches. `upstream_calls` is the
+    number of requests actually sent to Tavily; everything else was saved quota.
+    """
+    with _lock:
+        return dict(_stats, entries=len(_result_cache), in_flight=len(_in_flight))
+
+def clear_search_cache():
+    """Empties the result cache and resets the counters."""
+    with _lock:
+        _result_cache.clear()
+        for name in _stats:
+            _stats[name] = 0
 
 def search_local_trends(query: str) -> str:
     """
     Searches the web for local trends, news, or events based on a query.
-    
+
     This tool is used by the AI agent to gather real-time information to make its
     marketing content more relevant and timely. For example, it can search for
     "local events in [city] this weekend" or "trending coffee shop aesthetics 2025".
 
+    Identical queries (ignoring case and whitespace) are answered from a TTL'd
+    cache, and concurrent identical queries wait for a single upstream request.
+
     Args:
         query: The search query string.
 
     Returns:
         A string containing the summarized search results, or an error message.
     """
+    search_depth = "basic"
+    include_answer = True
+    cache_key = _cache_key(query, search_depth, include_answer)
+
+    with _lock:
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            _stats["hits"] += 1
+            annotate(search_cache="hit")
+            return cached
+        pending = _in_flight.get(cache_key)
+        if pending is None:
+            _stats["misses"] += 1
+            pending = Future()
+            _in_flight[cache_key] = pending
+            is_owner = True
+        else:
+            _stats["deduplicated"] += 1
+            is_owner = False
+    annotate(search_cache="miss" if is_owner else "deduplicated")
+
+    if not is_owner:
+        # Another caller is already searching for the same thing; share its result.
+        return pending.result()
+
+    result = None
     try:
         # Retrieve the API key from environment variables
         api_key = os.getenv("TAVILY_API_KEY")
         if not api_key:
-            return "Error: TAVILY_API_KEY is not set."
-
-        # Initialize the Tavily client
-        tavily = TavilyClient(api_key=api_key)
+            result = "Error: TAVILY_API_KEY is not set."
+            return result
 
         # Perform the search and get a simple, summarized result
         # include_answer=True gives a direct answer to the query if possible.
-        response = tavily.search(query=query, search_depth="basic", include_answer=True)
-        
+        with _lock:
+            _stats["upstream_calls"] += 1
+        response = _search_upstream(api_key, query, search_depth, include_answer)
+
         # We'll return the 'answer' if it exists, otherwise the main results.
         # This gives the LLM the most concise information to work with.
-        return response.get('answer', str(response['results']))
+        result = response.get('answer') or str(response['results'])
+        with _lock:
+            _cache_put(cache_key, result)
+        return result
 
     except Exception as e:
-        # Return a structured error message if the search fails
-        return f"Error performing search for query '{query}': {e}"
+        # Return a structured error message if the search fails (errors are not cached)
+        result = f"Error performing search for query '{query}': {e}"
+        with _lock:
+            _stats["errors"] += 1
+        return result
+
+    finally:
+        with _lock:
+            _in_flight.pop(cache_key, None)
+        pending.set_result(result)
 
 # --- Tool Schema ---
 # This dictionary describes the tool to the LLM. It explains what the tool
@@ -56,4 +193,4 @@ search_local_trends_schema = {
             "required": ["query"]
         }
     }
-}
\ No newline at end of file
+}
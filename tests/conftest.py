@@ -0,0 +1,20 @@
+# tests/conftest.py
+#
+# Makes `src` importable from the project root and keeps the tests away from
+# the real endpoint and the on-disk caches: settings are read from the
+# environment when src.config is first imported, so they are set here.
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+os.environ.setdefault("QWEN_API_KEY", "test-key")
+os.environ["QWEN_BASE_URL"] = "http://127.0.0.1:9/v1"
+os.environ["COMPLETION_CACHE_MODE"] = "off"
+os.environ["REVIEW_STORE_PATH"] = ":memory:"
+os.environ["REVIEWS_SOURCE_PATH"] = ""
+os.environ["TRACE_JSONL_PATH"] = ""
+os.environ["LLM_HEDGING"] = "off"
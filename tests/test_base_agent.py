@@ -0,0 +1,199 @@
+import time
+import asyncio
+from types import SimpleNamespace
+import httpx
+import openai
+from src.agents.base_agent import BaseAgent
+from src.core import rate_limit
+from src.core.rate_limit import RetryPolicy
+from src.core.completion_cache import CompletionCache
+from src.core.tracing import Tracer
+
+LOOKUP_SCHEMA = {
+    "type": "function",
+    "function": {"name": "lookup", "description": "Looks something up.",
+                 "parameters": {"type": "object", "properties": {"query": {"type": "string"}}}},
+}
+
+class LookupAgent(BaseAgent):
+    agent_label = "Lookup Agent"
+
+    def build_system_prompt(self) -> str:
+        return "You answer questions."
+
+def make_agent(create=None, async_create=None, **options) -> LookupAgent:
+    agent = LookupAgent("business_name: Harbor Books", completion_cache=CompletionCache(":memory:", mode="off"),
+                        tracer=Tracer(), **options)
+    agent.tools = [LOOKUP_SCHEMA]
+    agent.tool_dispatcher = {"lookup": lambda query: f"result for {query}"}
+    agent._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    if async_create:
+        agent._async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=async_create)))
+    return agent
+
+def completion(content: str = None, tool_calls: list = None):
+    message = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+def lookup_call(call_id: str, query: str):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name="lookup", arguments=f'{{"query": "{query}"}}'))
+
+class SlowLookup:
+    """An async tool that takes `seconds` and records how many calls were running at once."""
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.active = 0
+        self.max_active = 0
+
+    async def lookup(self, query: str) -> str:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.seconds)
+        finally:
+            self.active -= 1
+        return f"result for {query}"
+
+def run_with_tool_calls(calls: int, **options):
+    """Runs a goal whose first turn asks for `calls` lookups at once. Returns (tool, answer, seconds)."""
+    responses = iter([
+        completion(tool_calls=[lookup_call(f"call-{index}", f"q{index}") for index in range(calls)]),
+        completion("Done."),
+    ])
+
+    async def create(**params):
+        return next(responses)
+
+    agent = make_agent(async_create=create, **options)
+    tool = SlowLookup(0.2)
+    agent.tool_dispatcher = {"lookup": tool.lookup}
+    started = time.monotonic()
+    answer = asyncio.run(agent.arun("Look everything up."))
+    return tool, answer, time.monotonic() - started
+
+def test_tool_calls_of_one_turn_run_concurrently():
+    tool, answer, seconds = run_with_tool_calls(2, max_tool_concurrency=4)
+    assert answer == "Done."
+    assert tool.max_active == 2
+    assert seconds < 0.35
+
+def test_tool_concurrency_is_capped():
+    tool, answer, seconds = run_with_tool_calls(4, max_tool_concurrency=2)
+    assert answer == "Done."
+    assert tool.max_active == 2
+    assert seconds >= 0.4
+
+def test_blocking_tools_run_in_worker_threads():
+    responses = iter([completion(tool_calls=[lookup_call("call-1", "a"), lookup_call("call-2", "b")]), completion("Done.")])
+
+    async def create(**params):
+        return next(responses)
+
+    agent = make_agent(async_create=create, max_tool_concurrency=4)
+    agent.tool_dispatcher = {"lookup": lambda query: time.sleep(0.2) or f"result for {query}"}
+    started = time.monotonic()
+    assert asyncio.run(agent.arun("Look everything up.")) == "Done."
+    assert time.monotonic() - started < 0.35
+
+def text_chunk(text: str, finish_reason: str = None):
+    delta = SimpleNamespace(content=text, tool_calls=None)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)], usage=None)
+
+def tool_chunk(arguments: str, call_id: str = None, name: str = None):
+    tool_call = SimpleNamespace(index=0, id=call_id, function=SimpleNamespace(name=name, arguments=arguments))
+    delta = SimpleNamespace(content=None, tool_calls=[tool_call])
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None)], usage=None)
+
+LONG_ANSWER = ["Here is your post for this week. " + "Fresh pastries every morning! " * 5, "#coffee ", "#portland"]
+
+# The first turn writes a preamble before calling the tool, the second one answers.
+TURNS = [
+    [text_chunk("Let me look "), text_chunk("that up."), tool_chunk('{"query": ', "call-1", "lookup"), tool_chunk('"x"}')],
+    [text_chunk(part) for part in LONG_ANSWER],
+]
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    def close(self):
+        pass
+
+class AsyncFakeStream(FakeStream):
+    async def close(self):
+        pass
+
+def test_stream_hides_the_preamble_and_streams_the_answer():
+    turns = iter(TURNS)
+    agent = make_agent(lambda **params: FakeStream(next(turns)))
+    pieces = list(agent.stream_run("Write a post."))
+    assert "".join(pieces) == "".join(LONG_ANSWER)
+    assert len(pieces) == len(LONG_ANSWER)
+
+def test_async_stream_hides_the_preamble_and_streams_the_answer():
+    turns = iter(TURNS)
+
+    async def create(**params):
+        return AsyncFakeStream(next(turns))
+
+    agent = make_agent(async_create=create)
+
+    async def collect():
+        return [piece async for piece in agent.astream_run("Write a post.")]
+
+    pieces = asyncio.run(collect())
+    assert "".join(pieces) == "".join(LONG_ANSWER)
+    assert len(pieces) == len(LONG_ANSWER)
+
+def test_a_short_answer_is_released_when_the_turn_stops():
+    shown = []
+
+    def chunks():
+        yield text_chunk("The answer ")
+        yield text_chunk("is 42.", finish_reason="stop")
+        # The usage chunk comes after the text has been shown.
+        assert shown == ["The answer is 42."]
+        yield SimpleNamespace(choices=[], usage=None)
+
+    class Stream(FakeStream):
+        def __iter__(self):
+            return chunks()
+
+    agent = make_agent(lambda **params: Stream(None))
+    for piece in agent.stream_run("What is the answer?"):
+        shown.append(piece)
+    assert shown == ["The answer is 42."]
+
+def test_text_streams_right_away_without_tools():
+    agent = make_agent(lambda **params: FakeStream([text_chunk("The answer "), text_chunk("is 42.")]))
+    agent.tools = []
+    assert list(agent.stream_run("What is the answer?")) == ["The answer ", "is 42."]
+
+def rate_limited():
+    request = httpx.Request("POST", "http://test/v1/chat/completions")
+    return openai.RateLimitError("slow down", response=httpx.Response(429, request=request), body=None)
+
+def test_sync_requests_are_retried(monkeypatch):
+    monkeypatch.setattr(rate_limit.time, "sleep", lambda seconds: None)
+    calls = []
+
+    def create(**params):
+        calls.append(params)
+        if len(calls) < 3:
+            raise rate_limited()
+        return completion("Done.")
+
+    agent = make_agent(create, retry_policy=RetryPolicy(max_attempts=5))
+    assert agent.run("Anything?") == "Done."
+    assert len(calls) == 3
+
+def test_the_async_client_leaves_retries_to_the_policy():
+    assert make_agent(retry_policy=RetryPolicy()).async_client.max_retries == 0
+    assert make_agent().async_client.max_retries > 0
@@ -0,0 +1,55 @@
+import json
+import asyncio
+import pytest
+from src.core.batch_runner import BatchRunner, load_completed_ids, load_goals
+from src.core.deadlines import mark_cut_short
+
+class FakeManager:
+    def __init__(self):
+        self.goals = []
+
+    async def adelegate_task(self, goal):
+        self.goals.append(goal)
+        await asyncio.sleep(0)
+        if "slow" in goal:
+            mark_cut_short()
+            return "partial answer"
+        if "fail" in goal:
+            raise RuntimeError("the model is down")
+        return f"done: {goal}"
+
+def test_load_goals(tmp_path):
+    (tmp_path / "profile.txt").write_text("business_name: Harbor Books", encoding="utf-8")
+    path = tmp_path / "goals.jsonl"
+    path.write_text(
+        '{"goal": "a", "profile_path": "profile.txt"}\n\n{"id": "custom", "goal": "b"}\n', encoding="utf-8"
+    )
+    first, second = load_goals(str(path), default_profile="business_name: Default")
+    assert first["profile"] == "business_name: Harbor Books" and len(first["id"]) == 16
+    assert second == {"id": "custom", "goal": "b", "profile": "business_name: Default"}
+    assert load_goals(str(path), default_profile="business_name: Default")[0]["id"] == first["id"]
+    with pytest.raises(ValueError):
+        load_goals(str(path))
+
+def test_load_completed_ids_ignores_a_torn_last_line(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text('{"id": "a", "status": "ok"}\n{"id": "b", "status": "partial"}\n{"id": "c", "sta', encoding="utf-8")
+    assert load_completed_ids(str(path)) == {"a"}
+    assert load_completed_ids(str(tmp_path / "missing.jsonl")) == set()
+
+def test_partial_results_are_run_again(tmp_path, monkeypatch):
+    manager = FakeManager()
+    runner = BatchRunner(workers=2, requests_per_minute=6000, tokens_per_minute=0)
+    monkeypatch.setattr(runner, "_manager_for", lambda profile: manager)
+    goals = [{"id": name, "goal": name, "profile": "p"} for name in ("quick", "slow", "fail")]
+    output = str(tmp_path / "out.jsonl")
+
+    summary = asyncio.run(runner.arun(goals, output))
+    assert summary == {"total": 3, "skipped": 0, "ok": 1, "partial": 1, "error": 1}
+    records = {record["id"]: record for record in map(json.loads, open(output, encoding="utf-8"))}
+    assert records["slow"]["result"] == "partial answer"
+    assert records["fail"]["error"] == "RuntimeError: the model is down"
+
+    summary = asyncio.run(runner.arun(goals, output))
+    assert summary["skipped"] == 1
+    assert manager.goals.count("quick") == 1 and manager.goals.count("slow") == 2
@@ -0,0 +1,74 @@
+import time
+import pytest
+from src.core.completion_cache import CompletionCache, CompletionCacheMiss, make_cache_key
+
+def test_cache_key_ignores_dict_order():
+    first = make_cache_key("m", [{"role": "user", "content": "hi"}], temperature=0.2, top_p=1)
+    second = make_cache_key("m", [{"content": "hi", "role": "user"}], top_p=1, temperature=0.2)
+    assert first == second
+    assert first != make_cache_key("m", [{"role": "user", "content": "hello"}], temperature=0.2, top_p=1)
+
+def test_on_mode_reads_and_writes():
+    cache = CompletionCache(":memory:", mode="on")
+    assert cache.get("k") is None
+    cache.put("k", {"message": "hello"})
+    assert cache.get("k") == {"message": "hello"}
+    assert cache.stats() == {"mode": "on", "hits": 1, "misses": 1, "entries": 1}
+
+def test_off_mode_stores_nothing():
+    cache = CompletionCache(":memory:", mode="off")
+    cache.put("k", {"message": "hello"})
+    assert cache.get("k") is None
+    assert not cache.enabled
+    assert cache.stats()["entries"] == 0
+
+def test_record_mode_writes_but_never_reads():
+    cache = CompletionCache(":memory:", mode="record")
+    cache.put("k", {"message": "hello"})
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 1
+
+def test_replay_mode_raises_on_miss():
+    cache = CompletionCache(":memory:", mode="replay")
+    with pytest.raises(CompletionCacheMiss):
+        cache.get("missing")
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        CompletionCache(":memory:", mode="sometimes")
+
+def test_expired_entries_are_dropped_on_read(monkeypatch):
+    cache = CompletionCache(":memory:", mode="on", ttl_seconds=10)
+    cache.put("k", {"message": "old"})
+    later = time.time() + 11
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+def test_replay_mode_ignores_the_ttl(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    CompletionCache(path, mode="record", ttl_seconds=10).put("k", {"message": "fixture"})
+    later = time.time() + 3600
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert CompletionCache(path, mode="replay", ttl_seconds=10).get("k") == {"message": "fixture"}
+
+def test_purge_expired(monkeypatch):
+    cache = CompletionCache(":memory:", mode="on", ttl_seconds=10)
+    cache.put("old", {})
+    later = time.time() + 11
+    monkeypatch.setattr(time, "time", lambda: later)
+    cache.put("new", {})
+    assert cache.purge_expired() == 1
+    assert cache.get("new") == {}
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(time, "time", lambda: next(clock))
+    cache = CompletionCache(":memory:", mode="on", ttl_seconds=0, max_entries=2)
+    cache.put("a", {"value": "a"})
+    cache.put("b", {"value": "b"})
+    assert cache.get("a") is not None  # "b" is now the least recently used entry
+    cache.put("c", {"value": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": "a"}
+    assert cache.get("c") == {"value": "c"}
@@ -0,0 +1,50 @@
+from src.core.context import ContextManager, ContextReport, count_tokens, truncate_text
+
+def tool_turn(index: int, result: str) -> list:
+    call = {"id": f"call-{index}", "type": "function", "function": {"name": "search", "arguments": f'{{"q": "{index}"}}'}}
+    return [
+        {"role": "assistant", "content": None, "tool_calls": [call]},
+        {"role": "tool", "tool_call_id": f"call-{index}", "name": "search", "content": result},
+    ]
+
+def conversation(turns: int, result: str) -> list:
+    messages = [{"role": "system", "content": "You are helpful."}, {"role": "user", "content": "Plan a post."}]
+    for index in range(turns):
+        messages.extend(tool_turn(index, result))
+    return messages
+
+def test_truncate_text_keeps_head_and_tail():
+    text = "start " + "filler " * 2000 + "end"
+    shortened = truncate_text(text, 100)
+    assert shortened.startswith("start") and shortened.endswith("end")
+    assert "[truncated" in shortened
+    assert count_tokens(shortened) < count_tokens(text) // 5
+
+def test_short_text_is_unchanged():
+    assert truncate_text("short", 100) == "short"
+
+def test_history_within_budget_is_unchanged():
+    messages = conversation(2, "small result")
+    report = ContextReport()
+    assert ContextManager(prompt_budget=10_000).prepare(messages, report) == messages
+    assert report.requests == 1 and report.tokens_saved == 0
+
+def test_long_tool_results_are_truncated():
+    messages = conversation(1, "word " * 3000)
+    prepared = ContextManager(prompt_budget=100_000, max_tool_result_tokens=200).prepare(messages)
+    assert count_tokens(prepared[-1]["content"]) < 300
+    assert messages[-1]["content"] == "word " * 3000  # the history itself is not modified
+
+def test_old_turns_are_dropped_and_summarized():
+    messages = conversation(6, "result " * 100)
+    report = ContextReport()
+    manager = ContextManager(prompt_budget=500, max_tool_result_tokens=1000, keep_recent_turns=2)
+    prepared = manager.prepare(messages, report)
+    assert [message["role"] for message in prepared[:2]] == ["system", "user"]
+    assert "[Summary of earlier steps]" in prepared[1]["content"]
+    assert "Called search" in prepared[1]["content"]
+    # Every remaining tool result still follows the assistant message that requested it.
+    remaining = prepared[2:]
+    assert remaining[0]["role"] == "assistant"
+    assert len(remaining) <= 4
+    assert report.tokens_saved > 0
@@ -0,0 +1,65 @@
+import time
+import asyncio
+import pytest
+from src.core.deadlines import (
+    DeadlineExceeded, await_with_timeout, call_with_timeout, current_deadline, deadline_expired, deadline_scope,
+    mark_cut_short, time_budget,
+)
+
+def test_no_deadline_by_default():
+    with deadline_scope(0) as deadline:
+        assert deadline is None
+        assert time_budget() is None
+        assert time_budget(5) == 5
+
+def test_budget_is_bounded_by_the_deadline():
+    with deadline_scope(2) as deadline:
+        assert current_deadline() is deadline
+        assert 1.5 < time_budget() <= 2
+        assert time_budget(0.5) == 0.5
+        assert 1.5 < time_budget(60) <= 2
+    assert current_deadline() is None
+
+def test_an_earlier_outer_deadline_is_kept():
+    with deadline_scope(1) as outer:
+        with deadline_scope(60) as inner:
+            assert inner is outer
+        with deadline_scope(0.5) as inner:
+            assert inner is not outer
+
+def test_expired_deadline_raises():
+    with deadline_scope(0.01):
+        time.sleep(0.02)
+        assert deadline_expired()
+        with pytest.raises(DeadlineExceeded):
+            time_budget()
+
+def test_cut_short_propagates_to_the_outer_scope():
+    with deadline_scope(60) as outer:
+        with deadline_scope(30) as inner:
+            mark_cut_short()
+        assert inner.cut_short
+        assert outer.cut_short
+
+def test_mark_cut_short_without_a_deadline_is_ignored():
+    with deadline_scope(0):
+        mark_cut_short()
+
+def test_the_deadline_follows_threads():
+    with deadline_scope(5) as deadline:
+        assert call_with_timeout(1, current_deadline) is deadline
+
+def test_call_with_timeout():
+    assert call_with_timeout(None, lambda value: value * 2, value=2) == 4
+    with pytest.raises(TimeoutError):
+        call_with_timeout(0.05, lambda: time.sleep(1))
+    with pytest.raises(KeyError):
+        call_with_timeout(1, lambda: {}["missing"])
+
+def test_await_with_timeout_cancels():
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await await_with_timeout(asyncio.sleep(1), 0.05)
+        return await await_with_timeout(asyncio.sleep(0, result="done"))
+
+    assert asyncio.run(main()) == "done"
@@ -0,0 +1,91 @@
+import time
+import asyncio
+import pytest
+from src.core.hedging import Hedger
+
+def test_delay_uses_the_quantile_once_there_are_enough_samples():
+    hedger = Hedger(quantile=0.9, min_samples=10, initial_delay=5.0)
+    assert hedger.delay() == 5.0
+    for index in range(10):
+        hedger.observe(index / 10)
+    assert hedger.delay() == pytest.approx(0.9)
+
+def test_fast_calls_are_not_hedged():
+    hedger = Hedger(initial_delay=1.0, max_rate=1.0)
+    calls = []
+
+    def call():
+        calls.append(1)
+        return "ok"
+
+    assert hedger.run_sync(call) == "ok"
+    assert len(calls) == 1 and hedger.stats()["hedged"] == 0
+
+def test_slow_call_is_hedged_and_the_backup_wins():
+    hedger = Hedger(initial_delay=0.05, max_rate=1.0)
+    calls = []
+
+    def call():
+        calls.append(1)
+        time.sleep(0.5 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    assert hedger.run_sync(call) == 2
+    assert hedger.stats() == {"requests": 1, "hedged": 1, "hedge_wins": 1, "hedge_rate": 1.0}
+
+def test_the_hedge_rate_is_capped():
+    hedger = Hedger(initial_delay=0.01, max_rate=0.0)
+    calls = []
+
+    def call():
+        calls.append(1)
+        time.sleep(0.05)
+        return "slow"
+
+    assert hedger.run_sync(call) == "slow"
+    assert len(calls) == 1 and hedger.stats()["hedged"] == 0
+
+def test_a_failed_first_finisher_falls_back_to_the_other_call():
+    hedger = Hedger(initial_delay=0.05, max_rate=1.0)
+    attempts = []
+
+    async def make_call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(0.1)
+            return "primary"
+        raise RuntimeError("backup failed")
+
+    assert asyncio.run(hedger.run(make_call)) == "primary"
+
+def test_winner_prefers_a_success_among_calls_that_finished_together():
+    loop = asyncio.new_event_loop()
+    try:
+        failed, succeeded = loop.create_future(), loop.create_future()
+        failed.set_exception(RuntimeError("429"))
+        succeeded.set_result("answer")
+        for _ in range(5):
+            assert Hedger._winner({failed, succeeded}) is succeeded
+        assert Hedger._winner({failed}) is failed
+    finally:
+        loop.close()
+
+def test_cancelling_the_caller_during_the_hedge_delay_cancels_the_call():
+    hedger = Hedger(initial_delay=10.0, max_rate=1.0)
+    calls = []
+
+    async def make_call():
+        calls.append(asyncio.current_task())
+        await asyncio.sleep(10)
+
+    async def main():
+        caller = asyncio.ensure_future(hedger.run(make_call))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        # Checked inside the loop: asyncio.run cancels leftover tasks on its way out.
+        return [call.cancelled() for call in calls]
+
+    assert asyncio.run(main()) == [True]
@@ -0,0 +1,43 @@
+import pytest
+from src.agents.intent_router import IntentRouter
+
+def test_single_intent():
+    matches = IntentRouter().route("Write an Instagram post about our new latte.")
+    assert [match.intent for match in matches] == ["social_media"]
+    assert matches[0].confidence == pytest.approx(0.75)
+    assert set(matches[0].keywords) == {"instagram", "post"}
+
+def test_several_intents_best_first():
+    matches = IntentRouter().route("Respond to the latest reviews and create a social media post about the feedback.")
+    assert [match.intent for match in matches] == ["reputation", "social_media"]
+    assert matches[0].confidence >= matches[1].confidence
+
+def test_suffixes_match_and_repeated_keywords_count_once():
+    matches = IntentRouter().route("Reviews, reviews, reviews!")
+    assert matches[0].intent == "reputation"
+    assert matches[0].keywords == ("review",)
+    assert matches[0].confidence == pytest.approx(0.5)
+
+def test_weak_secondary_intents_are_dropped():
+    matches = IntentRouter().route("Check our rating, reputation and review feedback, then create something.")
+    assert [match.intent for match in matches] == ["reputation"]
+
+def test_no_match():
+    assert IntentRouter().route("What time is it?") == []
+
+def test_custom_keywords():
+    router = IntentRouter({"billing": {"invoice": 1.0}})
+    assert router.route("Send the INVOICE")[0].intent == "billing"
+
+def test_reviews_mentioned_in_a_post_goal_do_not_start_the_reputation_agent():
+    for goal in ("Create an Instagram post highlighting our best reviews",
+                 "Post a thank-you for our great review ratings"):
+        assert [match.intent for match in IntentRouter().route(goal)] == ["social_media"]
+
+def test_a_reputation_action_keeps_both_intents():
+    for goal in ("Create a post and reply to our new reviews", "Write a post and draft responses to new reviews"):
+        assert sorted(match.intent for match in IntentRouter().route(goal)) == ["reputation", "social_media"]
+
+def test_secondary_actions_can_be_turned_off():
+    router = IntentRouter(secondary_actions={})
+    assert len(router.route("Create an Instagram post highlighting our best reviews")) == 2
@@ -0,0 +1,50 @@
+import time
+from src.core import job_store as states
+from src.core.job_store import JobStore
+
+def test_job_lifecycle():
+    store = JobStore(":memory:")
+    job = store.create("Write a post.", "business_name: Harbor Books", timeout=30)
+    assert store.get(job["id"]) == job
+    assert store.get_profile(job["profile_hash"]) == "business_name: Harbor Books"
+    assert store.mark_running(job["id"])
+    assert not store.mark_running(job["id"])
+    store.finish(job["id"], states.DONE, result="Here is the post.")
+    finished = store.get(job["id"])
+    assert finished["status"] == states.DONE and finished["result"] == "Here is the post."
+    assert finished["finished_at"] >= finished["started_at"] >= finished["created_at"]
+    assert store.get("unknown") is None
+
+def test_only_queued_jobs_can_be_cancelled():
+    store = JobStore(":memory:")
+    queued = store.create("a", "profile")
+    running = store.create("b", "profile")
+    store.mark_running(running["id"])
+    assert store.cancel_queued(queued["id"])
+    assert not store.cancel_queued(running["id"])
+    assert not store.mark_running(queued["id"])
+    assert store.counts() == {states.CANCELLED: 1, states.RUNNING: 1}
+
+def test_recover_requeues_running_jobs_oldest_first(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    store = JobStore(path)
+    first = store.create("a", "profile")
+    second = store.create("b", "profile")
+    done = store.create("c", "profile")
+    store.mark_running(first["id"])
+    store.mark_running(done["id"])
+    store.finish(done["id"], states.DONE, result="ok")
+    restarted = JobStore(path)
+    assert restarted.recover() == [first["id"], second["id"]]
+    assert restarted.get(first["id"])["started_at"] is None
+
+def test_prune_deletes_old_finished_jobs_and_unused_profiles(monkeypatch):
+    store = JobStore(":memory:")
+    old = store.create("a", "old profile")
+    store.finish(old["id"], states.TIMED_OUT, result="partial")
+    queued = store.create("b", "new profile")
+    later = time.time() + 3600
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert store.prune(60) == 1
+    assert store.get(old["id"]) is None and store.get_profile(old["profile_hash"]) is None
+    assert store.get(queued["id"]) is not None
@@ -0,0 +1,97 @@
+import time
+import threading
+from src.core.jobs import AgentPool, Job, JobExecutor
+
+class GatedManager:
+    """Streams two chunks; the second one waits until `release` is set. A goal containing "fail" raises."""
+    def __init__(self):
+        self.release = threading.Event()
+
+    def delegate_task_stream(self, goal):
+        yield "Working... "
+        if not self.release.wait(5):
+            raise TimeoutError("the test never released the job")
+        if "fail" in goal:
+            raise RuntimeError("the model is down")
+        yield f"done: {goal}"
+
+class FakePool:
+    def __init__(self, manager):
+        self.manager = manager
+
+    def get(self, business_profile):
+        return self.manager
+
+def wait_for(condition, seconds: float = 5):
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+def test_job_moves_from_running_to_done():
+    manager = GatedManager()
+    executor = JobExecutor(max_workers=1, agent_pool=FakePool(manager))
+    try:
+        job = executor.get(executor.submit("Write a post.", "profile", owner="session-1"))
+        wait_for(lambda: job.output == "Working... ")
+        assert job.status == Job.RUNNING and not job.finished
+        manager.release.set()
+        wait_for(lambda: job.finished)
+        assert job.status == Job.DONE
+        assert job.output == "Working... done: Write a post."
+        assert job.error is None and job.elapsed_seconds > 0
+    finally:
+        executor.shutdown()
+
+def test_a_failing_job_keeps_its_partial_output():
+    manager = GatedManager()
+    manager.release.set()
+    executor = JobExecutor(max_workers=1, agent_pool=FakePool(manager))
+    try:
+        job = executor.get(executor.submit("This one will fail.", "profile"))
+        wait_for(lambda: job.finished)
+        assert job.status == Job.ERROR
+        assert job.error == "RuntimeError: the model is down"
+        assert job.output == "Working... "
+    finally:
+        executor.shutdown()
+
+def test_jobs_are_listed_per_owner_newest_first():
+    manager = GatedManager()
+    manager.release.set()
+    executor = JobExecutor(max_workers=2, agent_pool=FakePool(manager))
+    try:
+        first = executor.submit("a", "profile", owner="session-1")
+        executor.submit("b", "profile", owner="session-2")
+        second = executor.submit("c", "profile", owner="session-1")
+        assert [job.id for job in executor.jobs_for("session-1")] == [second, first]
+    finally:
+        executor.shutdown()
+
+def test_only_the_oldest_finished_jobs_are_pruned():
+    manager = GatedManager()
+    manager.release.set()
+    executor = JobExecutor(max_workers=1, agent_pool=FakePool(manager), history_limit=2)
+    try:
+        done_ids = [executor.submit(goal, "profile") for goal in ("a", "b")]
+        wait_for(lambda: all(executor.get(job_id).finished for job_id in done_ids))
+        manager.release.clear()
+        running = executor.submit("c", "profile")
+        queued = executor.submit("d", "profile")
+        # Two finished jobs were over the limit; unfinished jobs are never forgotten.
+        assert [executor.get(job_id) for job_id in done_ids] == [None, None]
+        assert executor.get(running) is not None and executor.get(queued) is not None
+        manager.release.set()
+    finally:
+        executor.shutdown()
+
+def test_agent_pool_reuses_warm_managers_and_evicts_the_least_recently_used():
+    pool = AgentPool(max_profiles=2)
+    first = pool.get("business_name: Harbor Books")
+    second = pool.get("business_name: Corner Cafe")
+    assert pool.get("business_name: Harbor Books") is first
+    pool.get("business_name: Book Barn")
+    assert len(pool) == 2
+    # "Corner Cafe" was the least recently used profile, so it was evicted and is built again.
+    assert pool.get("business_name: Corner Cafe") is not second
+    assert pool.get("business_name: Book Barn") is not None
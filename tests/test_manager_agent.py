@@ -0,0 +1,101 @@
+import time
+import asyncio
+import threading
+from src.agents.manager_agent import UNCLEAR_GOAL_MESSAGE, ManagerAgent
+from src.core.tracing import Tracer
+
+class FakeSpecialist:
+    """Answers after `seconds`, records its goals and how many specialists were running at once."""
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def __init__(self, name: str, seconds: float = 0.2):
+        self.name = name
+        self.seconds = seconds
+        self.goals = []
+
+    def _enter(self, goal):
+        self.goals.append(goal)
+        with self.lock:
+            FakeSpecialist.running += 1
+            FakeSpecialist.max_running = max(FakeSpecialist.max_running, FakeSpecialist.running)
+
+    def _leave(self):
+        with self.lock:
+            FakeSpecialist.running -= 1
+
+    def run(self, goal):
+        self._enter(goal)
+        time.sleep(self.seconds)
+        self._leave()
+        return f"{self.name} result"
+
+    async def arun(self, goal):
+        self._enter(goal)
+        await asyncio.sleep(self.seconds)
+        self._leave()
+        return f"{self.name} result"
+
+    def stream_run(self, goal):
+        yield self.name
+        yield " stream"
+
+    async def astream_run(self, goal):
+        yield self.name
+        yield " stream"
+
+BOTH = "Respond to the latest reviews and create a social media post about the feedback."
+
+def make_manager():
+    FakeSpecialist.running = FakeSpecialist.max_running = 0
+    manager = ManagerAgent("business_name: Harbor Books", tracer=Tracer())
+    manager._specialists = {"social_media": FakeSpecialist("Spark"), "reputation": FakeSpecialist("Echo")}
+    return manager
+
+def test_specialists_run_concurrently_and_their_results_are_merged():
+    manager = make_manager()
+    started = time.monotonic()
+    result = manager.delegate_task(BOTH, timeout=0)
+    assert time.monotonic() - started < 0.35
+    assert FakeSpecialist.max_running == 2
+    assert result == "### Reputation ('Echo')\n\nEcho result\n\n### Social Media ('Spark')\n\nSpark result"
+    # Each specialist is told which part of the goal is theirs.
+    assert "reputation part" in manager._specialists["reputation"].goals[0]
+    assert "social media part" in manager._specialists["social_media"].goals[0]
+
+def test_async_fan_out():
+    manager = make_manager()
+    started = time.monotonic()
+    result = asyncio.run(manager.adelegate_task(BOTH, timeout=0))
+    assert time.monotonic() - started < 0.35
+    assert result.index("Echo result") < result.index("Spark result")
+
+def test_a_single_intent_is_not_wrapped():
+    manager = make_manager()
+    assert manager.delegate_task("Write an Instagram post about our new latte.", timeout=0) == "Spark result"
+    assert manager._specialists["reputation"].goals == []
+
+def test_a_post_about_reviews_does_not_run_the_reputation_agent():
+    manager = make_manager()
+    assert manager.delegate_task("Create an Instagram post highlighting our best reviews", timeout=0) == "Spark result"
+    assert manager._specialists["reputation"].goals == []
+
+def test_streaming_streams_the_first_specialist_and_appends_the_others():
+    manager = make_manager()
+    chunks = list(manager.delegate_task_stream(BOTH, timeout=0))
+    assert chunks == ["### Reputation ('Echo')\n\n", "Echo", " stream", "\n\n### Social Media ('Spark')\n\nSpark result"]
+
+def test_async_streaming():
+    manager = make_manager()
+
+    async def collect():
+        return [chunk async for chunk in manager.adelegate_task_stream(BOTH, timeout=0)]
+
+    assert "".join(asyncio.run(collect())) == (
+        "### Reputation ('Echo')\n\nEcho stream\n\n### Social Media ('Spark')\n\nSpark result"
+    )
+
+def test_unclear_goals():
+    manager = make_manager()
+    assert manager.delegate_task("What time is it?", timeout=0) == UNCLEAR_GOAL_MESSAGE
@@ -0,0 +1,42 @@
+from src.core.profiles import ProfileStore, business_id_for, parse_profile
+
+PROFILE = """
+Business Name: "Harbor Books"
+Location: Portland
+Brand voice: warm   and witty
+We host a reading club on Fridays.
+"""
+
+def test_parse_profile():
+    fields, notes = parse_profile(PROFILE)
+    assert fields == {"business_name": "Harbor Books", "location": "Portland", "brand_voice": "warm and witty"}
+    assert notes == ["We host a reading club on Fridays."]
+
+def test_business_id_ignores_edits_outside_the_identity_fields():
+    fields, _ = parse_profile(PROFILE)
+    edited = PROFILE.replace("warm   and witty", "formal")
+    assert business_id_for(fields, PROFILE) == business_id_for(parse_profile(edited)[0], edited)
+
+def test_businesses_sharing_a_name_get_different_ids():
+    first = "business_name: Harbor Books\nlocation: Portland"
+    second = "business_name: Harbor Books\nlocation: Boston"
+    assert business_id_for(parse_profile(first)[0], first) != business_id_for(parse_profile(second)[0], second)
+
+def test_an_explicit_business_id_wins():
+    first = "business_id: store-7\nbusiness_name: Harbor Books"
+    second = "business_id: store-7\nbusiness_name: Harbor Books & Cafe"
+    assert business_id_for(parse_profile(first)[0], first) == business_id_for(parse_profile(second)[0], second)
+
+def test_profiles_without_a_name_fall_back_to_the_text():
+    first, second = "We sell books.", "We sell maps."
+    assert business_id_for({}, first) != business_id_for({}, second)
+
+def test_profile_store_compiles_once():
+    store = ProfileStore(max_entries=2)
+    assert store.compile(PROFILE) is store.compile(PROFILE)
+    compiled = store.compile(PROFILE)
+    assert compiled.business_name == "Harbor Books"
+    built = []
+    prompt = compiled.system_prompt("Agent", lambda: built.append(1) or "prompt")
+    assert compiled.system_prompt("Agent", lambda: built.append(1) or "other") == prompt == "prompt"
+    assert built == [1]
@@ -0,0 +1,116 @@
+import time
+import asyncio
+import httpx
+import openai
+import pytest
+from src.core import rate_limit
+from src.core.deadlines import deadline_scope
+from src.core.rate_limit import RateLimiter, RetryPolicy, TokenBucket, estimate_request_tokens, is_retryable_error
+
+def api_error(status: int, headers: dict = None):
+    request = httpx.Request("POST", "http://test/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """Records the backoff delays instead of waiting for them."""
+    delays = []
+
+    async def fake_async_sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", fake_async_sleep)
+    monkeypatch.setattr(rate_limit.time, "sleep", delays.append)
+    return delays
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10 tokens per second
+
+    async def take_three():
+        started = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    assert 0.05 <= asyncio.run(take_three()) < 1.0
+
+def test_token_bucket_caps_oversized_requests():
+    bucket = TokenBucket(rate_per_minute=60, capacity=5)
+    asyncio.run(asyncio.wait_for(bucket.acquire(50), timeout=1))
+    assert bucket.tokens == pytest.approx(0, abs=0.1)
+
+def test_rate_limiter_limits_can_be_disabled():
+    limiter = RateLimiter(requests_per_minute=None, tokens_per_minute=0)
+    assert limiter.request_bucket is None and limiter.token_bucket is None
+    asyncio.run(limiter.acquire(10_000))
+
+def test_estimate_request_tokens_grows_with_the_prompt():
+    short = estimate_request_tokens({"messages": [{"role": "user", "content": "hi"}]})
+    long = estimate_request_tokens({"messages": [{"role": "user", "content": "hi " * 400}]})
+    assert short >= 512 and long > short + 250
+
+def test_retryable_errors():
+    assert is_retryable_error(api_error(429))
+    assert is_retryable_error(api_error(503))
+    assert not is_retryable_error(api_error(400))
+    assert not is_retryable_error(ValueError("bad"))
+
+def test_retry_after_header_wins():
+    policy = RetryPolicy(base_delay=1, max_delay=30)
+    assert policy.backoff_delay(0, api_error(429, {"retry-after": "7"})) == 7
+    assert policy.backoff_delay(0, api_error(429, {"retry-after": "120"})) == 30
+    assert 0 <= policy.backoff_delay(3, api_error(429)) <= 8
+
+def test_run_retries_until_success(no_sleep):
+    calls = []
+
+    async def make_call():
+        calls.append(1)
+        if len(calls) < 3:
+            raise api_error(429)
+        return "ok"
+
+    assert asyncio.run(RetryPolicy(max_attempts=5).run(make_call)) == "ok"
+    assert len(calls) == 3 and len(no_sleep) == 2
+
+def test_errors_that_are_not_retryable_are_raised_at_once(no_sleep):
+    calls = []
+
+    async def make_call():
+        calls.append(1)
+        raise api_error(400)
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(RetryPolicy(max_attempts=5).run(make_call))
+    assert len(calls) == 1 and no_sleep == []
+
+def test_run_sync_gives_up_after_max_attempts(no_sleep):
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise api_error(500)
+
+    with pytest.raises(openai.APIStatusError):
+        RetryPolicy(max_attempts=3).run_sync(call)
+    assert len(calls) == 3 and len(no_sleep) == 2
+
+def test_no_retry_when_the_backoff_would_outlast_the_deadline(no_sleep):
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise api_error(429, {"retry-after": "20"})
+
+    with deadline_scope(5):
+        with pytest.raises(openai.APIStatusError):
+            RetryPolicy(max_attempts=5).run_sync(call)
+    assert len(calls) == 1 and no_sleep == []
+
+def test_from_settings(monkeypatch):
+    monkeypatch.setattr(rate_limit.settings, "LLM_MAX_ATTEMPTS", 7)
+    monkeypatch.setattr(rate_limit.settings, "LLM_RETRY_BASE_DELAY", 0.5)
+    monkeypatch.setattr(rate_limit.settings, "LLM_RETRY_MAX_DELAY", 9.0)
+    policy = RetryPolicy.from_settings()
+    assert (policy.max_attempts, policy.base_delay, policy.max_delay) == (7, 0.5, 9.0)
@@ -0,0 +1,59 @@
+from src.core.review_dedup import NearDuplicateIndex, adapt_reply, choose_bands, sentiment_bucket, shingles
+from src.core.review_store import ReviewStore
+
+COMMENT = "The coffee was excellent and the staff were very friendly, will come back soon!"
+
+def review(review_id: str, comment: str = COMMENT, rating: int = 5, author: str = "Ann") -> dict:
+    return {"id": review_id, "created_at": "2025-06-01", "author": author, "rating": rating, "comment": comment}
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles("Great COFFEE!!") == shingles("great coffee")
+    assert shingles("") == set()
+    assert shingles("ok") == {"ok"}
+
+def test_choose_bands_matches_the_threshold():
+    bands, rows = choose_bands(64, 0.8)
+    assert bands * rows == 64
+    assert abs((1 / bands) ** (1 / rows) - 0.8) < 0.1
+
+def test_sentiment_bucket():
+    assert [sentiment_bucket({"rating": rating}) for rating in (5, 4, 3, 1, None)] == [1, 1, 0, 0, -1]
+
+def test_adapt_reply_swaps_the_name():
+    reply = "Thank you, Ann! We hope to see you again, Ann."
+    assert adapt_reply(review("a"), reply, review("b", author="Bo")) == "Thank you, Bo! We hope to see you again, Bo."
+    assert adapt_reply(review("a", author="anonymous"), reply, review("b", author="Bo")) == reply
+
+def test_adapt_reply_inserts_names_literally():
+    reply = adapt_reply(review("a"), "Thank you, Ann!", review("b", author=r"J\1 D\g<0>"))
+    assert reply == r"Thank you, J\1 D\g<0>!"
+
+def test_adapt_reply_drops_the_name_for_an_anonymous_reviewer():
+    reply = "Dear Ann,\nThank you, Ann! Ann, we hope to see you again. Bye Ann."
+    adapted = adapt_reply(review("a", author=" Ann "), reply, review("b", author="Anonymous"))
+    assert adapted == "Hello,\nThank you! We hope to see you again. Bye."
+    assert adapt_reply(review("a"), reply, review("b", author="")) == adapted
+
+def test_near_duplicates_cluster_together():
+    index = NearDuplicateIndex(ReviewStore(":memory:"), "biz", threshold=0.8, num_perm=64)
+    matches = index.cluster([
+        review("a"),
+        review("b", COMMENT.replace("soon!", "soon!!")),
+        review("c", "Cold food, rude waiter and a very long wait for a table."),
+    ])
+    assert [match for match, _ in matches] == [None, "a", None]
+    assert index.stats()["duplicates"] == 1
+
+def test_reviews_with_a_different_sentiment_do_not_cluster():
+    index = NearDuplicateIndex(ReviewStore(":memory:"), "biz", threshold=0.8, num_perm=64)
+    matches = index.cluster([review("a"), review("b", rating=2)])
+    assert [match for match, _ in matches] == [None, None]
+
+def test_indexed_signatures_are_persisted():
+    store = ReviewStore(":memory:")
+    index = NearDuplicateIndex(store, "biz", threshold=0.8, num_perm=64)
+    (_, signature), = index.cluster([review("a")])
+    index.add([(review("a"), signature)])
+    reloaded = NearDuplicateIndex(store, "biz", threshold=0.8, num_perm=64)
+    assert reloaded.cluster([review("b")])[0][0] == "a"
+    assert NearDuplicateIndex(store, "other", threshold=0.8, num_perm=64).cluster([review("b")])[0][0] is None
@@ -0,0 +1,83 @@
+import json
+import pytest
+from src.core import review_ingest
+from src.core.review_ingest import (
+    ANONYMOUS_AUTHOR, author_name, is_after, iter_review_batches, iter_reviews, normalize_review, read_review_page,
+)
+from src.tools import reviews_api
+from src.tools.reviews_api import fetch_reviews, get_latest_reviews, iter_review_pages
+
+def write_export(path, entries):
+    path.write_text("\n".join(json.dumps(entry) for entry in entries) + "\n", encoding="utf-8")
+    return str(path)
+
+@pytest.fixture
+def shared_timestamps(tmp_path):
+    """Seven reviews, several of them created in the same second, in no particular order."""
+    entries = [
+        {"id": f"r{index}", "created_at": created_at, "text": f"Review {index}", "stars": 5}
+        for index, created_at in enumerate(
+            ["2025-06-02", "2025-06-01", "2025-06-02", "2025-06-02", "2025-06-03", "2025-06-01", "2025-06-02"]
+        )
+    ]
+    return write_export(tmp_path / "reviews.jsonl", entries)
+
+def test_normalize_review_maps_platform_fields():
+    review = normalize_review({"review_id": 7, "date": "2025-06-01", "user": "Ann", "stars": "4.0", "text": "Nice"}, "x:1")
+    assert review == {"id": "7", "created_at": "2025-06-01", "author": "Ann", "rating": 4, "comment": "Nice"}
+    fallback = normalize_review({"rating": "n/a"}, "export.jsonl:3")
+    assert fallback["id"] == "export.jsonl:3" and fallback["rating"] is None
+    assert fallback["author"] == ANONYMOUS_AUTHOR
+
+def test_author_name_skips_anonymous():
+    assert author_name({"author": " Ann "}) == "Ann"
+    assert author_name({"author": "Anonymous"}) is None
+    assert author_name({}) is None
+
+def test_malformed_lines_are_skipped_and_counted(tmp_path):
+    path = tmp_path / "reviews.jsonl"
+    path.write_text('{"id": "a", "text": "ok"}\nnot json\n\n[1, 2]\n{"id": "b", "text": "ok"}\n', encoding="utf-8")
+    stats = {}
+    assert [review["id"] for review in iter_reviews(str(path), stats)] == ["a", "b"]
+    assert stats == {"malformed": 2}
+    assert [len(batch) for batch in iter_review_batches(str(path), 1)] == [1, 1]
+
+def test_is_after():
+    review = {"id": "r5", "created_at": "2025-06-02"}
+    assert is_after(review)
+    assert is_after(review, since="2025-06-01")
+    assert not is_after(review, since="2025-06-02")
+    assert is_after(review, since="2025-06-02", after_id="r4")
+    assert not is_after(review, since="2025-06-02", after_id="r5")
+
+def test_read_review_page_is_ordered_and_limited(shared_timestamps):
+    page = read_review_page(shared_timestamps, limit=3)
+    assert [review["id"] for review in page] == ["r1", "r5", "r0"]
+    page = read_review_page(shared_timestamps, since="2025-06-02", after_id="r2", limit=10)
+    assert [review["id"] for review in page] == ["r3", "r6", "r4"]
+
+def test_paging_does_not_skip_reviews_created_at_the_same_time(shared_timestamps, monkeypatch):
+    monkeypatch.setattr(reviews_api.settings, "REVIEWS_SOURCE_PATH", shared_timestamps)
+    seen, since, after_id = [], None, None
+    while True:
+        page = fetch_reviews(since=since, after_id=after_id, limit=2)
+        if not page:
+            break
+        seen.extend(review["id"] for review in page)
+        since, after_id = page[-1]["created_at"], page[-1]["id"]
+    assert seen == ["r1", "r5", "r0", "r2", "r3", "r6", "r4"]
+
+def test_an_export_is_read_once_for_all_pages(shared_timestamps, monkeypatch):
+    monkeypatch.setattr(reviews_api.settings, "REVIEWS_SOURCE_PATH", shared_timestamps)
+    reads = []
+    original = review_ingest.iter_reviews
+    monkeypatch.setattr(review_ingest, "iter_reviews", lambda path, stats=None: reads.append(path) or original(path, stats))
+    pages = list(iter_review_pages(page_size=2))
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    assert len(reads) == 1
+
+def test_sample_reviews_are_paged():
+    pages = list(iter_review_pages(page_size=2))
+    assert [[review["id"] for review in page] for page in pages] == [["rev-0001", "rev-0002"], ["rev-0003"]]
+    assert [review["id"] for review in fetch_reviews(since="2025-06-03T14:40:00Z")] == ["rev-0003"]
+    assert json.loads(get_latest_reviews(limit=1))[0]["id"] == "rev-0001"
@@ -0,0 +1,56 @@
+import sqlite3
+from src.core.review_store import ReviewStore
+
+def review(review_id: str, created_at: str = "2025-06-01T10:00:00Z") -> dict:
+    return {"id": review_id, "created_at": created_at, "author": "Ann", "rating": 5, "comment": "Great."}
+
+def test_watermark_only_moves_forward():
+    store = ReviewStore(":memory:")
+    assert store.get_watermark("biz") is None
+    store.set_watermark("biz", "2025-06-02T00:00:00Z", "rev-2")
+    store.set_watermark("biz", "2025-06-01T00:00:00Z", "rev-9")
+    assert store.get_watermark("biz") == ("2025-06-02T00:00:00Z", "rev-2")
+
+def test_watermark_orders_reviews_created_at_the_same_time_by_id():
+    store = ReviewStore(":memory:")
+    store.set_watermark("biz", "2025-06-02T00:00:00Z", "rev-2")
+    store.set_watermark("biz", "2025-06-02T00:00:00Z", "rev-1")
+    assert store.get_watermark("biz") == ("2025-06-02T00:00:00Z", "rev-2")
+    store.set_watermark("biz", "2025-06-02T00:00:00Z", "rev-3")
+    assert store.get_watermark("biz") == ("2025-06-02T00:00:00Z", "rev-3")
+
+def test_businesses_are_kept_apart():
+    store = ReviewStore(":memory:")
+    store.set_watermark("a", "2025-06-02T00:00:00Z", "rev-1")
+    store.save_drafts("a", [(review("rev-1"), "Thanks!")])
+    assert store.get_watermark("b") is None
+    assert store.get_drafts("b", ["rev-1"]) == {}
+
+def test_drafts_round_trip():
+    store = ReviewStore(":memory:")
+    store.save_drafts("biz", [(review("rev-1", "2025-06-01"), "First"), (review("rev-2", "2025-06-02"), "Second")])
+    store.save_drafts("biz", [(review("rev-1", "2025-06-01"), "First, edited")])
+    assert store.get_drafts("biz", ["rev-1", "rev-2", "rev-3"]) == {"rev-1": "First, edited", "rev-2": "Second"}
+    assert [reply for _, reply in store.recent_drafts("biz", 1)] == ["Second"]
+    assert store.get_drafted_reviews("biz", ["rev-2"])["rev-2"] == (review("rev-2", "2025-06-02"), "Second")
+
+def test_reset_forgets_one_business():
+    store = ReviewStore(":memory:")
+    for business_id in ("a", "b"):
+        store.set_watermark(business_id, "2025-06-02", "rev-1")
+        store.save_drafts(business_id, [(review("rev-1"), "Thanks!")])
+    store.reset("a")
+    assert store.get_watermark("a") is None and store.get_drafts("a", ["rev-1"]) == {}
+    assert store.get_watermark("b") == ("2025-06-02", "rev-1")
+
+def test_stores_without_watermark_ids_are_migrated(tmp_path):
+    path = str(tmp_path / "reviews.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE watermarks (business_id TEXT PRIMARY KEY, since TEXT NOT NULL, updated_at REAL NOT NULL)")
+    conn.execute("INSERT INTO watermarks VALUES ('biz', '2025-06-02T00:00:00Z', 0)")
+    conn.commit()
+    conn.close()
+    store = ReviewStore(path)
+    assert store.get_watermark("biz") == ("2025-06-02T00:00:00Z", "")
+    store.set_watermark("biz", "2025-06-02T00:00:00Z", "rev-1")
+    assert store.get_watermark("biz") == ("2025-06-02T00:00:00Z", "rev-1")
@@ -0,0 +1,43 @@
+import pytest
+from src.core import review_triage
+from src.core.review_triage import TEMPLATES, ReviewTriage, review_features, templated_reply
+
+def review(review_id: str, comment: str, rating=5, author: str = "Ann") -> dict:
+    return {"id": review_id, "created_at": "2025-06-01", "author": author, "rating": rating, "comment": comment}
+
+def test_only_short_positive_reviews_are_simple():
+    triage = ReviewTriage(min_rating=4, max_words=20, min_score=1.0)
+    reviews = [
+        review("simple", "Amazing, friendly and delicious!"),
+        review("low-rating", "Amazing and delicious!", rating=3),
+        review("contrast", "Amazing food but the music was loud."),
+        review("question", "Delicious! Do you open on Sundays?"),
+        review("long", "Amazing " + "and very good " * 10),
+        review("no-rating", "Amazing!", rating=None),
+    ]
+    assert triage.simple_mask(reviews) == [True, False, False, False, False, False]
+    result = triage.split(reviews)
+    assert [item["id"] for item in result.templated] == ["simple"]
+    assert len(result.needs_llm) == 5
+    assert triage.simple_mask([]) == []
+
+def test_batch_features_match_the_features_of_each_review():
+    if review_triage.np is None:
+        pytest.skip("NumPy is not installed")
+    reviews = [
+        review("a", "Amazing, friendly! Great?"),
+        review("b", "", rating=None),
+        review("c", "Not good, but the coffee was fresh.", rating=2),
+    ]
+    expected = [review_features(item) for item in reviews]
+    assert review_triage.np.allclose(review_triage.batch_features(reviews), expected, equal_nan=True)
+
+def test_templated_reply_is_stable_and_named():
+    reply = templated_reply(review("rev-1", "Great!"), "Harbor Books")
+    assert reply == templated_reply(review("rev-1", "Great!"), "Harbor Books")
+    assert reply in [named.format(author="Ann", business="Harbor Books") for named, _ in TEMPLATES]
+
+def test_templated_reply_without_an_author():
+    reply = templated_reply(review("rev-1", "Great!", author="anonymous"))
+    assert "anonymous" not in reply
+    assert reply in [unnamed.format(business="our team") for _, unnamed in TEMPLATES]
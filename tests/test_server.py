@@ -0,0 +1,112 @@
+import json
+import asyncio
+import pytest
+from src.core import job_store as states
+from src.core.deadlines import mark_cut_short
+from src.core.job_service import JobService
+from src.core.job_store import JobStore
+from src.server import HttpError, ServiceApp
+
+class FakeManager:
+    """Streams the goal back; a goal containing "slow" runs out of time."""
+    async def adelegate_task_stream(self, goal, timeout=None):
+        yield "Answer: "
+        await asyncio.sleep(0)
+        if "slow" in goal:
+            mark_cut_short()
+            yield "partial"
+            return
+        if "fail" in goal:
+            raise RuntimeError("the model is down")
+        yield goal
+
+class FakePool:
+    def get(self, business_profile):
+        return FakeManager()
+
+def make_service(**options) -> JobService:
+    return JobService(job_store=JobStore(":memory:"), agent_pool=FakePool(), **options)
+
+async def finish(service, job_id):
+    while service.get(job_id)["status"] not in states.FINISHED_STATUSES:
+        await asyncio.sleep(0.01)
+    return service.get(job_id)
+
+def run_jobs(goals, **options):
+    async def main():
+        service = make_service(workers=2, **options)
+        await service.start()
+        app = ServiceApp(service, default_profile="business_name: Harbor Books", api_token="")
+        try:
+            ids = [(await app.handle("POST", "/jobs", {}, json.dumps({"goal": goal}).encode()))[1]["id"] for goal in goals]
+            jobs = [await finish(service, job_id) for job_id in ids]
+            results = [await app.handle("GET", f"/jobs/{job_id}/result", {}, b"") for job_id in ids]
+        finally:
+            await service.stop()
+        return jobs, results
+
+    return asyncio.run(main())
+
+def test_jobs_run_to_completion():
+    jobs, results = run_jobs(["Write a post.", "This one is slow.", "This one will fail."])
+    assert [job["status"] for job in jobs] == [states.DONE, states.TIMED_OUT, states.ERROR]
+    status, view, _ = results[0]
+    assert status == 200 and view["result"] == "Answer: Write a post."
+    assert results[1][1]["result"] == "Answer: partial"
+    assert results[2][1]["error"] == "RuntimeError: the model is down"
+
+def handle(app, method, path, body=b"", headers=None):
+    return asyncio.run(app.handle(method, path, headers or {}, body))
+
+def test_submissions_are_validated():
+    app = ServiceApp(make_service(), default_profile=None, api_token="")
+    for body in (b"not json", b'{"goal": ""}', b'{"goal": "x"}', b'{"goal": "x", "business_profile": "p", "timeout": -1}'):
+        with pytest.raises(HttpError) as error:
+            handle(app, "POST", "/jobs", body)
+        assert error.value.status == 400
+
+def test_a_full_queue_is_refused_with_retry_after():
+    async def main():
+        service = make_service(workers=1, max_queue=1)
+        service._queue = asyncio.Queue()
+        app = ServiceApp(service, default_profile="profile", api_token="")
+        status, view, headers = await app.handle("POST", "/jobs", {}, b'{"goal": "first"}')
+        assert status == 202 and headers["Location"] == f"/jobs/{view['id']}"
+        with pytest.raises(HttpError) as error:
+            await app.handle("POST", "/jobs", {}, b'{"goal": "second"}')
+        return error.value
+
+    error = asyncio.run(main())
+    assert error.status == 429 and int(error.headers["Retry-After"]) >= 1
+
+def test_results_of_unfinished_jobs_are_a_conflict():
+    service = make_service()
+    job = service.job_store.create("Write a post.", "profile")
+    app = ServiceApp(service, api_token="")
+    with pytest.raises(HttpError) as error:
+        handle(app, "GET", f"/jobs/{job['id']}/result")
+    assert error.value.status == 409
+    assert handle(app, "GET", f"/jobs/{job['id']}")[1]["status"] == states.QUEUED
+
+def test_queued_jobs_can_be_cancelled():
+    service = make_service()
+    job = service.job_store.create("Write a post.", "profile")
+    app = ServiceApp(service, api_token="")
+    with pytest.raises(HttpError) as error:
+        handle(app, "GET", f"/jobs/{job['id']}/cancel")
+    assert error.value.status == 405
+    assert handle(app, "POST", f"/jobs/{job['id']}/cancel")[1]["status"] == states.CANCELLED
+
+def test_routes_and_auth():
+    app = ServiceApp(make_service(), api_token="secret")
+    status, payload, _ = handle(app, "GET", "/health")
+    assert status == 200 and payload["status"] == "ok"
+    with pytest.raises(HttpError) as error:
+        handle(app, "GET", "/metrics")
+    assert error.value.status == 401 and error.value.headers == {"WWW-Authenticate": "Bearer"}
+    status, text, _ = handle(app, "GET", "/metrics", headers={"authorization": "Bearer secret"})
+    assert status == 200 and isinstance(text, str)
+    for path in ("/nowhere", "/jobs/0123456789abcdef"):
+        with pytest.raises(HttpError) as error:
+            handle(app, "GET", path, headers={"authorization": "Bearer secret"})
+        assert error.value.status == 404
@@ -0,0 +1,78 @@
+import json
+import datetime
+import pytest
+from src.agents.social_media_agent import SocialMediaAgent, calendar_slots
+from src.core.tracing import Tracer
+from src.tools import social_api
+
+PROFILE = "business_name: Harbor Books\nlocation: Portland\nbusiness_type: bookstore"
+
+def post(slot: int, caption: str = None) -> dict:
+    return {"slot": slot, "caption": f"Post {slot} #books" if caption is None else caption,
+            "image_description": f"A shelf of books, picture {slot}"}
+
+def answer(*posts) -> dict:
+    return {"role": "assistant", "content": json.dumps({"posts": list(posts)})}
+
+@pytest.fixture
+def agent():
+    return SocialMediaAgent(PROFILE, tracer=Tracer())
+
+@pytest.fixture
+def completions(agent, monkeypatch):
+    """Replaces the completion call with canned answers; records the slots of every request."""
+    answers, requested = [], []
+
+    def fake_complete(messages, use_tools=True, **options):
+        request = messages[-1]["content"]
+        requested.append([slot["slot"] for slot in json.loads(request.split("slots:\n")[1].split("\n\n")[0])])
+        return answers.pop(0)
+
+    monkeypatch.setattr(agent, "_complete", fake_complete)
+    monkeypatch.setattr(agent, "_research", lambda query: "No local events found.")
+    return answers, requested
+
+def test_calendar_slots():
+    slots = calendar_slots(datetime.date(2025, 6, 30), days=2, posts_per_day=2)
+    assert slots == [
+        {"slot": 1, "date": "2025-06-30"}, {"slot": 2, "date": "2025-06-30"},
+        {"slot": 3, "date": "2025-07-01"}, {"slot": 4, "date": "2025-07-01"},
+    ]
+
+def test_only_valid_posts_for_requested_slots_are_kept(agent):
+    slots = calendar_slots(datetime.date(2025, 6, 2), days=3)
+    content = "```json\n" + json.dumps({"posts": [
+        post(1), post(1, "A second post for slot 1"), post(2, "   "), post(9), {"slot": 3, "caption": "No image"},
+    ]}) + "\n```"
+    valid = agent._valid_posts(content, slots)
+    assert list(valid) == [1]
+    assert valid[1]["date"] == "2025-06-02" and valid[1]["caption"] == "Post 1 #books"
+    assert agent._valid_posts("not json", slots) == {}
+
+def test_only_the_invalid_slots_are_requested_again(agent, completions):
+    answers, requested = completions
+    answers.extend([answer(post(1), post(2, ""), post(3)), answer(post(2))])
+    slots = calendar_slots(datetime.date(2025, 6, 2), days=3)
+    posts = agent._draft_calendar_batch(slots, {}, "", 1)
+    assert sorted(posts) == [1, 2, 3]
+    assert requested == [[1, 2, 3], [2]]
+
+def test_queue_ids_follow_the_posts_they_belong_to(agent, monkeypatch):
+    slots = calendar_slots(datetime.date(2025, 6, 2), days=3)
+    posts = {slot["slot"]: dict(post(slot["slot"]), date=slot["date"]) for slot in slots}
+    # The queue rejects the middle post, so the ids no longer line up with the request by position alone.
+    posts[2]["caption"] = " "
+    calendar = agent._finish_calendar(slots, posts, queue=True)
+    scheduled = {item["id"]: item for item in social_api.get_scheduled_posts()}
+    assert "queue_id" not in calendar[1]
+    for item in (calendar[0], calendar[2]):
+        assert scheduled[item["queue_id"]]["caption"] == item["caption"]
+        assert scheduled[item["queue_id"]]["scheduled_for"] == item["date"]
+
+def test_plan_calendar_queues_every_post_once(agent, completions):
+    answers, requested = completions
+    answers.append(answer(post(3), post(1), post(2)))
+    calendar = agent.plan_calendar(datetime.date(2025, 6, 2), days=3)
+    assert [item["slot"] for item in calendar] == [1, 2, 3]
+    assert len({item["queue_id"] for item in calendar}) == 3
+    assert requested == [[1, 2, 3]]
@@ -0,0 +1,89 @@
+import json
+import asyncio
+import pytest
+from src.core.tracing import (
+    JsonLinesExporter, MetricsRegistry, PrometheusExporter, Tracer, annotate, current_span, format_spans,
+)
+
+def test_spans_nest_and_share_the_trace():
+    tracer = Tracer()
+    with tracer.capture() as spans:
+        with tracer.span("agent_run", agent="Test") as run:
+            with tracer.span("tool_call", tool="search") as call:
+                assert current_span() is call
+                annotate(search_cache="hit")
+            assert current_span() is run
+    assert current_span() is None
+    child, parent = spans
+    assert child.parent_id == parent.span_id and child.trace_id == parent.trace_id
+    assert child.attributes == {"tool": "search", "search_cache": "hit"}
+    assert child.duration_seconds is not None
+
+def test_errors_mark_the_span():
+    tracer = Tracer()
+    with tracer.capture() as spans:
+        with pytest.raises(ValueError):
+            with tracer.span("tool_call"):
+                raise ValueError("boom")
+    assert spans[0].status == "error"
+    assert spans[0].attributes["error"] == "ValueError: boom"
+
+def test_capture_follows_asyncio_tasks():
+    tracer = Tracer()
+
+    async def work(index):
+        with tracer.span("tool_call", index=index):
+            await asyncio.sleep(0)
+
+    async def main():
+        with tracer.span("agent_run"):
+            await asyncio.gather(work(1), work(2))
+
+    with tracer.capture() as spans:
+        asyncio.run(main())
+    assert sorted(span.name for span in spans) == ["agent_run", "tool_call", "tool_call"]
+    root = next(span for span in spans if span.name == "agent_run")
+    assert all(span.parent_id == root.span_id for span in spans if span.name == "tool_call")
+
+def test_json_lines_exporter(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer = Tracer([JsonLinesExporter(str(path))])
+    with tracer.span("agent_run", agent="Test"):
+        pass
+    record = json.loads(path.read_text(encoding="utf-8"))
+    assert record["name"] == "agent_run" and record["attributes"] == {"agent": "Test"}
+
+def test_prometheus_rendering():
+    registry = MetricsRegistry()
+    registry.inc("jobs_total", help_text="Jobs.", status="done")
+    registry.inc("jobs_total", 2, status="done")
+    registry.observe("latency_seconds", 0.3, buckets=(0.1, 0.5, 1.0))
+    text = registry.render_prometheus()
+    assert "# HELP jobs_total Jobs." in text
+    assert 'jobs_total{status="done"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="0.5"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "latency_seconds_count 1" in text
+
+def test_prometheus_exporter_counts_tokens_and_tool_calls():
+    exporter = PrometheusExporter()
+    tracer = Tracer([exporter])
+    with tracer.span("llm_iteration", agent="Test", prompt_tokens=120, completion_tokens=30, cache_hit=False):
+        pass
+    with tracer.span("tool_call", agent="Test", tool="search"):
+        pass
+    text = exporter.render()
+    assert 'agent_llm_tokens_total{agent="Test",kind="prompt"} 120' in text
+    assert 'agent_completion_cache_requests_total{agent="Test",outcome="miss"} 1' in text
+    assert 'agent_tool_calls_total{status="ok",tool="search"} 1' in text
+
+def test_format_spans_indents_children():
+    tracer = Tracer()
+    with tracer.capture() as spans:
+        with tracer.span("agent_run"):
+            with tracer.span("tool_call", tool="search"):
+                pass
+    lines = format_spans(spans).splitlines()
+    assert lines[0].startswith("agent_run")
+    assert lines[1].startswith("  tool_call") and lines[1].endswith("tool=search")
@@ -0,0 +1,85 @@
+import time
+import threading
+import pytest
+from src.tools import web_search
+from src.tools.web_search import clear_search_cache, get_search_cache_stats, search_local_trends
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Replaces the search backend; returns the list of queries sent upstream."""
+    queries = []
+
+    def fake_search(api_key, query, search_depth, include_answer):
+        queries.append(query)
+        return {"answer": f"answer for {query}", "results": []}
+
+    monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(web_search, "_search_upstream", fake_search)
+    clear_search_cache()
+    yield queries
+    clear_search_cache()
+
+def counters() -> dict:
+    stats = get_search_cache_stats()
+    return {name: stats[name] for name in ("hits", "misses", "deduplicated", "upstream_calls", "errors")}
+
+def test_queries_that_differ_in_case_and_spacing_share_an_entry(upstream):
+    assert search_local_trends("Coffee  events in Portland") == "answer for Coffee  events in Portland"
+    assert search_local_trends("  coffee events IN portland ") == "answer for Coffee  events in Portland"
+    assert upstream == ["Coffee  events in Portland"]
+    assert counters() == {"hits": 1, "misses": 1, "deduplicated": 0, "upstream_calls": 1, "errors": 0}
+
+def test_entries_expire(upstream, monkeypatch):
+    monkeypatch.setattr(web_search.settings, "SEARCH_CACHE_TTL_SECONDS", 60)
+    search_local_trends("events")
+    later = time.monotonic() + 61
+    monkeypatch.setattr(web_search.time, "monotonic", lambda: later)
+    search_local_trends("events")
+    assert upstream == ["events", "events"]
+
+def test_least_recently_used_entry_is_evicted(upstream, monkeypatch):
+    monkeypatch.setattr(web_search.settings, "SEARCH_CACHE_MAX_ENTRIES", 2)
+    for query in ("a", "b", "a", "c", "a", "b"):
+        search_local_trends(query)
+    # "b" was evicted when "c" arrived; "a" stayed because it was used again.
+    assert upstream == ["a", "b", "c", "b"]
+    assert get_search_cache_stats()["entries"] == 2
+
+def test_concurrent_identical_queries_share_one_request(upstream, monkeypatch):
+    release = threading.Event()
+
+    def slow_search(api_key, query, search_depth, include_answer):
+        upstream.append(query)
+        release.wait(5)
+        return {"answer": "shared", "results": []}
+
+    monkeypatch.setattr(web_search, "_search_upstream", slow_search)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(search_local_trends("events"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while get_search_cache_stats()["deduplicated"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["shared"] * 4
+    assert upstream == ["events"]
+    assert counters() == {"hits": 0, "misses": 1, "deduplicated": 3, "upstream_calls": 1, "errors": 0}
+
+def test_errors_are_not_cached(upstream, monkeypatch):
+    def failing_search(api_key, query, search_depth, include_answer):
+        upstream.append(query)
+        raise ConnectionError("network down")
+
+    monkeypatch.setattr(web_search, "_search_upstream", failing_search)
+    assert search_local_trends("events").startswith("Error performing search")
+    assert search_local_trends("events").startswith("Error performing search")
+    assert upstream == ["events", "events"]
+    assert counters() == {"hits": 0, "misses": 2, "deduplicated": 0, "upstream_calls": 2, "errors": 2}
+
+def test_a_missing_api_key_is_reported(upstream, monkeypatch):
+    monkeypatch.delenv("TAVILY_API_KEY")
+    assert search_local_trends("events") == "Error: TAVILY_API_KEY is not set."
+    assert upstream == [] and get_search_cache_stats()["entries"] == 0